@@ -0,0 +1,97 @@
+"""
+法规条文切分
+把清洗后的法规文本按“第N条”切分为条文（没有“第N条”的意见、通知类文件按“一、二、”等大段切分），
+并把“第三条第二款”“第3条”“二、基本原则”等各种写法的条款编号归一为同一个键，
+供全文检索的原文索引和修订后的条文级比对使用。
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+_NUMERAL = "零〇一二三四五六七八九十百千两"
+ARTICLE_RE = re.compile(rf"^[ \t　]*第\s*([{_NUMERAL}\d]+)\s*条", re.M)
+SECTION_RE = re.compile(r"^[ \t　]*([一二三四五六七八九十]+)、", re.M)
+# 章、节标题不属于任何条文，比对时不应因其变化而把相邻条文判为修改
+HEADING_RE = re.compile(rf"^[ \t　]*第\s*[{_NUMERAL}\d]+\s*[章节编][^\n]*$", re.M)
+PREAMBLE = "序言"
+
+_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_UNITS = {"十": 10, "百": 100, "千": 1000}
+
+
+def chinese_to_int(numeral: str) -> Optional[int]:
+    """中文或阿拉伯数字 → 整数（“二十三” → 23，“一百零五” → 105）；无法识别时返回 None"""
+    numeral = numeral.strip()
+    if numeral.isdigit():
+        return int(numeral)
+    total = current = 0
+    for ch in numeral:
+        if ch in _DIGITS:
+            current = _DIGITS[ch]
+        elif ch in _UNITS:
+            total += (current or 1) * _UNITS[ch]
+            current = 0
+        else:
+            return None
+    return total + current
+
+
+@dataclass
+class Article:
+    number: str  # 原文中的编号，如“第三条”“二、”，编号之前的内容为“序言”
+    key: str  # 归一化编号，如“第3条”“2、”
+    text: str
+
+    @property
+    def digest(self) -> str:
+        """忽略编号和空白差异的内容摘要，用于判断条文是否修改（重编号的条文摘要不变）"""
+        body = self.text[len(self.number):] if self.text.startswith(self.number) else self.text
+        return hashlib.sha1(re.sub(r"\s+", "", body).encode("utf-8")).hexdigest()
+
+
+def article_key(reference: str) -> Optional[str]:
+    """把结果中的条款编号（“第三条第二款”“第3条”“二、基本原则”）归一化为条文键；无法识别时返回 None"""
+    if not reference:
+        return None
+    m = re.search(rf"第\s*([{_NUMERAL}\d]+)\s*条", reference)
+    if m:
+        n = chinese_to_int(m.group(1))
+        return f"第{n}条" if n is not None else None
+    m = re.match(r"\s*([一二三四五六七八九十]+)、", reference)
+    if m:
+        return f"{chinese_to_int(m.group(1))}、"
+    return None
+
+
+def split_articles(text: str) -> List[Article]:
+    """按条文切分；既没有“第N条”也没有“一、”时整篇作为一条“序言”"""
+    pattern = ARTICLE_RE if ARTICLE_RE.search(text) else SECTION_RE
+    matches = list(pattern.finditer(text))
+    articles: List[Article] = []
+    start = matches[0].start() if matches else len(text)
+    preamble = HEADING_RE.sub("", text[:start]).strip()
+    if preamble:
+        articles.append(Article(PREAMBLE, PREAMBLE, preamble))
+
+    seen = set()
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        body = HEADING_RE.sub("", text[m.start():end]).strip()
+        n = chinese_to_int(m.group(1))
+        key = f"第{n}条" if pattern is ARTICLE_RE else f"{n}、"
+        if key in seen:
+            # 附件中重新编号的条文，与正文条文区分
+            key = f"{key}#{i}"
+        seen.add(key)
+        articles.append(Article(m.group(0).strip(), key, body))
+    return articles
+
+
+def to_records(articles: List[Article]) -> List[Dict[str, str]]:
+    """条文 → 可写入结果JSON的记录（结果中的“原文条款”）"""
+    return [{"条款编号": a.number, "条文键": a.key, "内容": a.text} for a in articles]
+
+
+def from_records(records: List[Dict[str, Any]]) -> List[Article]:
+    return [Article(r.get("条款编号", ""), r.get("条文键", ""), r.get("内容", "")) for r in records or []]
@@ -0,0 +1,345 @@
+"""
+异步LLM调用层
+基于各提供商的异步客户端并开启流式输出：
+· 单个事件循环内可同时挂起数百个请求（由信号量限制并发上限）
+· 每个请求独立超时，可随时取消
+· 记录首token时延(TTFT)与输出速率(tokens/秒)
+· 可选对冲：请求耗时超过该模型近期 p90 时向同一提供商补发一个请求，取先成功的结果
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from circuit_breaker import CircuitBreakerRegistry, optional_guard
+from config import LLMConfig
+from text_cleaner import estimate_tokens
+
+try:
+    from openai import AsyncOpenAI
+except ImportError:
+    AsyncOpenAI = None
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+
+# 流式输出回调：每收到一段文本调用一次，返回 True 时提前结束接收
+DeltaCallback = Callable[[str], Optional[bool]]
+
+T = TypeVar("T")
+
+
+@dataclass
+class CallMetrics:
+    """单次LLM调用的时延与吞吐指标"""
+    provider: str
+    model: str
+    started_at: float = field(default_factory=time.perf_counter)
+    queued_at: Optional[float] = None  # 开始等待并发槽位的时间
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0  # 命中提供商提示词缓存的输入tokens
+    output_chars: int = 0
+    retries: int = 0  # SDK内部重试次数（429/5xx/连接错误）
+
+    @property
+    def queue_wait(self) -> float:
+        """等待并发槽位的时间（秒）"""
+        if self.queued_at is None:
+            return 0.0
+        return self.started_at - self.queued_at
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """首token时延（秒）"""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    @property
+    def tokens_per_sec(self) -> Optional[float]:
+        """首token之后的输出速率"""
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        generating = self.finished_at - self.first_token_at
+        return self.output_tokens / generating if generating > 0 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        def _round(value):
+            return round(value, 3) if value is not None else None
+
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "queue_wait_s": _round(self.queue_wait),
+            "ttft_s": _round(self.ttft),
+            "duration_s": _round(self.duration),
+            "tokens_per_s": _round(self.tokens_per_sec),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "retries": self.retries,
+        }
+
+
+def record_openai_usage(metrics: CallMetrics, usage: Any):
+    """从 OpenAI 兼容接口的 usage 中读取tokens用量"""
+    metrics.input_tokens = usage.prompt_tokens or 0
+    metrics.output_tokens = usage.completion_tokens or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    metrics.cached_tokens = getattr(details, "cached_tokens", None) or 0
+
+
+def record_anthropic_usage(metrics: CallMetrics, usage: Any):
+    """从 Anthropic 的 usage 中读取tokens用量"""
+    metrics.input_tokens = usage.input_tokens
+    metrics.output_tokens = usage.output_tokens
+    metrics.cached_tokens = getattr(usage, "cache_read_input_tokens", None) or 0
+
+
+@dataclass
+class LLMResponse:
+    """流式调用的完整结果"""
+    content: str
+    metrics: CallMetrics
+    stopped_early: bool = False  # 回调要求提前结束，content 不完整
+
+
+class LatencyTracker:
+    """按 (提供商, 模型) 保存最近的请求耗时，用于估计耗时分位数"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, llm_config: LLMConfig, seconds: float):
+        key = (llm_config.provider, llm_config.model)
+        self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, llm_config: LLMConfig, q: float, min_samples: int = 1) -> Optional[float]:
+        """样本不足 min_samples 时返回 None"""
+        samples = self._samples.get((llm_config.provider, llm_config.model))
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+@dataclass
+class HedgePolicy:
+    """对冲请求策略及其统计"""
+    percentile: float = 0.9  # 主请求超过该分位耗时仍未完成时发出对冲请求
+    min_samples: int = 10  # 该模型至少有这么多耗时样本后才启用对冲
+    budget: float = 0.1  # 对冲请求的估算tokens不超过主请求估算tokens的该比例，限制额外花费
+    primary_calls: int = 0
+    hedged_calls: int = 0
+    hedge_wins: int = 0
+    primary_tokens: float = 0.0
+    hedged_tokens: float = 0.0
+
+    def allow(self, tokens: float) -> bool:
+        """再发出一个估算 tokens 的对冲请求是否仍在预算内"""
+        return self.hedged_tokens + tokens <= self.budget * self.primary_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "触发分位": self.percentile,
+            "预算比例": self.budget,
+            "主请求数": self.primary_calls,
+            "对冲请求数": self.hedged_calls,
+            "对冲胜出数": self.hedge_wins,
+            "主请求估算tokens": round(self.primary_tokens),
+            "对冲请求估算tokens": round(self.hedged_tokens),
+        }
+
+
+class AsyncLLMClient:
+    """asyncio 原生的LLM客户端，所有请求共享一个事件循环"""
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        timeout: Optional[float] = 600,
+        hedge: Optional[HedgePolicy] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+    ):
+        self.timeout = timeout
+        self.hedge = hedge
+        self.breakers = breakers
+        self.latency = LatencyTracker()
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._clients: Dict[Tuple[str, str, Optional[str]], Any] = {}
+
+    def _get_client(self, llm_config: LLMConfig):
+        """按 (提供商, 密钥, 地址) 复用客户端及其连接池"""
+        key = (llm_config.provider, llm_config.api_key, llm_config.base_url)
+        if key not in self._clients:
+            if llm_config.provider == "anthropic":
+                if anthropic is None:
+                    raise RuntimeError("anthropic库未安装")
+                self._clients[key] = anthropic.AsyncAnthropic(api_key=llm_config.api_key, base_url=llm_config.base_url)
+            else:
+                if AsyncOpenAI is None:
+                    raise RuntimeError("OpenAI库未安装")
+                self._clients[key] = AsyncOpenAI(api_key=llm_config.api_key, base_url=llm_config.base_url)
+        return self._clients[key]
+
+    async def complete(
+        self,
+        llm_config: LLMConfig,
+        system_msg: str,
+        user_msg: str,
+        timeout: Optional[float] = None,
+        on_delta: Optional[DeltaCallback] = None,
+    ) -> LLMResponse:
+        """流式调用LLM并返回完整文本；超时抛出 asyncio.TimeoutError，提供商熔断时抛出 CircuitOpenError"""
+        timeout = self.timeout if timeout is None else timeout
+        if llm_config.provider in ["deepseek", "openai", "mock"]:
+            stream_fn = self._stream_openai
+        elif llm_config.provider == "anthropic":
+            stream_fn = self._stream_anthropic
+        else:
+            raise ValueError(f"未知的LLM提供商: {llm_config.provider}")
+
+        # 熔断检查在排队之前，熔断中的提供商不占用并发槽位
+        with optional_guard(self.breakers, llm_config.provider):
+            queued_at = time.perf_counter()
+            async with self._semaphore:
+                metrics = CallMetrics(provider=llm_config.provider, model=llm_config.model, queued_at=queued_at)
+                stream = stream_fn(llm_config, system_msg, user_msg, metrics, on_delta)
+                content, stopped_early = await asyncio.wait_for(stream, timeout)
+        metrics.finished_at = time.perf_counter()
+        if not stopped_early:
+            self.latency.record(llm_config, metrics.duration)
+        metrics.output_chars = len(content)
+        if not metrics.output_tokens:
+            metrics.output_tokens = estimate_tokens(content)
+        return LLMResponse(content=content, metrics=metrics, stopped_early=stopped_early)
+
+    async def hedged(
+        self,
+        llm_config: LLMConfig,
+        attempt: Callable[[LLMConfig], Awaitable[T]],
+        fallback: Optional[LLMConfig] = None,
+        tokens: float = 1.0,
+    ) -> T:
+        """
+        执行 attempt(llm_config)；耗时超过该模型近期分位耗时仍未完成、且预算允许时，
+        再用 fallback（同一提供商的其他模型，未指定时用同一模型）发出一个对冲请求。
+        tokens 为单个请求的估算tokens，按此计入预算。
+        取先成功返回的结果并取消另一个；attempt 抛出异常视为无效结果。
+        """
+        if fallback is not None and fallback.provider != llm_config.provider:
+            # 结果归入主请求的提供商，换用其他提供商会混淆各提供商之间的对比
+            raise ValueError(f"对冲请求只能使用同一提供商的模型: {llm_config.provider} → {fallback.provider}")
+        policy = self.hedge
+        if policy is None:
+            return await attempt(llm_config)
+
+        policy.primary_calls += 1
+        policy.primary_tokens += tokens
+        delay = self.latency.percentile(llm_config, policy.percentile, policy.min_samples)
+        primary = asyncio.ensure_future(attempt(llm_config))
+        pending = {primary}
+        try:
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            # 没有空闲并发槽位时对冲请求只会排队，不发出
+            if done or not policy.allow(tokens) or self._semaphore.locked():
+                return await primary
+
+            policy.hedged_calls += 1
+            policy.hedged_tokens += tokens
+            backup = asyncio.ensure_future(attempt(fallback or llm_config))
+            pending.add(backup)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            policy.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _on_text(text: str, parts: list, metrics: CallMetrics, on_delta: Optional[DeltaCallback]) -> bool:
+        """记录一段输出，返回是否应提前结束"""
+        if metrics.first_token_at is None:
+            metrics.first_token_at = time.perf_counter()
+        parts.append(text)
+        return bool(on_delta and on_delta(text))
+
+    async def _stream_openai(self, llm_config, system_msg, user_msg, metrics, on_delta) -> Tuple[str, bool]:
+        client = self._get_client(llm_config)
+        raw = await client.chat.completions.with_raw_response.create(
+            model=llm_config.model,
+            messages=[
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_msg},
+            ],
+            response_format={"type": "json_object"},
+            max_completion_tokens=llm_config.max_completion_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        metrics.retries = getattr(raw, "retries_taken", 0)
+        stream = raw.parse()
+        parts: list = []
+        stopped_early = False
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if self._on_text(chunk.choices[0].delta.content, parts, metrics, on_delta):
+                        stopped_early = True
+                        break
+                if getattr(chunk, "usage", None):
+                    record_openai_usage(metrics, chunk.usage)
+        finally:
+            await stream.close()
+        return "".join(parts), stopped_early
+
+    async def _stream_anthropic(self, llm_config, system_msg, user_msg, metrics, on_delta) -> Tuple[str, bool]:
+        client = self._get_client(llm_config)
+        # Anthropic不支持response_format，需要在提示词中明确要求JSON
+        enhanced_user_msg = user_msg + "\n\n请确保返回有效的JSON格式，不要包含markdown代码块标记。"
+        parts: list = []
+        stopped_early = False
+        async with client.messages.stream(
+            model=llm_config.model,
+            max_tokens=llm_config.max_tokens,
+            temperature=llm_config.temperature,
+            system=system_msg,
+            messages=[{"role": "user", "content": enhanced_user_msg}],
+        ) as stream:
+            async for text in stream.text_stream:
+                if self._on_text(text, parts, metrics, on_delta):
+                    stopped_early = True
+                    break
+            if not stopped_early:
+                final = await stream.get_final_message()
+                record_anthropic_usage(metrics, final.usage)
+        return "".join(parts), stopped_early
+
+    async def aclose(self):
+        """关闭所有底层HTTP连接"""
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
@@ -2,17 +2,35 @@
 基础分析器类
 提供文档读取、LLM调用等通用功能
 """
-import json
+import asyncio
+import time
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
-import PyPDF2
 import docx
 
+from articles import split_articles, to_records
+from async_llm import AsyncLLMClient, CallMetrics, record_anthropic_usage, record_openai_usage
+from chunk_planner import ChunkPlanner
+from circuit_breaker import CircuitBreakerRegistry, optional_guard
 from config import GlobalConfig, LLMConfig
+from docx_extractor import is_docx, iter_docx_blocks
+from incremental import IncrementalPlan, IncrementalPlanner, category_key
+from metrics import STAGE_EXTRACTION, STAGE_LLM, STAGE_PARSE, STAGE_PROMPT, stage
+from pdf_extractor import extract_pages
+from prefilter import KeywordPrefilter
+from progress import ProgressTracker
 from prompt import REGULATORY_FRAMEWORK
+from response_parser import ParsedResponse, ResponseParseError, parse_response, validate_response
+from routing import RoutingPolicy
+from stream_json import ID_KEYS, StreamingResultParser, salvage_json
+from text_cleaner import CleaningStats, clean_pages, clean_text, estimate_tokens
+from text_reader import read_text
+from tracing import span
 
 try:
     from openai import OpenAI
@@ -28,70 +46,307 @@ except ImportError:
 class BaseAnalyzer(ABC):
     """基础分析器抽象类"""
     
+    # 响应校验使用的结构定义名称（见 response_parser.SCHEMAS），None 表示不校验
+    response_schema: Optional[str] = None
+    
     def __init__(self, config: GlobalConfig):
         self.config = config
         self.framework = REGULATORY_FRAMEWORK
+        self.prefilter = (
+            KeywordPrefilter(self.framework, min_hits=config.prefilter_min_hits)
+            if config.enable_prefilter else None
+        )
+        self.last_cleaning_stats: Optional[CleaningStats] = None
+        # 各提供商的熔断器，同步与异步调用共用
+        self.breakers = (
+            CircuitBreakerRegistry(config.circuit_failure_threshold, config.circuit_cooldown)
+            if config.circuit_failure_threshold > 0 else None
+        )
+        self.chunk_planner = (
+            ChunkPlanner(Path(config.chunk_stats_path or Path(config.output_path) / "chunk_stats.json"))
+            if config.adaptive_batching else None
+        )
+        self.router = (
+            RoutingPolicy(
+                Path(config.routing_stats_path or Path(config.output_path) / "provider_stats.json"),
+                min_agreement=config.routing_min_agreement,
+                min_comparisons=config.routing_min_comparisons,
+            )
+            if config.enable_routing else None
+        )
+        # 同步调用顺序执行，当前调用的指标由 _call_* 填写用量和重试次数
+        self._sync_metrics: Optional[CallMetrics] = None
+        # 运行进度（由 BatchProcessor 设置）
+        self.progress: Optional[ProgressTracker] = None
+        # 增量分析（结果库由 BatchProcessor 设置），按文档路径保存本次的增量方案
+        self.incremental = (
+            IncrementalPlanner(
+                self.framework,
+                Path(config.incremental_baseline) if config.incremental_baseline else None,
+            )
+            if config.incremental else None
+        )
+        self._incremental_plans: Dict[str, IncrementalPlan] = {}
         
     def read_document(self, file_path: str) -> str:
         """读取文档内容"""
+        content, self.last_cleaning_stats = self.load_document(file_path)
+        return content
+    
+    def load_document(self, file_path: str) -> Tuple[str, Optional[CleaningStats]]:
+        """读取并清洗文档，返回 (文本, 清洗统计)"""
+        with stage(STAGE_EXTRACTION):
+            return self._extract_document(file_path)
+    
+    def _extract_document(self, file_path: str) -> Tuple[str, Optional[CleaningStats]]:
         path = Path(file_path)
         ext = path.suffix.lower()
         
         if ext == ".pdf":
-            return self._read_pdf(path)
+            pages = self._read_pdf(path)
         elif ext in {".docx", ".doc"}:
-            return self._read_docx(path)
+            pages = [self._read_docx(path)]
         elif ext in {".txt", ".md"}:
-            return self._read_text(path)
+            pages = [self._read_text(path)]
         else:
             raise ValueError(f"不支持的文件格式: {ext}")
+        
+        if not self.config.clean_text:
+            return "\n".join(text for text in pages if text), None
+        
+        # 页眉页脚和硬换行只存在于PDF分页文本中
+        return clean_pages(pages) if ext == ".pdf" else clean_text(pages[0])
     
-    def _read_pdf(self, file_path: Path) -> str:
-        """读取PDF文件"""
-        content = []
-        with open(file_path, "rb") as fh:
-            reader = PyPDF2.PdfReader(fh)
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    content.append(text)
-        return "\n".join(content)
+    def _read_pdf(self, file_path: Path) -> List[str]:
+        """读取PDF文件，按页返回文本"""
+        # 剖析时在本进程内串行提取，否则“文档提取”阶段只采集到等待进程池的时间
+        return extract_pages(
+            file_path,
+            backend=self.config.pdf_backend,
+            workers=1 if self.config.profile else self.config.pdf_workers,
+        )
     
     def _read_docx(self, file_path: Path) -> str:
-        """读取Word文档"""
+        """读取Word文档（流式解析，包含表格内容）"""
+        if is_docx(file_path):
+            return "\n".join(iter_docx_blocks(file_path))
         doc = docx.Document(file_path)
         return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
     
     def _read_text(self, file_path: Path) -> str:
-        """读取文本文件"""
-        with open(file_path, "r", encoding="utf-8") as fh:
-            return fh.read()
+        """读取文本文件（自动识别编码）；完整读取，原文条款和增量比对需要全文，只在生成提示词时截断"""
+        return read_text(file_path)
     
     def split_framework(self, chunk_size: int) -> List[Dict[str, Any]]:
         """将框架分成小块以避免token限制"""
         items = list(self.framework.items())
         return [dict(items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
     
-    def call_llm(self, llm_config: LLMConfig, system_msg: str, user_msg: str) -> Dict[str, Any]:
-        """调用LLM并返回JSON响应"""
-        if llm_config.provider in ["deepseek", "openai"]:
-            content = self._call_openai_compatible(llm_config, system_msg, user_msg)
+    def plan_chunks(self, llm_config: LLMConfig, document_content: str) -> List[Dict[str, Any]]:
+        """确定框架分块：启用自适应分块时按该提供商的实测输出长度打包，否则按固定类别数切分"""
+        if self.chunk_planner:
+            return self.chunk_planner.plan(self.framework, llm_config, estimate_tokens(document_content))
+        return self.split_framework(self.config.categories_per_call)
+    
+    def _observe_chunk(
+        self,
+        llm_config: LLMConfig,
+        chunk: Dict[str, Any],
+        chunk_result: Optional[Dict[str, Any]],
+        document_content: str,
+    ):
+        """将一次调用的输出长度与是否截断反馈给自适应分块（chunk_result 为 None 表示整块解析失败）"""
+        if not self.chunk_planner:
+            return
+        if chunk_result is None:
+            self.chunk_planner.observe_failure(llm_config)
+            return
+        truncated = (
+            "截断恢复" in chunk_result
+            or self.returned_requirement_ids(chunk_result) < self.chunk_requirement_ids(chunk)
+        )
+        self.chunk_planner.observe(llm_config, chunk_result, estimate_tokens(document_content), truncated)
+    
+    def call_llm(
+        self,
+        llm_config: LLMConfig,
+        system_msg: str,
+        user_msg: str,
+        call_metrics: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """调用LLM并返回JSON响应；传入 call_metrics 时追加本次调用的指标"""
+        if llm_config.provider in ["deepseek", "openai", "mock"]:
+            call = self._call_openai_compatible
         elif llm_config.provider == "anthropic":
-            content = self._call_anthropic(llm_config, system_msg, user_msg)
+            call = self._call_anthropic
         else:
             raise ValueError(f"未知的LLM提供商: {llm_config.provider}")
         
+        metrics = CallMetrics(provider=llm_config.provider, model=llm_config.model)
+        self._sync_metrics = metrics
         try:
-            clean_content = content.strip()
-            if clean_content.startswith("```") and clean_content.endswith("```"):
-                clean_content = clean_content[3:-3].strip()
-                if clean_content.lower().startswith("json"):
-                    clean_content = clean_content[4:].strip()
-            return json.loads(clean_content)
-        except json.JSONDecodeError as exc:
+            with stage(STAGE_LLM, provider=llm_config.provider), optional_guard(self.breakers, llm_config.provider):
+                content = call(llm_config, system_msg, user_msg)
+        except Exception:
+            if self.progress:
+                self.progress.call_failed(llm_config.provider)
+            raise
+        finally:
+            self._sync_metrics = None
+        metrics.finished_at = time.perf_counter()
+        metrics.output_chars = len(content)
+        if not metrics.input_tokens:
+            metrics.input_tokens = estimate_tokens(system_msg + user_msg)
+        if not metrics.output_tokens:
+            metrics.output_tokens = estimate_tokens(content)
+        if call_metrics is not None:
+            call_metrics.append(metrics.to_dict())
+        self._report_call(metrics)
+        
+        return self.parse_llm_content(llm_config, content)
+    
+    async def acall_llm(
+        self,
+        client: AsyncLLMClient,
+        llm_config: LLMConfig,
+        system_msg: str,
+        user_msg: str,
+        expected_ids: Optional[set] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """异步流式调用LLM，边接收边解析，返回 (JSON响应, 调用指标)；启用对冲时由客户端决定是否补发请求"""
+        fallback_model = self.config.hedge_fallback_models.get(llm_config.provider)
+        fallback = replace(llm_config, model=fallback_model) if fallback_model else None
+        
+        async def attempt(config: LLMConfig) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            chunk_result, metrics = await self._acall_once(client, config, system_msg, user_msg, expected_ids)
+            if config is not llm_config:
+                # 对冲请求胜出：结果仍归入该提供商，调用指标中记录实际使用的模型
+                metrics["hedge"] = True
+            return chunk_result, metrics
+        
+        return await client.hedged(
+            llm_config,
+            attempt,
+            fallback=fallback,
+            tokens=estimate_tokens(system_msg) + estimate_tokens(user_msg),
+        )
+    
+    async def _acall_once(
+        self,
+        client: AsyncLLMClient,
+        llm_config: LLMConfig,
+        system_msg: str,
+        user_msg: str,
+        expected_ids: Optional[set] = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """单次异步流式调用"""
+        parser = StreamingResultParser(expected_ids)
+        
+        def on_delta(text: str) -> bool:
+            return parser.feed(text) and self.config.stream_early_abort
+        
+        try:
+            with stage(STAGE_LLM, provider=llm_config.provider, model=llm_config.model):
+                response = await client.complete(
+                    llm_config, system_msg, user_msg, timeout=self.config.llm_timeout, on_delta=on_delta
+                )
+        except Exception:
+            if self.progress:
+                self.progress.call_failed(llm_config.provider)
+            raise
+        self._report_call(response.metrics)
+        metrics = response.metrics.to_dict()
+        if response.stopped_early:
+            # 已收齐全部要求项，其后的字段不再等待；剔除不合法的要求项，由补充请求重新获取
+            return self._validated(parser.salvage()), metrics
+        
+        try:
+            return self.parse_llm_content(llm_config, response.content, salvage=False), metrics
+        except ValueError:
+            partial = self._validated(parser.salvage())
+            if not any(partial["详细分析"].values()):
+                raise
+            return self._mark_salvaged(llm_config, partial), metrics
+    
+    def _report_call(self, metrics: CallMetrics):
+        if self.progress:
+            self.progress.call_finished(metrics.provider, metrics.duration or 0.0,
+                                        metrics.input_tokens, metrics.output_tokens, metrics.cached_tokens)
+    
+    def parse_llm_content(self, llm_config: LLMConfig, content: str, salvage: bool = True) -> Dict[str, Any]:
+        """解析并校验LLM返回的JSON文本；输出被截断时尽量恢复已完整的要求项"""
+        try:
+            with stage(STAGE_PARSE):
+                parsed = parse_response(content, self.response_schema)
+        except ResponseParseError as exc:
+            if salvage:
+                with stage(STAGE_PARSE):
+                    partial = self._validated(salvage_json(content))
+                if any(partial["详细分析"].values()):
+                    return self._mark_salvaged(llm_config, partial)
             raise ValueError(
                 f"来自 {llm_config.provider} 的无效JSON响应: {exc}\n响应内容: {content}"
             ) from exc
+        return self._with_parse_record(parsed)
+    
+    def _validated(self, partial: Dict[str, Any]) -> Dict[str, Any]:
+        """按与完整响应相同的结构定义校验恢复出的部分结果"""
+        return self._with_parse_record(validate_response(partial, self.response_schema))
+    
+    @staticmethod
+    def _with_parse_record(parsed: ParsedResponse) -> Dict[str, Any]:
+        if parsed.repairs or parsed.issues:
+            parsed.data["解析记录"] = {
+                "修复": parsed.repairs,
+                "校验问题": parsed.issues,
+                "剔除要求项数": parsed.dropped_items,
+            }
+        return parsed.data
+    
+    @staticmethod
+    def _mark_salvaged(llm_config: LLMConfig, partial: Dict[str, Any]) -> Dict[str, Any]:
+        """标记为截断恢复的部分结果"""
+        recovered = sum(len(items) for items in partial["详细分析"].values())
+        print(f"  {llm_config.provider} 响应不完整，已恢复 {recovered} 个要求项")
+        partial["截断恢复"] = {
+            "已恢复类别": list(partial["详细分析"]),
+            "已恢复要求数": recovered,
+        }
+        return partial
+    
+    @staticmethod
+    def chunk_requirement_ids(chunk: Dict[str, Any]) -> set:
+        """框架块中包含的全部要求编号"""
+        return {req["number"] for requirements in chunk.values() for req in requirements}
+    
+    @staticmethod
+    def returned_requirement_ids(chunk_result: Dict[str, Any]) -> set:
+        """LLM响应中实际返回的要求编号"""
+        ids = set()
+        for items in chunk_result.get("详细分析", {}).values():
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                for id_key in ID_KEYS:
+                    if id_key in item:
+                        try:
+                            ids.add(int(item[id_key]))
+                        except (TypeError, ValueError):
+                            pass
+                        break
+        return ids
+    
+    @staticmethod
+    def subset_chunk(chunk: Dict[str, Any], ids: set) -> Dict[str, Any]:
+        """只保留指定要求编号的框架块，用于补充请求"""
+        subset = {}
+        for category, requirements in chunk.items():
+            kept = [req for req in requirements if req["number"] in ids]
+            if kept:
+                subset[category] = kept
+        return subset
     
     def _call_openai_compatible(self, llm_config: LLMConfig, system_msg: str, user_msg: str) -> str:
         """调用OpenAI兼容的API"""
@@ -103,7 +358,7 @@ class BaseAnalyzer(ABC):
             base_url=llm_config.base_url
         )
         
-        response = client.chat.completions.create(
+        raw = client.chat.completions.with_raw_response.create(
             model=llm_config.model,
             messages=[
                 {"role": "system", "content": system_msg},
@@ -112,6 +367,11 @@ class BaseAnalyzer(ABC):
             response_format={"type": "json_object"},
             max_completion_tokens=100000,
         )
+        response = raw.parse()
+        if self._sync_metrics is not None:
+            self._sync_metrics.retries = getattr(raw, "retries_taken", 0)
+            if response.usage:
+                record_openai_usage(self._sync_metrics, response.usage)
         return response.choices[0].message.content
     
     def _call_anthropic(self, llm_config: LLMConfig, system_msg: str, user_msg: str) -> str:
@@ -119,12 +379,12 @@ class BaseAnalyzer(ABC):
             if anthropic is None:
                 raise RuntimeError("anthropic库未安装")
             
-            client = anthropic.Anthropic(api_key=llm_config.api_key)
+            client = anthropic.Anthropic(api_key=llm_config.api_key, base_url=llm_config.base_url)
             
             # Anthropic不支持response_format，需要在提示词中明确要求JSON
             enhanced_user_msg = user_msg + "\n\n请确保返回有效的JSON格式，不要包含markdown代码块标记。"
             
-            msg = client.messages.create(
+            raw = client.messages.with_raw_response.create(
                 model=llm_config.model,
                 max_tokens=llm_config.max_tokens,
                 temperature=llm_config.temperature,
@@ -133,6 +393,10 @@ class BaseAnalyzer(ABC):
                     {"role": "user", "content": enhanced_user_msg},
                 ],
             )
+            msg = raw.parse()
+            if self._sync_metrics is not None:
+                self._sync_metrics.retries = getattr(raw, "retries_taken", 0)
+                record_anthropic_usage(self._sync_metrics, msg.usage)
             
             # 提取响应内容
             if isinstance(msg.content, list):
@@ -149,6 +413,11 @@ class BaseAnalyzer(ABC):
             
             return content
     
+    def build_prompt(self, document_content: str, framework_chunk: Dict[str, Any]) -> str:
+        """构建提示词（记录耗时）"""
+        with stage(STAGE_PROMPT):
+            return self.create_analysis_prompt(document_content, framework_chunk)
+    
     @abstractmethod
     def create_analysis_prompt(self, document_content: str, framework_chunk: Dict[str, Any]) -> str:
         """创建分析提示词 - 由子类实现"""
@@ -159,12 +428,21 @@ class BaseAnalyzer(ABC):
         """获取系统消息 - 由子类实现"""
         pass
     
-    def analyze_with_single_llm(self, file_path: str, llm_config: LLMConfig) -> Dict[str, Any]:
-        """使用单个LLM分析文档"""
-        document_content = self.read_document(file_path)
+    @abstractmethod
+    def build_uncovered_item(self, requirement: Dict[str, Any]) -> Dict[str, Any]:
+        """为预筛选跳过的框架要求生成"未覆盖"结果项 - 由子类实现"""
+        pass
+    
+    def prepare_analysis(
+        self,
+        file_path: str,
+        llm_config: LLMConfig,
+        document: Optional[Tuple[str, Optional[CleaningStats]]] = None,
+    ) -> Tuple[str, Dict[str, Any], List[Dict[str, Any]]]:
+        """读取文档、初始化结果并确定需要调用LLM的框架块，返回 (文档内容, 结果, 框架块列表)"""
+        document_content, cleaning_stats = document or self.load_document(file_path)
         document_content = document_content[:self.config.max_content_length]
         
-        system_msg = self.get_system_message()
         results: Dict[str, Any] = {
             "文档名称": Path(file_path).name,
             "分析日期": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -172,46 +450,342 @@ class BaseAnalyzer(ABC):
             "LLM模型": llm_config.model,
             "详细分析": {}
         }
+        if cleaning_stats:
+            results["文本清洗统计"] = cleaning_stats.to_dict()
+        
+        # 增量分析：沿用上一版本中依据条文未变化的大类
+        carried_keys = set()
+        plan = self._incremental_plans.get(str(file_path))
+        if plan:
+            carried = plan.carry_forward(llm_config.provider)
+            if carried:
+                results.update(plan.metadata(llm_config.provider))
+                results["详细分析"].update(carried)
+                results["增量分析"] = plan.provenance(llm_config.provider, list(carried))
+                carried_keys = {category_key(category) for category in carried}
+        
+        # 关键词预筛选
+        screening = None
+        if self.prefilter:
+            screening = self.prefilter.screen(document_content)
+            results["预筛选审计"] = screening.audit()
         
         # 分块处理框架
-        for chunk in self.split_framework(self.config.categories_per_call):
-            prompt = self.create_analysis_prompt(document_content, chunk)
+        chunks = []
+        planned = self.plan_chunks(llm_config, document_content)
+        if self.chunk_planner:
+            results["分块方案"] = [list(chunk) for chunk in planned]
+        for chunk in planned:
+            if carried_keys:
+                chunk = {cat: reqs for cat, reqs in chunk.items() if category_key(cat) not in carried_keys}
+                if not chunk:
+                    continue
+            if screening:
+                chunk, skipped = self.prefilter.split_chunk(chunk, screening)
+                for category, requirements in skipped.items():
+                    results["详细分析"][category] = [
+                        self.build_uncovered_item(req) for req in requirements
+                    ]
+                if not chunk:
+                    continue
+            chunks.append(chunk)
+        
+        if self.progress:
+            self.progress.plan(llm_config.provider, len(chunks))
+        return document_content, results, chunks
+    
+    def merge_chunk_result(self, results: Dict[str, Any], chunk_result: Dict[str, Any]):
+        """将单个框架块的LLM响应合并到结果中"""
+        # 合并结果
+        if "详细分析" in chunk_result:
+            results["详细分析"].update(chunk_result["详细分析"])
+        
+        if "截断恢复" in chunk_result:
+            results.setdefault("截断恢复记录", []).append(chunk_result["截断恢复"])
+        if "解析记录" in chunk_result:
+            results.setdefault("解析记录", []).append(chunk_result["解析记录"])
+        
+        # 合并其他字段
+        for key, value in chunk_result.items():
+            if key not in ["详细分析", "文档名称", "分析日期", "预筛选审计", "文本清洗统计",
+                           "调用指标", "截断恢复", "解析记录"]:
+                results[key] = value
+    
+    def merge_followup_result(self, results: Dict[str, Any], followup_result: Dict[str, Any], missing: set) -> set:
+        """
+        将补充请求的响应并入结果，返回补回的要求编号
+        只追加缺失的要求项，不覆盖首次响应中的关键发现等汇总字段
+        """
+        recovered = set()
+        for category, items in followup_result.get("详细分析", {}).items():
+            kept = []
+            for item in items:
+                ids = self.returned_requirement_ids({"详细分析": {category: [item]}})
+                if ids & missing - recovered:
+                    kept.append(item)
+                    recovered |= ids
+            if kept:
+                results["详细分析"].setdefault(category, []).extend(kept)
+        
+        if "截断恢复" in followup_result:
+            results.setdefault("截断恢复记录", []).append(followup_result["截断恢复"])
+        if "解析记录" in followup_result:
+            results.setdefault("解析记录", []).append(followup_result["解析记录"])
+        
+        results.setdefault("补充请求记录", []).append({
+            "缺失编号": sorted(missing),
+            "补回编号": sorted(recovered & missing),
+        })
+        return recovered & missing
+    
+    def record_followup_failure(self, results: Dict[str, Any], missing: set, error: Exception):
+        """补充请求失败时只记录仍缺失的要求编号；首次响应已并入结果，不把整个框架块记为失败"""
+        message = str(error) or type(error).__name__
+        print(f"  补充请求失败，要求 {sorted(missing)} 仍缺失: {message}")
+        results.setdefault("补充请求记录", []).append({
+            "缺失编号": sorted(missing),
+            "补回编号": [],
+            "错误": message,
+        })
+    
+    def _missing_ids(self, llm_config: LLMConfig, chunk: Dict[str, Any], received: set) -> set:
+        """框架块中响应未返回的要求编号"""
+        missing = self.chunk_requirement_ids(chunk) - received
+        if missing:
+            print(f"  {llm_config.provider} 响应缺少要求 {sorted(missing)}，补充请求中...")
+        return missing
+    
+    def analyze_with_single_llm(
+        self,
+        file_path: str,
+        llm_config: LLMConfig,
+        document: Optional[Tuple[str, Optional[CleaningStats]]] = None,
+    ) -> Dict[str, Any]:
+        """使用单个LLM分析文档"""
+        document_content, results, chunks = self.prepare_analysis(file_path, llm_config, document)
+        system_msg = self.get_system_message()
+        call_metrics: List[Dict[str, Any]] = []
+        
+        for chunk in chunks:
             try:
-                chunk_result = self.call_llm(llm_config, system_msg, prompt)
-                
-                # 合并结果
-                if "详细分析" in chunk_result:
-                    results["详细分析"].update(chunk_result["详细分析"])
-                
-                # 合并其他字段
-                for key, value in chunk_result.items():
-                    if key not in ["详细分析", "文档名称", "分析日期"]:
-                        results[key] = value
-                        
+                with span("框架块", "chunk", provider=llm_config.provider, categories="、".join(chunk)):
+                    self._analyze_chunk(llm_config, system_msg, document_content, chunk, results, call_metrics)
             except Exception as e:
                 print(f"处理 {llm_config.provider} 时出错: {str(e)}")
                 results[f"错误_{llm_config.provider}"] = str(e)
+            finally:
+                if self.progress:
+                    self.progress.chunk_done(llm_config.provider)
         
+        results["调用指标"] = call_metrics
+        if self.chunk_planner:
+            self.chunk_planner.save()
         return results
     
-    def analyze_with_all_llms(self, file_path: str) -> Dict[str, Any]:
-        """使用所有配置的LLM分析文档"""
-        all_results = {
-            "文档路径": str(file_path),
-            "文档名称": Path(file_path).name,
-            "分析时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "审查模式": self.config.review_mode.value,
-            "LLM分析结果": {}
-        }
+    def _analyze_chunk(
+        self,
+        llm_config: LLMConfig,
+        system_msg: str,
+        document_content: str,
+        chunk: Dict[str, Any],
+        results: Dict[str, Any],
+        call_metrics: List[Dict[str, Any]],
+    ):
+        """同步分析单个框架块（含补充请求），结果直接并入 results"""
+        prompt = self.build_prompt(document_content, chunk)
+        try:
+            chunk_result = self.call_llm(llm_config, system_msg, prompt, call_metrics)
+        except ValueError:
+            self._observe_chunk(llm_config, chunk, None, document_content)
+            raise
+        self._observe_chunk(llm_config, chunk, chunk_result, document_content)
+        self.merge_chunk_result(results, chunk_result)
+        
+        # 响应遗漏或剔除了部分要求项时，只针对缺失的要求补充请求
+        received = self.returned_requirement_ids(chunk_result)
+        for _ in range(self.config.missing_id_retries):
+            missing = self._missing_ids(llm_config, chunk, received)
+            if not missing:
+                break
+            prompt = self.build_prompt(document_content, self.subset_chunk(chunk, missing))
+            try:
+                followup = self.call_llm(llm_config, system_msg, prompt, call_metrics)
+            except Exception as e:
+                self.record_followup_failure(results, missing, e)
+                break
+            received |= self.merge_followup_result(results, followup, missing)
+    
+    async def _aanalyze_chunk(
+        self,
+        client: AsyncLLMClient,
+        llm_config: LLMConfig,
+        system_msg: str,
+        document_content: str,
+        chunk: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], List[Tuple[Union[Dict[str, Any], Exception], set]], List[Dict[str, Any]]]:
+        """
+        异步分析单个框架块（含补充请求），返回 (首次响应, [(补充响应, 缺失编号)], 调用指标)；
+        补充请求失败时该项的补充响应为异常对象
+        """
+        try:
+            with span("框架块", "chunk", provider=llm_config.provider, categories="、".join(chunk)):
+                return await self._aanalyze_chunk_calls(client, llm_config, system_msg, document_content, chunk)
+        finally:
+            if self.progress:
+                self.progress.chunk_done(llm_config.provider)
+    
+    async def _aanalyze_chunk_calls(
+        self,
+        client: AsyncLLMClient,
+        llm_config: LLMConfig,
+        system_msg: str,
+        document_content: str,
+        chunk: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], List[Tuple[Union[Dict[str, Any], Exception], set]], List[Dict[str, Any]]]:
+        try:
+            chunk_result, metrics = await self.acall_llm(
+                client,
+                llm_config,
+                system_msg,
+                self.build_prompt(document_content, chunk),
+                self.chunk_requirement_ids(chunk),
+            )
+        except ValueError:
+            self._observe_chunk(llm_config, chunk, None, document_content)
+            raise
+        self._observe_chunk(llm_config, chunk, chunk_result, document_content)
+        call_metrics = [metrics]
+        followups = []
+        
+        received = self.returned_requirement_ids(chunk_result)
+        for _ in range(self.config.missing_id_retries):
+            missing = self._missing_ids(llm_config, chunk, received)
+            if not missing:
+                break
+            try:
+                followup, metrics = await self.acall_llm(
+                    client,
+                    llm_config,
+                    system_msg,
+                    self.build_prompt(document_content, self.subset_chunk(chunk, missing)),
+                    missing,
+                )
+            except Exception as e:
+                followups.append((e, missing))
+                break
+            call_metrics.append(metrics)
+            followups.append((followup, missing))
+            received |= self.returned_requirement_ids(followup) & missing
         
+        return chunk_result, followups, call_metrics
+    
+    async def aanalyze_with_single_llm(
+        self,
+        file_path: str,
+        llm_config: LLMConfig,
+        client: AsyncLLMClient,
+        document: Optional[Tuple[str, Optional[CleaningStats]]] = None,
+    ) -> Dict[str, Any]:
+        """使用单个LLM异步分析文档，各框架块并发请求"""
+        document_content, results, chunks = self.prepare_analysis(file_path, llm_config, document)
+        system_msg = self.get_system_message()
+        
+        outcomes = await asyncio.gather(
+            *(self._aanalyze_chunk(client, llm_config, system_msg, document_content, chunk)
+              for chunk in chunks),
+            return_exceptions=True,
+        )
+        
+        # 按框架顺序合并，保证结果与同步路径一致
+        call_metrics = []
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                error = str(outcome) or type(outcome).__name__
+                print(f"处理 {llm_config.provider} 时出错: {error}")
+                results[f"错误_{llm_config.provider}"] = error
+                continue
+            chunk_result, followups, metrics = outcome
+            self.merge_chunk_result(results, chunk_result)
+            for followup, missing in followups:
+                if isinstance(followup, Exception):
+                    self.record_followup_failure(results, missing, followup)
+                else:
+                    self.merge_followup_result(results, followup, missing)
+            call_metrics.extend(metrics)
+        
+        results["调用指标"] = call_metrics
+        if self.chunk_planner:
+            self.chunk_planner.save()
+        return results
+    
+    def _available_providers(self) -> List[Tuple[str, LLMConfig]]:
+        """已配置API密钥的提供商"""
+        providers = []
         for provider, llm_config in self.config.llm_configs.items():
             if not llm_config.api_key:
                 print(f"跳过 {provider}: 未配置API密钥")
                 continue
-            
+            providers.append((provider, llm_config))
+        return providers
+    
+    def _route(self, providers: List[Tuple[str, LLMConfig]]) -> Tuple[Optional[str], List[Tuple[str, LLMConfig]]]:
+        """按路由策略确定首轮调用的提供商，返回 (首选提供商, 首轮提供商列表)"""
+        primary = self.router.choose([name for name, _ in providers]) if self.router else None
+        if primary is None:
+            return None, providers
+        print(f"  路由: 首选 {primary}")
+        return primary, [(name, cfg) for name, cfg in providers if name == primary]
+    
+    def _escalation(
+        self,
+        all_results: Dict[str, Any],
+        primary: Optional[str],
+        providers: List[Tuple[str, LLMConfig]],
+    ) -> List[Tuple[str, LLMConfig]]:
+        """检查首选提供商的结果，返回需要升级调用的其余提供商"""
+        if primary is None:
+            return []
+        expected = sum(len(reqs) for reqs in self.framework.values())
+        reasons = self.router.escalation_reasons(
+            all_results["文档名称"], all_results["LLM分析结果"][primary], expected
+        )
+        all_results["路由决策"] = {"首选提供商": primary, "升级原因": reasons}
+        if not reasons:
+            return []
+        print(f"  {primary} 的结果需要复核（{'；'.join(reasons)}），升级到其余提供商")
+        return [(name, cfg) for name, cfg in providers if name != primary]
+    
+    def _record_routing(self, all_results: Dict[str, Any], document: Tuple[str, Optional[CleaningStats]],
+                        elapsed: Dict[str, float]):
+        """将本文档各提供商的耗时、用量和结论写入路由统计"""
+        if not self.router:
+            return
+        doc_tokens = estimate_tokens(document[0][:self.config.max_content_length])
+        default_calls = len(self.split_framework(self.config.categories_per_call))
+        for provider, seconds in elapsed.items():
+            result = all_results["LLM分析结果"][provider]
+            calls = len(result.get("分块方案") or []) or default_calls
+            self.router.record_run(provider, seconds, result, doc_tokens * calls)
+        self.router.record_results(all_results["文档名称"], all_results["LLM分析结果"])
+        self.router.save()
+    
+    def _run_providers(
+        self,
+        file_path: str,
+        providers: List[Tuple[str, LLMConfig]],
+        document: Tuple[str, Optional[CleaningStats]],
+        all_results: Dict[str, Any],
+        elapsed: Dict[str, float],
+    ):
+        """依次使用各提供商分析文档"""
+        for provider, llm_config in providers:
             print(f"使用 {provider} 分析中...")
+            started = time.perf_counter()
             try:
-                result = self.analyze_with_single_llm(file_path, llm_config)
+                with span(f"{provider} 分析", "provider", document=Path(file_path).name):
+                    result = self.analyze_with_single_llm(file_path, llm_config, document)
                 all_results["LLM分析结果"][provider] = result
             except Exception as e:
                 print(f"{provider} 分析失败: {str(e)}")
@@ -219,5 +793,136 @@ class BaseAnalyzer(ABC):
                     "错误": str(e),
                     "状态": "失败"
                 }
+            elapsed[provider] = time.perf_counter() - started
+    
+    def analyze_with_all_llms(self, file_path: str) -> Dict[str, Any]:
+        """使用所有配置的LLM分析文档（启用路由时只调用首选提供商，必要时升级）"""
+        all_results = self.document_results(file_path)
+        
+        # 文档只读取一次，供所有LLM共用
+        with self.document_session(file_path, all_results) as document:
+            providers = self._available_providers()
+            primary, first_round = self._route(providers)
+            elapsed: Dict[str, float] = {}
+            self._run_providers(file_path, first_round, document, all_results, elapsed)
+            self._run_providers(file_path, self._escalation(all_results, primary, providers),
+                                document, all_results, elapsed)
+            self._record_routing(all_results, document, elapsed)
+        
+        return all_results
+    
+    def document_results(self, file_path: str) -> Dict[str, Any]:
+        """一份文档的综合结果框架，各提供商的结果写入其中的“LLM分析结果”"""
+        return {
+            "文档路径": str(file_path),
+            "文档名称": Path(file_path).name,
+            "分析时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "审查模式": self.config.review_mode.value,
+            "LLM分析结果": {}
+        }
+    
+    @contextmanager
+    def document_session(
+        self,
+        file_path: str,
+        all_results: Dict[str, Any],
+        document: Optional[Tuple[str, Optional[CleaningStats]]] = None,
+    ) -> Iterator[Tuple[str, Optional[CleaningStats]]]:
+        """
+        一份文档的分析过程：读取文档（已读取时直接传入），把原文条款和增量方案写入综合结果，返回 (文本, 清洗统计)。
+        会话内对各提供商调用 prepare_analysis / analyze_with_single_llm 时传入该文档，共用同一增量方案；退出会话时丢弃增量方案
+        """
+        if document is None:
+            document = self.load_document(file_path)
+        self._report_cleaning(document[1])
+        self._attach_source_articles(all_results, document[0])
+        self._plan_incremental(file_path, document[0], all_results)
+        try:
+            yield document
+        finally:
+            self._incremental_plans.pop(str(file_path), None)
+    
+    async def _arun_providers(
+        self,
+        file_path: str,
+        providers: List[Tuple[str, LLMConfig]],
+        document: Tuple[str, Optional[CleaningStats]],
+        client: AsyncLLMClient,
+        all_results: Dict[str, Any],
+        elapsed: Dict[str, float],
+    ):
+        """各提供商并发分析文档"""
+        async def timed(llm_config: LLMConfig):
+            started = time.perf_counter()
+            try:
+                with span(f"{llm_config.provider} 分析", "provider", document=Path(file_path).name):
+                    return await self.aanalyze_with_single_llm(file_path, llm_config, client, document)
+            finally:
+                elapsed[llm_config.provider] = time.perf_counter() - started
         
-        return all_results
\ No newline at end of file
+        outcomes = await asyncio.gather(
+            *(timed(llm_config) for _, llm_config in providers),
+            return_exceptions=True,
+        )
+        
+        for (provider, _), outcome in zip(providers, outcomes):
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                print(f"{provider} 分析失败: {str(outcome)}")
+                all_results["LLM分析结果"][provider] = {
+                    "错误": str(outcome),
+                    "状态": "失败"
+                }
+            else:
+                all_results["LLM分析结果"][provider] = outcome
+    
+    async def aanalyze_with_all_llms(self, file_path: str, client: AsyncLLMClient) -> Dict[str, Any]:
+        """使用所有配置的LLM异步分析文档，各提供商并发执行（启用路由时只调用首选提供商，必要时升级）"""
+        all_results = self.document_results(file_path)
+        
+        # 文档解析是CPU密集操作，放到线程中执行以免阻塞事件循环
+        loaded = await asyncio.to_thread(self.load_document, file_path)
+        with self.document_session(file_path, all_results, loaded) as document:
+            providers = self._available_providers()
+            primary, first_round = self._route(providers)
+            elapsed: Dict[str, float] = {}
+            await self._arun_providers(file_path, first_round, document, client, all_results, elapsed)
+            await self._arun_providers(file_path, self._escalation(all_results, primary, providers),
+                                       document, client, all_results, elapsed)
+            self._record_routing(all_results, document, elapsed)
+        
+        return all_results
+    
+    def _attach_source_articles(self, all_results: Dict[str, Any], content: str):
+        """把按条切分的原文写入综合结果"""
+        if self.config.save_source_articles:
+            all_results["原文条款"] = to_records(split_articles(content))
+    
+    def _plan_incremental(self, file_path: str, content: str, all_results: Dict[str, Any]):
+        """与上一版本逐条比对，确定需要重新分析的大类；没有可用基线时按全量分析"""
+        if not self.incremental:
+            return
+        try:
+            plan = self.incremental.plan(str(file_path), content)
+        except Exception as e:
+            print(f"  增量分析失败，改为全量分析: {e}")
+            return
+        if plan is None:
+            print("  增量分析: 未找到上一版本的分析结果，全量分析")
+            return
+        all_results["增量分析"] = plan.summary()
+        self._incremental_plans[str(file_path)] = plan
+        diff = plan.diff
+        print(
+            f"  增量分析: 基线 {plan.baseline.get('文档名称')}，修改 {len(diff.modified)} 条、"
+            f"新增 {len(diff.added)} 条、删除 {len(diff.removed)} 条，重新分析 {len(plan.reanalyze)} 个大类"
+        )
+    
+    def _report_cleaning(self, cleaning_stats: Optional[CleaningStats]):
+        """打印文本清洗统计"""
+        if cleaning_stats:
+            print(
+                f"  文本清洗: 移除 {cleaning_stats.removed_chars} 字符"
+                f"（约 {cleaning_stats.removed_tokens} tokens）"
+            )
@@ -0,0 +1,374 @@
+"""
+离线批处理（Batch API）模式
+把每个 (文档, 提供商, 框架块) 的提示词编译成提供商的批处理任务文件，提交后轮询直到完成，
+再把结果按框架块顺序交给分析器的常规解析与合并流程。
+· OpenAI：上传 JSONL 文件 → 创建 /v1/batches 任务 → 下载输出文件
+· Anthropic：提交 /v1/messages/batches 请求列表 → 下载结果 JSONL
+请求在编译时逐行写入文件，超过提供商单个任务的请求数或大小上限时拆分为多个任务。
+没有批处理接口的提供商（如 deepseek）在编译阶段按常规方式逐块调用，与批处理共用已读取的文档和增量方案。
+只依赖标准库的 HTTP 客户端，base_url 指向本地模拟服务即可离线测试。
+"""
+import json
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from base_analyzer import BaseAnalyzer
+from config import GlobalConfig, LLMConfig
+from tracing import span
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+ANTHROPIC_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+# Anthropic 不支持 response_format，与同步调用一样在提示词中要求JSON
+ANTHROPIC_JSON_HINT = "\n\n请确保返回有效的JSON格式，不要包含markdown代码块标记。"
+
+OPENAI_DONE = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchJobError(RuntimeError):
+    """批处理任务提交或执行失败"""
+
+
+def _request(method: str, url: str, headers: Dict[str, str], body: Optional[bytes] = None,
+             timeout: float = 120) -> bytes:
+    req = urllib.request.Request(url, data=body, method=method, headers=headers)
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.read()
+
+
+def _request_json(method: str, url: str, headers: Dict[str, str], payload: Any = None) -> Dict[str, Any]:
+    body = None
+    if payload is not None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {**headers, "Content-Type": "application/json"}
+    return json.loads(_request(method, url, headers, body))
+
+
+def _read_jsonl(data: bytes) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+
+# ───────────────────────── 提供商适配 ─────────────────────────
+class OpenAIBatch:
+    """OpenAI 兼容的批处理接口"""
+    # 单个任务的上限：50,000 个请求、输入文件 200 MB
+    max_requests = 50_000
+    max_bytes = 200 * 1024 * 1024
+
+    def __init__(self, llm_config: LLMConfig):
+        self.llm_config = llm_config
+        self.base_url = (llm_config.base_url or OPENAI_BASE_URL).rstrip("/")
+        self.headers = {"Authorization": f"Bearer {llm_config.api_key}"}
+
+    def build_line(self, custom_id: str, system_msg: str, user_msg: str) -> Dict[str, Any]:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.llm_config.model,
+                "messages": [
+                    {"role": "system", "content": system_msg},
+                    {"role": "user", "content": user_msg},
+                ],
+                "response_format": {"type": "json_object"},
+                "max_completion_tokens": self.llm_config.max_completion_tokens,
+            },
+        }
+
+    def submit(self, jsonl_path: Path) -> str:
+        boundary = uuid.uuid4().hex
+        body = b"".join([
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"purpose\"\r\n\r\nbatch\r\n".encode(),
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{jsonl_path.name}\"\r\n"
+            "Content-Type: application/jsonl\r\n\r\n".encode(),
+            jsonl_path.read_bytes(),
+            f"\r\n--{boundary}--\r\n".encode(),
+        ])
+        headers = {**self.headers, "Content-Type": f"multipart/form-data; boundary={boundary}"}
+        uploaded = json.loads(_request("POST", f"{self.base_url}/files", headers, body))
+        batch = _request_json("POST", f"{self.base_url}/batches", self.headers, {
+            "input_file_id": uploaded["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        })
+        return batch["id"]
+
+    def poll(self, job_id: str) -> Tuple[bool, Dict[str, Any]]:
+        status = _request_json("GET", f"{self.base_url}/batches/{job_id}", self.headers)
+        return status["status"] in OPENAI_DONE, status
+
+    def results(self, status: Dict[str, Any]) -> Dict[str, Any]:
+        """返回 {custom_id: 响应文本 或 BatchJobError}"""
+        outcomes: Dict[str, Any] = {}
+        for key in ("output_file_id", "error_file_id"):
+            if not status.get(key):
+                continue
+            data = _request("GET", f"{self.base_url}/files/{status[key]}/content", self.headers)
+            for line in _read_jsonl(data):
+                response = line.get("response") or {}
+                if line.get("error") or response.get("status_code", 200) >= 400:
+                    detail = line.get("error") or response.get("body")
+                    outcomes[line["custom_id"]] = BatchJobError(f"批处理请求失败: {detail}")
+                else:
+                    outcomes[line["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        if status["status"] != "completed" and not outcomes:
+            raise BatchJobError(f"批处理任务 {status['id']} 状态为 {status['status']}")
+        return outcomes
+
+
+class AnthropicBatch:
+    """Anthropic Message Batches 接口"""
+    # 单个任务的上限：100,000 个请求、请求体 256 MB（留出 JSON 包装的余量）
+    max_requests = 100_000
+    max_bytes = 255 * 1024 * 1024
+
+    def __init__(self, llm_config: LLMConfig):
+        self.llm_config = llm_config
+        self.base_url = (llm_config.base_url or ANTHROPIC_BASE_URL).rstrip("/")
+        self.headers = {"x-api-key": llm_config.api_key, "anthropic-version": ANTHROPIC_VERSION}
+
+    def build_line(self, custom_id: str, system_msg: str, user_msg: str) -> Dict[str, Any]:
+        return {
+            "custom_id": custom_id,
+            "params": {
+                "model": self.llm_config.model,
+                "max_tokens": self.llm_config.max_tokens,
+                "temperature": self.llm_config.temperature,
+                "system": system_msg,
+                "messages": [{"role": "user", "content": user_msg + ANTHROPIC_JSON_HINT}],
+            },
+        }
+
+    def submit(self, jsonl_path: Path) -> str:
+        requests = _read_jsonl(jsonl_path.read_bytes())
+        batch = _request_json("POST", f"{self.base_url}/v1/messages/batches", self.headers,
+                              {"requests": requests})
+        return batch["id"]
+
+    def poll(self, job_id: str) -> Tuple[bool, Dict[str, Any]]:
+        status = _request_json("GET", f"{self.base_url}/v1/messages/batches/{job_id}", self.headers)
+        return status["processing_status"] == "ended", status
+
+    def results(self, status: Dict[str, Any]) -> Dict[str, Any]:
+        outcomes: Dict[str, Any] = {}
+        data = _request("GET", status["results_url"], self.headers)
+        for line in _read_jsonl(data):
+            result = line["result"]
+            if result["type"] == "succeeded":
+                blocks = result["message"]["content"]
+                outcomes[line["custom_id"]] = "".join(b.get("text", "") for b in blocks)
+            else:
+                outcomes[line["custom_id"]] = BatchJobError(f"批处理请求{result['type']}: {result.get('error')}")
+        return outcomes
+
+
+ADAPTERS = {"openai": OpenAIBatch, "anthropic": AnthropicBatch}
+
+
+# ───────────────────────── 编译、提交与回收 ─────────────────────────
+class JobWriter:
+    """把一个提供商的请求逐行写入JSONL；当前文件达到单个任务的请求数或大小上限时换到下一个文件"""
+
+    def __init__(self, work_dir: Path, provider: str, max_requests: int, max_bytes: int):
+        self.work_dir = work_dir
+        self.provider = provider
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.jobs: List[Dict[str, Any]] = []
+        self._fh = None
+        self._bytes = 0
+
+    def add(self, line: Dict[str, Any]) -> int:
+        """写入一个请求，返回所在任务的序号"""
+        data = (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+        job = self.jobs[-1] if self.jobs else None
+        if job is None or job["requests"] >= self.max_requests or (
+                job["requests"] and self._bytes + len(data) > self.max_bytes):
+            self._open()
+            job = self.jobs[-1]
+        self._fh.write(data)
+        self._bytes += len(data)
+        job["requests"] += 1
+        return len(self.jobs) - 1
+
+    def _open(self):
+        self.close()
+        path = self.work_dir / f"{self.provider}-{len(self.jobs)}.jsonl"
+        self._fh = open(path, "wb")
+        self._bytes = 0
+        self.jobs.append({"input_file": str(path), "requests": 0})
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class BatchRunner:
+    """批处理模式的完整流程：编译 → 提交 → 轮询 → 合并"""
+
+    def __init__(self, analyzer: BaseAnalyzer, config: GlobalConfig, work_dir: Path):
+        self.analyzer = analyzer
+        self.config = config
+        self.work_dir = Path(work_dir) / "batch_jobs"
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+    def compile(self, files: List[Path]) -> Dict[str, Any]:
+        """
+        生成各提供商的批处理JSONL文件和清单；
+        清单记录每个文档的综合结果框架、在各提供商下的初始结果（含预筛选和增量沿用的结论）及框架块对应的请求编号。
+        不支持批处理接口的提供商在此直接分析，结果同样记入清单
+        """
+        system_msg = self.analyzer.get_system_message()
+        manifest: Dict[str, Any] = {"documents": [], "jobs": {}}
+        writers: Dict[str, JobWriter] = {}
+
+        try:
+            for doc_index, file_path in enumerate(files):
+                manifest["documents"].append(self._compile_document(doc_index, file_path, system_msg, writers))
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        for provider, writer in writers.items():
+            manifest["jobs"][provider] = writer.jobs
+            for job in writer.jobs:
+                print(f"  {provider}: 编译 {job['requests']} 个请求 → {Path(job['input_file']).name}")
+
+        self._save_manifest(manifest)
+        return manifest
+
+    def _compile_document(
+        self, doc_index: int, file_path: Path, system_msg: str, writers: Dict[str, JobWriter]
+    ) -> Dict[str, Any]:
+        all_results = self.analyzer.document_results(str(file_path))
+        entry: Dict[str, Any] = {"path": str(file_path), "providers": {}, "direct": {}}
+        try:
+            loaded = self.analyzer.load_document(str(file_path))
+        except Exception as e:
+            print(f"读取 {file_path.name} 失败: {e}")
+            entry["error"] = str(e)
+            return entry
+
+        with self.analyzer.document_session(str(file_path), all_results, loaded) as document:
+            direct = []
+            for provider, llm_config in self.config.llm_configs.items():
+                if not llm_config.api_key:
+                    continue
+                if provider not in ADAPTERS:
+                    direct.append((provider, llm_config))
+                    continue
+                adapter = ADAPTERS[provider](llm_config)
+                if provider not in writers:
+                    writers[provider] = JobWriter(self.work_dir, provider, adapter.max_requests, adapter.max_bytes)
+                content, results, chunks = self.analyzer.prepare_analysis(str(file_path), llm_config, document)
+                request_ids, jobs = [], set()
+                for chunk_index, chunk in enumerate(chunks):
+                    custom_id = f"d{doc_index}-{provider}-c{chunk_index}"
+                    prompt = self.analyzer.build_prompt(content, chunk)
+                    jobs.add(writers[provider].add(adapter.build_line(custom_id, system_msg, prompt)))
+                    request_ids.append(custom_id)
+                entry["providers"][provider] = {"results": results, "requests": request_ids, "jobs": sorted(jobs)}
+
+            for provider, llm_config in direct:
+                print(f"使用 {provider} 分析中（不支持批处理接口）...")
+                try:
+                    entry["direct"][provider] = self.analyzer.analyze_with_single_llm(
+                        str(file_path), llm_config, document
+                    )
+                except Exception as e:
+                    entry["direct"][provider] = {"错误": str(e), "状态": "失败"}
+
+        entry["results"] = all_results
+        return entry
+
+    def submit(self, manifest: Dict[str, Any]):
+        for provider, jobs in manifest["jobs"].items():
+            adapter = ADAPTERS[provider](self.config.llm_configs[provider])
+            for job in jobs:
+                job["job_id"] = adapter.submit(Path(job["input_file"]))
+                job["status"] = "submitted"
+                print(f"  {provider}: 已提交批处理任务 {job['job_id']}")
+        self._save_manifest(manifest)
+
+    def wait(self, manifest: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """轮询所有任务直至完成，返回 {提供商: {custom_id: 响应文本或异常}}"""
+        outcomes: Dict[str, Dict[str, Any]] = {provider: {} for provider in manifest["jobs"]}
+        pending = [(provider, job) for provider, jobs in manifest["jobs"].items() for job in jobs if job.get("job_id")]
+        deadline = time.monotonic() + self.config.batch_timeout
+        while pending:
+            for provider, job in list(pending):
+                adapter = ADAPTERS[provider](self.config.llm_configs[provider])
+                try:
+                    done, status = adapter.poll(job["job_id"])
+                    if not done:
+                        continue
+                    outcomes[provider].update(adapter.results(status))
+                    job["status"] = "completed"
+                except Exception as e:
+                    print(f"  {provider}: 批处理任务 {job['job_id']} 失败: {e}")
+                    job["status"] = "failed"
+                    job["error"] = str(e)
+                pending.remove((provider, job))
+                print(f"  {provider}: 批处理任务 {job['job_id']} 结束 ({job['status']})")
+            if not pending:
+                break
+            if time.monotonic() > deadline:
+                for _, job in pending:
+                    job["status"] = "timeout"
+                break
+            time.sleep(self.config.batch_poll_interval)
+        self._save_manifest(manifest)
+        return outcomes
+
+    def ingest(self, manifest: Dict[str, Any], outcomes: Dict[str, Dict[str, Any]]) -> List[Tuple[Path, Dict[str, Any]]]:
+        """按框架块顺序把批处理响应交给常规的解析与合并流程，返回 [(文档路径, 综合结果)]"""
+        documents = []
+        for entry in manifest["documents"]:
+            file_path = Path(entry["path"])
+            if "error" in entry:
+                documents.append((file_path, {
+                    "文档名称": file_path.name, "文档路径": str(file_path), "错误": entry["error"], "状态": "处理失败",
+                }))
+                continue
+
+            all_results = entry["results"]
+            for provider, job in entry["providers"].items():
+                llm_config = self.config.llm_configs[provider]
+                results = job["results"]
+                responses = outcomes.get(provider, {})
+                for custom_id in job["requests"]:
+                    response = responses.get(custom_id, BatchJobError(f"批处理结果中缺少请求 {custom_id}"))
+                    try:
+                        if isinstance(response, Exception):
+                            raise response
+                        self.analyzer.merge_chunk_result(results, self.analyzer.parse_llm_content(llm_config, response))
+                    except Exception as e:
+                        print(f"处理 {provider} 时出错: {str(e)}")
+                        results[f"错误_{provider}"] = str(e)
+                provider_jobs = manifest["jobs"][provider]
+                results["批处理任务"] = ", ".join(str(provider_jobs[i].get("job_id")) for i in job["jobs"])
+                all_results["LLM分析结果"][provider] = results
+            all_results["LLM分析结果"].update(entry["direct"])
+            documents.append((file_path, all_results))
+        return documents
+
+    def run(self, files: List[Path]) -> List[Tuple[Path, Dict[str, Any]]]:
+        print("编译批处理任务...")
+        with span("编译批处理任务", "batch"):
+            manifest = self.compile(files)
+        with span("提交批处理任务", "batch"):
+            self.submit(manifest)
+        print("等待批处理任务完成...")
+        with span("等待批处理任务", "batch"):
+            outcomes = self.wait(manifest)
+        with span("回收批处理结果", "batch"):
+            return self.ingest(manifest, outcomes)
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        with open(self.work_dir / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
@@ -2,9 +2,12 @@
 批量处理器
 处理文件夹中的所有文档
 """
+import asyncio
+import contextvars
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any
@@ -16,7 +19,19 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 if str(BASE_DIR) not in sys.path:
     sys.path.append(str(BASE_DIR))
 
+from async_llm import AsyncLLMClient, HedgePolicy
+from batch_api import BatchRunner
+from clause_dataset import ClauseDatasetWriter, clause_rows
 from config import GlobalConfig, ReviewMode
+from metrics import (
+    RECORDER, STAGE_EXCEL, STAGE_HEATMAP, STAGE_JSON, distribution, document_scope, record_bytes, stage,
+    summarize_calls,
+)
+from profiling import StageProfiler
+from progress import ProgressTracker
+from prometheus_export import PrometheusTextfileExporter
+from result_store import DEFAULT_DB_NAME, ResultStore
+from tracing import TRACER, span
 from regulation_analyzer import RegulationAnalyzer
 from documentation_analyzer import DocumentationAnalyzer
 from overall_reporter import generate_overall_report
@@ -52,6 +67,30 @@ class BatchProcessor:
 
         # 初始化热力图生成器
         self.heatmap_generator = ComplianceHeatmapGenerator()
+        
+        # 异步模式下的对冲请求策略（统计写入汇总报告）
+        self.hedge_policy = (
+            HedgePolicy(
+                percentile=config.hedge_percentile,
+                min_samples=config.hedge_min_samples,
+                budget=config.hedge_budget,
+            )
+            if config.use_async and config.enable_hedging else None
+        )
+
+        # 跨运行结果库
+        self.result_store = (
+            ResultStore(Path(config.result_db_path or self.output_dir / DEFAULT_DB_NAME))
+            if config.result_db else None
+        )
+        # 增量分析从结果库中查找上一版本
+        if self.analyzer.incremental:
+            self.analyzer.incremental.store = self.result_store
+        # 跨运行的条款级数据集
+        self.clause_dataset = (
+            ClauseDatasetWriter(Path(config.clause_dataset_path), config.clause_dataset_format)
+            if config.clause_dataset_path else None
+        )
     
     def get_files_to_process(self) -> List[Path]:
         """获取需要处理的文件列表"""
@@ -84,45 +123,63 @@ class BatchProcessor:
 
         if self.config.save_consolidated_results:
             output_file = doc_dir / f"{base_name}_综合分析结果.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
+            with stage(STAGE_JSON), open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(results, f, ensure_ascii=False, indent=2)
             print(f"  - 保存综合结果: {output_file}")
             # 根据综合结果生成热力图
             try:
-                score_matrix = self.heatmap_generator.process_json_data(str(output_file))
-                reg_name = self.heatmap_generator.get_regulation_name(str(output_file))
-                safe_name = reg_name.replace('/', '_')
-                self.heatmap_generator.create_heatmap(
-                    score_matrix,
-                    doc_dir / f"{safe_name}_详细热力图.png",
-                    regulation_name=reg_name,
-                )
-                self.heatmap_generator.create_category_summary_heatmap(
-                    score_matrix,
-                    doc_dir / f"{safe_name}_分类汇总热力图.png",
-                    regulation_name=reg_name,
-                )
+                with stage(STAGE_HEATMAP):
+                    score_matrix = self.heatmap_generator.process_json_data(str(output_file))
+                    reg_name = self.heatmap_generator.get_regulation_name(str(output_file))
+                    safe_name = reg_name.replace('/', '_')
+                    self.heatmap_generator.create_heatmap(
+                        score_matrix,
+                        doc_dir / f"{safe_name}_详细热力图.png",
+                        regulation_name=reg_name,
+                    )
+                    self.heatmap_generator.create_category_summary_heatmap(
+                        score_matrix,
+                        doc_dir / f"{safe_name}_分类汇总热力图.png",
+                        regulation_name=reg_name,
+                    )
             except Exception as e:
                 print(f"  - 生成热力图失败: {e}")
             # ② 然后生成 Excel
             try:
-                self.json_to_excel(output_file)
+                with stage(STAGE_EXCEL):
+                    self.json_to_excel(output_file)
             except Exception as e:
                 print(f"  - 生成 Excel 失败: {e}")
 
+        if self.result_store is not None:
+            try:
+                self.result_store.add_document(str(self.run_output_dir.resolve()), results)
+            except Exception as e:
+                print(f"  - 写入结果库失败: {e}")
+        if self.clause_dataset is not None:
+            try:
+                self.clause_dataset.write(self.run_output_dir.name, results)
+            except Exception as e:
+                print(f"  - 写入条款级数据集失败: {e}")
+
         # 保存各LLM的单独结果
         if self.config.save_individual_results:
             for provider, llm_result in results.get("LLM分析结果", {}).items():
                 if isinstance(llm_result, dict) and "错误" not in llm_result:
                     individual_file = doc_dir / f"{base_name}_{provider}_分析结果.json"
-                    with open(individual_file, 'w', encoding='utf-8') as f:
+                    with stage(STAGE_JSON), open(individual_file, 'w', encoding='utf-8') as f:
                         json.dump(llm_result, f, ensure_ascii=False, indent=2)
                     print(f"  - 保存{provider}结果: {individual_file}")
 
         # 如果有综合分析结果，生成综合报告
         if output_file and output_file.exists():
             try:
-                overall_json, overall_docx, overall_txt = generate_overall_report(output_file)
+                with span("综合报告", "report"):
+                    overall_json, overall_docx, overall_txt = generate_overall_report(
+                        output_file,
+                        api_key=self.config.report_api_key,
+                        base_url=self.config.report_base_url,
+                    )
                 print(f"  - 生成综合报告: {overall_json.name}")
                 print(f"  - 生成Word报告: {overall_docx.name}")
                 print(f"  - 生成分析报告: {overall_txt.name}")
@@ -132,23 +189,25 @@ class BatchProcessor:
         # 根据综合结果生成热力图
         if output_file and output_file.exists():
             try:
-                score_matrix = self.heatmap_generator.process_json_data(str(output_file))
-                reg_name = self.heatmap_generator.get_regulation_name(str(output_file))
-                safe_name = reg_name.replace('/', '_')
+                with stage(STAGE_HEATMAP):
+                    score_matrix = self.heatmap_generator.process_json_data(str(output_file))
+                    reg_name = self.heatmap_generator.get_regulation_name(str(output_file))
+                    safe_name = reg_name.replace('/', '_')
 
-                self.heatmap_generator.create_heatmap(
-                    score_matrix,
-                    output_path=str(doc_dir / f"{safe_name}_详细热力图.png"),
-                    regulation_name=reg_name,
-                )
-                self.heatmap_generator.create_category_summary_heatmap(
-                    score_matrix,
-                    output_path=str(doc_dir / f"{safe_name}_分类汇总热力图.png"),
-                    regulation_name=reg_name,
-                )
+                    self.heatmap_generator.create_heatmap(
+                        score_matrix,
+                        output_path=str(doc_dir / f"{safe_name}_详细热力图.png"),
+                        regulation_name=reg_name,
+                    )
+                    self.heatmap_generator.create_category_summary_heatmap(
+                        score_matrix,
+                        output_path=str(doc_dir / f"{safe_name}_分类汇总热力图.png"),
+                        regulation_name=reg_name,
+                    )
             except Exception as e:
                 print(f"  - 生成热力图失败: {e}")
         
+        record_bytes(sum(p.stat().st_size for p in doc_dir.rglob("*") if p.is_file()))
 
     def json_to_excel(self, json_path: Path):
         """
@@ -160,43 +219,7 @@ class BatchProcessor:
         with json_path.open(encoding="utf-8") as f:
             raw = json.load(f)
 
-        rows = []
-        for provider, pdata in raw.get("LLM分析结果", {}).items():
-            if not isinstance(pdata, dict):
-                continue
-            meta = {
-                "DocumentTitle": pdata.get("文档标题") or pdata.get("文档名称"),
-                "PubOrg"       : pdata.get("颁布机构"),
-                "EffectiveDate": pdata.get("生效日期"),
-                "AnalysisDate" : pdata.get("分析日期"),
-                "Provider"     : provider,
-            }
-            for category, reqs in pdata.get("详细分析", {}).items():
-                for req in reqs:
-                    base = {
-                        **meta,
-                        "Category"       : category,
-                        "RequirementID"  : req.get("框架要求编号"),
-                        "RequirementName": req.get("框架要求名称"),
-                        "Coverage"       : req.get("法规覆盖情况"),
-                        "Implementation" : req.get("实施要求"),
-                        "Penalty"        : req.get("处罚措施"),
-                    }
-                    clauses = req.get("法规要求内容", [])
-                    if clauses:
-                        for c in clauses:
-                            rows.append({
-                                **base,
-                                "ClauseNo"           : c.get("条款编号"),
-                                "SpecificRequirement": c.get("具体要求"),
-                                "Strength"           : c.get("强制等级"),
-                                "Subjects"           : c.get("适用对象"),
-                                "OriginalText"       : c.get("原文内容"),
-                            })
-                    else:
-                        rows.append({**base,
-                            "ClauseNo":None,"SpecificRequirement":None,
-                            "Strength":None,"Subjects":None,"OriginalText":None})
+        rows = clause_rows(raw)
 
         df = pd.DataFrame(rows)
         out_path = json_path.with_suffix(".xlsx")
@@ -234,6 +257,18 @@ class BatchProcessor:
             summary["文件列表"].append(file_info)
         
         summary["LLM使用情况"] = llm_stats
+        summary["性能统计"] = self._performance_summary(all_results)
+        if self.hedge_policy:
+            summary["对冲请求"] = self.hedge_policy.to_dict()
+        if self.analyzer.breakers:
+            summary["熔断器"] = self.analyzer.breakers.to_dict()
+        if self.analyzer.router:
+            decisions = [r["路由决策"] for r in all_results if "路由决策" in r]
+            summary["路由"] = {
+                "按首选提供商处理文档数": len(decisions),
+                "升级复核文档数": sum(1 for d in decisions if d["升级原因"]),
+                "提供商统计": self.analyzer.router.to_dict(),
+            }
         
         # 保存汇总报告
         summary_file = self.run_output_dir / "批处理汇总报告.json"
@@ -245,6 +280,35 @@ class BatchProcessor:
         
         return summary
     
+    @staticmethod
+    def _performance_summary(all_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """各阶段耗时、按文档和按提供商的调用指标（含 p50/p95）"""
+        documents = RECORDER.document_summary()
+        all_calls = []
+        for result in all_results:
+            doc_calls = [
+                call
+                for llm_result in result.get("LLM分析结果", {}).values()
+                if isinstance(llm_result, dict)
+                for call in llm_result.get("调用指标", [])
+            ]
+            all_calls.extend(doc_calls)
+            doc = documents.setdefault(result["文档名称"], {"墙钟耗时秒": 0.0, "阶段耗时秒": {}, "写入字节数": 0})
+            doc.update({
+                "LLM调用次数": len(doc_calls),
+                "输入tokens": sum(c.get("input_tokens") or 0 for c in doc_calls),
+                "输出tokens": sum(c.get("output_tokens") or 0 for c in doc_calls),
+                "缓存tokens": sum(c.get("cached_tokens") or 0 for c in doc_calls),
+                "SDK重试次数": sum(c.get("retries") or 0 for c in doc_calls),
+            })
+        return {
+            "阶段耗时": RECORDER.summary(),
+            "文档耗时": distribution([d["墙钟耗时秒"] for d in documents.values()], total=True),
+            "写入字节数": sum(d["写入字节数"] for d in documents.values()),
+            "按提供商": summarize_calls(all_calls),
+            "按文档": documents,
+        }
+    
     def generate_readable_report(self, summary: Dict[str, Any]):
         """生成可读的文本报告"""
         report_lines = [
@@ -264,16 +328,65 @@ class BatchProcessor:
                 f"{provider}: 成功 {stats['成功']} 个, 失败 {stats['失败']} 个"
             )
         
+        if "对冲请求" in summary:
+            hedge = summary["对冲请求"]
+            report_lines.append(
+                f"对冲请求: {hedge['对冲请求数']}/{hedge['主请求数']} 次"
+                f"（估算 {hedge['对冲请求估算tokens']}/{hedge['主请求估算tokens']} tokens）, 对冲胜出 {hedge['对冲胜出数']} 次"
+            )
+        
+        if "路由" in summary:
+            routing = summary["路由"]
+            report_lines.append(
+                f"路由: {routing['按首选提供商处理文档数']} 个文档按首选提供商处理, "
+                f"{routing['升级复核文档数']} 个升级复核"
+            )
+        
+        if summary.get("熔断器", {}).get("状态变更"):
+            report_lines.extend(["", "熔断状态变更:", "-" * 40])
+            for event in summary["熔断器"]["状态变更"]:
+                report_lines.append(
+                    f"{event['时间']} {event['提供商']}: {event['原状态']} → {event['新状态']} ({event['原因']})"
+                )
+        
+        performance = summary.get("性能统计")
+        if performance:
+            report_lines.extend(["", "阶段耗时（累计 / p50 / p95，秒）:", "-" * 40])
+            for name, stats in performance["阶段耗时"].items():
+                report_lines.append(
+                    f"{name}: {stats['累计耗时秒']} / {stats['p50秒']} / {stats['p95秒']} （{stats['次数']} 次）"
+                )
+            doc_stats = performance["文档耗时"]
+            report_lines.append(
+                f"单文档耗时: p50 {doc_stats['p50秒']}s, p95 {doc_stats['p95秒']}s, "
+                f"写入 {performance['写入字节数'] / 1024 / 1024:.1f} MB"
+            )
+            
+            report_lines.extend(["", "LLM调用（按提供商）:", "-" * 40])
+            for provider, stats in performance["按提供商"].items():
+                report_lines.append(
+                    f"{provider}: {stats['调用次数']} 次, 耗时 p50 {stats['调用耗时']['p50秒']}s / "
+                    f"p95 {stats['调用耗时']['p95秒']}s, 排队 p95 {stats['排队等待']['p95秒']}s, "
+                    f"tokens 输入 {stats['输入tokens']}（缓存 {stats['缓存tokens']}）/ 输出 {stats['输出tokens']}, "
+                    f"SDK重试 {stats['SDK重试次数']} 次"
+                )
+        
         report_lines.extend([
             "",
             "文件处理详情:",
             "-" * 40
         ])
         
+        documents = performance["按文档"] if performance else {}
         for file_info in summary['文件列表']:
-            report_lines.append(
-                f"- {file_info['文件名']}: {file_info['处理状态']}"
-            )
+            line = f"- {file_info['文件名']}: {file_info['处理状态']}"
+            doc = documents.get(file_info['文件名'])
+            if doc:
+                line += (
+                    f", 耗时 {doc['墙钟耗时秒']}s, LLM调用 {doc['LLM调用次数']} 次, "
+                    f"tokens {doc['输入tokens']}/{doc['输出tokens']}, 写入 {doc['写入字节数'] / 1024:.0f} KB"
+                )
+            report_lines.append(line)
         
         report_lines.append("=" * 80)
         
@@ -296,35 +409,181 @@ class BatchProcessor:
         print(f"找到 {len(files)} 个文件待处理")
         print(f"审查模式: {'法规审查' if self.config.review_mode == ReviewMode.REGULATION else '文档审查'}")
         print(f"输出目录: {self.run_output_dir}")
+        if self.result_store is not None:
+            print(f"结果库: {self.result_store.path}")
         print("-" * 80)
         
+        if self.config.trace_output:
+            TRACER.enable()
+        self.progress = self._create_progress(len(files))
+        self.analyzer.progress = self.progress
+        if self.config.prometheus_textfile:
+            exporter = PrometheusTextfileExporter(
+                Path(self.config.prometheus_textfile),
+                self.progress,
+                RECORDER,
+                labels={"mode": self.config.review_mode.value},
+            )
+            self.progress.add_listener(exporter.write)
+        profiler = None
+        if self.config.profile:
+            profiler = StageProfiler(self.run_output_dir / "profile", self.config.profile, self.config.profile_memory)
+            RECORDER.profiler = profiler
+            profiler.start()
+            if self.config.pdf_workers > 1:
+                print(f"性能剖析已开启：PDF改为单进程提取（忽略 pdf_workers={self.config.pdf_workers}），"
+                      f"以便剖析提取库本身")
+        self.progress.start()
+        try:
+            with span("批处理", "run", files=len(files)):
+                if self.config.batch_mode:
+                    all_results = self._process_files_batch(files)
+                elif self.config.use_async:
+                    all_results = asyncio.run(self._process_files_async(files))
+                else:
+                    all_results = self._process_files(files)
+        finally:
+            self.progress.stop()
+            if profiler:
+                RECORDER.profiler = None
+                profiler.stop()
+        
+        # 生成汇总报告
+        print("\n" + "=" * 80)
+        print("生成汇总报告...")
+        self.generate_summary_report(all_results)
+        
+        if self.config.trace_output:
+            self.write_traces()
+        
+        return all_results
+    
+    def _create_progress(self, total: int) -> ProgressTracker:
+        """进度跟踪：progress.json 始终写出，终端进度行可关闭"""
+        providers = [name for name, cfg in self.config.llm_configs.items() if cfg.api_key]
+        return ProgressTracker(
+            total_documents=total,
+            providers=providers,
+            progress_path=self.run_output_dir / "progress.json",
+            interval=self.config.progress_interval,
+            default_chunks=len(self.analyzer.split_framework(self.config.categories_per_call)),
+            display=self.config.show_progress,
+        )
+    
+    def write_traces(self):
+        """写出本次运行的追踪文件"""
+        TRACER.disable()
+        trace_file = TRACER.write_chrome(self.run_output_dir / "trace.json")
+        print(f"追踪文件: {trace_file}（可在 chrome://tracing 或 https://ui.perfetto.dev 中打开）")
+        if self.config.otlp_output:
+            otlp_file = TRACER.write_otlp(self.run_output_dir / "trace.otlp.json")
+            print(f"OTLP追踪文件: {otlp_file}")
+    
+    def _process_files(self, files: List[Path]) -> List[Dict[str, Any]]:
+        """逐个处理文件"""
         all_results = []
         
         for i, file_path in enumerate(files, 1):
             print(f"\n处理文件 {i}/{len(files)}: {file_path.name}")
             
             try:
-                # 使用所有LLM分析
-                results = self.analyzer.analyze_with_all_llms(str(file_path))
-                
-                # 保存结果
-                self.save_results(file_path, results)
+                with document_scope(file_path.name), span(file_path.name, "document"):
+                    # 使用所有LLM分析
+                    with span("分析", "document"):
+                        results = self.analyzer.analyze_with_all_llms(str(file_path))
+                    
+                    # 保存结果
+                    with span("保存结果", "document"):
+                        self.save_results(file_path, results)
                 
                 all_results.append(results)
+                self.progress.document_done()
                 
             except Exception as e:
                 print(f"处理文件时出错: {str(e)}")
-                error_result = {
-                    "文档名称": file_path.name,
-                    "文档路径": str(file_path),
-                    "错误": str(e),
-                    "状态": "处理失败"
-                }
-                all_results.append(error_result)
+                all_results.append(self._error_result(file_path, e))
+                self.progress.document_done(failed=True)
         
-        # 生成汇总报告
-        print("\n" + "=" * 80)
-        print("生成汇总报告...")
-        self.generate_summary_report(all_results)
+        return all_results
+    
+    def _process_files_batch(self, files: List[Path]) -> List[Dict[str, Any]]:
+        """通过提供商的Batch API离线处理全部文件，结果回收后逐个保存"""
+        all_results = []
+        runner = BatchRunner(self.analyzer, self.config, self.run_output_dir)
+        for file_path, results in runner.run(files):
+            print(f"\n保存结果: {file_path.name}")
+            if "错误" in results:
+                all_results.append(results)
+                self.progress.document_done(failed=True)
+                continue
+            try:
+                with document_scope(file_path.name), span(f"保存结果 {file_path.name}", "document"):
+                    self.save_results(file_path, results)
+                all_results.append(results)
+                self.progress.document_done()
+            except Exception as e:
+                print(f"处理文件时出错: {str(e)}")
+                all_results.append(self._error_result(file_path, e))
+                self.progress.document_done(failed=True)
+        return all_results
+    
+    async def _process_files_async(self, files: List[Path]) -> List[Dict[str, Any]]:
+        """所有文件并发分析，分析完成一个保存一个"""
+        client = AsyncLLMClient(
+            max_in_flight=self.config.max_in_flight,
+            timeout=self.config.llm_timeout,
+            hedge=self.hedge_policy,
+            breakers=self.analyzer.breakers,
+        )
+        
+        async def analyze(index: int, file_path: Path):
+            try:
+                with document_scope(file_path.name), span(file_path.name, "document"):
+                    return index, await self.analyzer.aanalyze_with_all_llms(str(file_path), client)
+            except Exception as e:
+                return index, e
         
-        return all_results
\ No newline at end of file
+        def save(file_path: Path, results: Dict[str, Any]):
+            with document_scope(file_path.name), span(f"保存结果 {file_path.name}", "document"):
+                self.save_results(file_path, results)
+        
+        # 保存（JSON、热力图、Excel、Word及综合报告的LLM调用）是阻塞操作，放到单线程执行器中串行执行：
+        # 不阻塞事件循环上进行中的流式请求，热力图绘制也不会并发（matplotlib不是线程安全的）
+        saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save_results")
+        loop = asyncio.get_running_loop()
+        all_results: List[Dict[str, Any]] = [None] * len(files)
+        try:
+            tasks = [asyncio.create_task(analyze(i, f)) for i, f in enumerate(files)]
+            for done, next_result in enumerate(asyncio.as_completed(tasks), 1):
+                index, results = await next_result
+                file_path = files[index]
+                print(f"\n完成文件 {done}/{len(files)}: {file_path.name}")
+                
+                if isinstance(results, Exception):
+                    print(f"处理文件时出错: {str(results)}")
+                    all_results[index] = self._error_result(file_path, results)
+                    self.progress.document_done(failed=True)
+                    continue
+                
+                try:
+                    await loop.run_in_executor(saver, contextvars.copy_context().run, save, file_path, results)
+                    all_results[index] = results
+                    self.progress.document_done()
+                except Exception as e:
+                    print(f"处理文件时出错: {str(e)}")
+                    all_results[index] = self._error_result(file_path, e)
+                    self.progress.document_done(failed=True)
+        finally:
+            saver.shutdown(wait=True)
+            await client.aclose()
+        
+        return all_results
+    
+    @staticmethod
+    def _error_result(file_path: Path, error: Exception) -> Dict[str, Any]:
+        return {
+            "文档名称": file_path.name,
+            "文档路径": str(file_path),
+            "错误": str(error),
+            "状态": "处理失败"
+        }
@@ -0,0 +1,332 @@
+"""
+端到端基准测试
+在本地模拟服务（mock_server.py）上离线运行整条处理流程：合成不同长度的法规文本和不同规模的批次，
+记录各阶段耗时（文档提取、提示词构建、LLM等待、响应解析、JSON写入、热力图、Excel、Word、文本报告）、
+峰值内存和吞吐量（文档/小时），结果按提交保存为JSON，便于跨提交对比。
+每个场景在独立的子进程中运行，峰值内存互不影响。
+语料默认同时生成 .txt 和 .pdf 两种格式（未安装PDF提取库时只有 .txt），PDF场景覆盖真实的PDF提取路径；
+不生成 .docx 语料，DOCX提取不在基准范围内。
+用法:
+    python benchmark.py --quick
+    python benchmark.py --sizes 10000,100000,1000000 --files 1,50,500 --async
+    python benchmark.py --quick --formats pdf
+    python benchmark.py --compare benchmark_results/abc123.json benchmark_results/def456.json
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from mock_server import MockBehavior, MockLLMServer
+from pdf_extractor import available_backends
+from prompt import REGULATORY_FRAMEWORK
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_FILES = (1, 50, 500)
+QUICK_SIZES = (10_000,)
+QUICK_FILES = (1, 5)
+CORPUS_FORMATS = ("txt", "pdf")
+
+# 合成PDF的排版：每行字符数、每页行数
+PDF_LINE_CHARS = 40
+PDF_PAGE_LINES = 40
+
+_FILLER = (
+    "企业应当遵守所在国法律法规，尊重当地风俗习惯，履行社会责任。",
+    "有关部门应当加强事中事后监管，建立健全信息报送制度。",
+    "投资主体应当按照规定向主管部门报告项目进展情况。",
+    "违反本办法规定的，由主管部门责令限期改正，并依法追究相关人员责任。",
+)
+
+
+# ─────────────── 合成数据 ───────────────
+def synthetic_regulation(chars: int, seed: int = 0) -> str:
+    """生成约 chars 个字符的合成法规：按“第N条”分条，条文中混入框架要求名称以触发各大类"""
+    rng = random.Random(seed)
+    names = [req["name"] for reqs in REGULATORY_FRAMEWORK.values() for req in reqs]
+    parts = [f"合成境外投资管理办法（样本{seed}）\n"]
+    length = len(parts[0])
+    article = 0
+    while length < chars:
+        article += 1
+        sentences = [rng.choice(_FILLER) for _ in range(rng.randint(2, 5))]
+        sentences.insert(rng.randrange(len(sentences) + 1), f"企业应当建立{rng.choice(names)}。")
+        text = f"第{article}条 {''.join(sentences)}\n"
+        parts.append(text)
+        length += len(text)
+    return "".join(parts)[:chars]
+
+
+def _pdf_to_unicode() -> bytes:
+    """Identity-H 编码下 CID 即 Unicode 码位，ToUnicode 按高字节分段映射回原文"""
+    blocks = []
+    for start in range(0, 256, 100):
+        part = range(start, min(start + 100, 256))  # 每个 bfrange 段最多100项
+        body = "".join(f"<{h:02X}00> <{h:02X}FF> <{h:02X}00>\n" for h in part)
+        blocks.append(f"{len(part)} beginbfrange\n{body}endbfrange\n")
+    return (
+        "/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+        "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+        + "".join(blocks)
+        + "endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n"
+    ).encode("ascii")
+
+
+def write_pdf(path: Path, text: str) -> Path:
+    """把文本按行宽和每页行数排版写成PDF（Type0 字体 + ToUnicode，不嵌入字形），供提取阶段使用"""
+    lines: List[str] = []
+    for raw in text.splitlines():
+        lines.extend(raw[i:i + PDF_LINE_CHARS] for i in range(0, len(raw), PDF_LINE_CHARS))
+    pages = [lines[i:i + PDF_PAGE_LINES] for i in range(0, len(lines), PDF_PAGE_LINES)] or [[]]
+
+    to_unicode = _pdf_to_unicode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /SimSun /Encoding /Identity-H "
+        b"/DescendantFonts [4 0 R] /ToUnicode 6 0 R >>",
+        b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /SimSun "
+        b"/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> "
+        b"/FontDescriptor 5 0 R /DW 1000 >>",
+        b"<< /Type /FontDescriptor /FontName /SimSun /Flags 6 /FontBBox [0 -140 1000 860] "
+        b"/ItalicAngle 0 /Ascent 860 /Descent -140 /CapHeight 860 /StemV 80 >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(to_unicode), to_unicode),
+    ]
+    kids = []
+    for page in pages:
+        shown = "".join(
+            "<%s> Tj T*\n" % "".join(f"{ord(c):04X}" for c in line if ord(c) <= 0xFFFF) for line in page
+        )
+        stream = f"BT /F1 12 Tf 14 TL 50 800 Td\n{shown}ET".encode("ascii")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode("ascii")
+
+    chunks = [b"%PDF-1.4\n"]
+    offsets = []
+    size = len(chunks[0])
+    for number, body in enumerate(objects, 1):
+        offsets.append(size)
+        chunks.append(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        size += len(chunks[-1])
+    chunks.append(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    chunks.extend(b"%010d 00000 n \n" % offset for offset in offsets)
+    chunks.append(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, size))
+    path.write_bytes(b"".join(chunks))
+    return path
+
+
+def default_formats() -> Tuple[str, ...]:
+    """未安装PDF提取库时只生成 .txt 语料"""
+    return CORPUS_FORMATS if available_backends() else ("txt",)
+
+
+def write_corpus(directory: Path, chars: int, files: int, fmt: str = "txt") -> List[Path]:
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(files):
+        path = directory / f"合成法规_{chars}_{i:04d}.{fmt}"
+        text = synthetic_regulation(chars, seed=i)
+        if fmt == "pdf":
+            write_pdf(path, text)
+        else:
+            path.write_text(text, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+# ─────────────── 场景运行 ───────────────
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）；Linux 单位为KB，macOS 为字节"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(chars: int, files: int, base_url: str, use_async: bool, work_dir: str,
+                 fmt: str = "txt") -> Dict[str, Any]:
+    """在子进程中执行：合成语料并用模拟提供商跑完整流程"""
+    from batch_processor import BatchProcessor
+    from config import get_default_config, mock_llm_config
+    from metrics import RECORDER
+
+    work = Path(work_dir)
+    input_dir = work / "input"
+    write_corpus(input_dir, chars, files, fmt)
+
+    config = get_default_config()
+    config.llm_configs = {"mock": mock_llm_config(base_url)}
+    # 综合报告直接使用 anthropic SDK，显式指向模拟服务（SDK 自行拼接 /v1/messages）
+    config.report_api_key = "mock"
+    config.report_base_url = base_url[: -len("/v1")]
+    config.input_path = str(input_dir)
+    config.output_path = str(work / "output")
+    config.max_content_length = max(config.max_content_length, chars)
+    config.use_async = use_async
+
+    RECORDER.reset()
+    processor = BatchProcessor(config)
+    started = time.perf_counter()
+    results = processor.process_all_files()
+    elapsed = time.perf_counter() - started
+
+    failed = sum(1 for r in results if "错误" in r)
+    return {
+        "文档字符数": chars,
+        "文件数": files,
+        "格式": fmt,
+        "失败文档数": failed,
+        "墙钟耗时秒": round(elapsed, 3),
+        "文档每小时": round(len(results) / elapsed * 3600, 1) if elapsed > 0 else None,
+        "峰值内存MB": round(peak_rss_mb(), 1),
+        "阶段耗时": RECORDER.summary(),
+    }
+
+
+def current_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(sizes: List[int], files: List[int], behavior: MockBehavior,
+                   use_async: bool, output_dir: Path, formats: Tuple[str, ...] = ("txt",)) -> Path:
+    server = MockLLMServer(port=0, behavior=behavior)
+    server.start_in_thread()
+
+    scenarios = []
+    spawn = multiprocessing.get_context("spawn")
+    try:
+        for fmt in formats:
+            for chars in sizes:
+                for count in files:
+                    print(f"场景: {chars} 字符 × {count} 个 .{fmt} 文件 ...", flush=True)
+                    with tempfile.TemporaryDirectory() as work_dir, \
+                            ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                        result = pool.submit(run_scenario, chars, count, server.base_url,
+                                             use_async, work_dir, fmt).result()
+                    scenarios.append(result)
+                    print(f"  耗时 {result['墙钟耗时秒']}s，{result['文档每小时']} 文档/小时，"
+                          f"峰值内存 {result['峰值内存MB']} MB")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    commit = current_commit()
+    report = {
+        "提交": commit,
+        "时间": datetime.now().isoformat(timespec="seconds"),
+        "Python": sys.version.split()[0],
+        "异步模式": use_async,
+        "模拟服务参数": vars(behavior),
+        "场景": scenarios,
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    out = output_dir / f"{commit}.json"
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"基准结果已保存到: {out}")
+    return out
+
+
+# ─────────────── 跨提交对比 ───────────────
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> List[Tuple[str, str, float, float]]:
+    """按场景对比两次结果，返回 (场景, 指标, 基线值, 新值)"""
+    def key(s):
+        # 早期结果没有“格式”字段，均为 .txt 语料
+        fmt = s.get("格式", "txt")
+        return f"{s['文档字符数']}字符×{s['文件数']}文件" + ("" if fmt == "txt" else f"×{fmt}")
+
+    base = {key(s): s for s in baseline["场景"]}
+    rows = []
+    for scenario in candidate["场景"]:
+        name = key(scenario)
+        old = base.get(name)
+        if old is None:
+            continue
+        for metric in ("墙钟耗时秒", "文档每小时", "峰值内存MB"):
+            if old.get(metric) is not None and scenario.get(metric) is not None:
+                rows.append((name, metric, old[metric], scenario[metric]))
+        for stage_name, stats in scenario["阶段耗时"].items():
+            old_stats = old["阶段耗时"].get(stage_name)
+            if old_stats:
+                rows.append((name, f"{stage_name}累计秒", old_stats["累计耗时秒"], stats["累计耗时秒"]))
+    return rows
+
+
+def print_comparison(baseline_path: Path, candidate_path: Path):
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    candidate = json.loads(candidate_path.read_text(encoding="utf-8"))
+    print(f"基线 {baseline['提交']}  →  对比 {candidate['提交']}")
+    print("-" * 80)
+    for name, metric, old, new in compare(baseline, candidate):
+        change = f"{(new - old) / old:+.1%}" if old else "-"
+        print(f"{name:<24}{metric:<20}{old:>12}{new:>12}{change:>10}")
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _str_list(value: str) -> List[str]:
+    formats = [v.strip().lower().lstrip(".") for v in value.split(",") if v.strip()]
+    unknown = set(formats) - set(CORPUS_FORMATS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"不支持的语料格式: {', '.join(sorted(unknown))}")
+    return formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="在本地模拟服务上离线运行端到端基准测试")
+    parser.add_argument("--sizes", type=_int_list, help="文档字符数列表，逗号分隔（默认 10000,100000,1000000）")
+    parser.add_argument("--files", type=_int_list, help="批次文件数列表，逗号分隔（默认 1,50,500）")
+    parser.add_argument("--quick", action="store_true", help="只运行小规模场景（10000字符 × 1/5个文件）")
+    parser.add_argument("--formats", type=_str_list,
+                        help="语料格式列表，逗号分隔（txt/pdf，默认两者；未安装PDF提取库时只有 txt）")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="使用异步并发模式")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="模拟服务首token时延中位数（毫秒）")
+    parser.add_argument("--latency", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="模拟流式输出速率，0表示不限速")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results", help="结果目录（默认 benchmark_results）")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), help="对比两次基准结果")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(Path(args.compare[0]), Path(args.compare[1]))
+        return
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    files = args.files or (QUICK_FILES if args.quick else DEFAULT_FILES)
+    behavior = MockBehavior(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        seed=args.seed,
+    )
+    formats = tuple(args.formats or default_formats())
+    if "pdf" in formats and not available_backends():
+        parser.error("未安装任何PDF提取库（pypdfium2 / pdfminer.six / PyPDF2），无法运行PDF场景")
+    run_benchmarks(list(sizes), list(files), behavior, args.use_async, Path(args.output), formats)
+
+
+if __name__ == "__main__":
+    main()
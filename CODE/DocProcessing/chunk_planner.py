@@ -0,0 +1,141 @@
+"""
+自适应框架分块
+按提供商实测的各类别输出长度、模型输出上限和文档长度，把尽量多的框架类别装进一次调用；
+出现截断时收紧该提供商的可用输出预算，之后逐步放宽。统计保存在 JSON 文件中，跨批次累积。
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from config import LLMConfig
+from text_cleaner import estimate_tokens
+
+# 常见模型的输出token上限（按模型名前缀匹配），配置值更小时以配置为准
+KNOWN_OUTPUT_LIMITS = {
+    "deepseek-chat": 8192,
+    "deepseek-reasoner": 32768,
+    "gpt-4o": 16384,
+    "gpt-4.1": 32768,
+    "claude": 8192,
+}
+# 没有实测数据时每个要求项的输出token估计
+DEFAULT_TOKENS_PER_ITEM = 400
+# 文档标题、关键发现等汇总字段的固定开销
+RESPONSE_OVERHEAD_TOKENS = 600
+# 按文档长度分档，长文档引用的原文更多、输出更长
+DOC_SIZE_BUCKETS = ((8000, "短"), (32000, "中"), (float("inf"), "长"))
+# 估计值放大系数，留出余量
+SAFETY_FACTOR = 1.3
+EMA_ALPHA = 0.3
+# 截断后可用预算的收缩比例，以及每次完整响应后的恢复比例
+TRUNCATION_BACKOFF = 0.7
+RECOVERY_STEP = 1.05
+MIN_BUDGET_SCALE = 0.2
+
+
+def output_limit(llm_config: LLMConfig) -> int:
+    """该提供商单次调用实际可用的输出token上限"""
+    limit = llm_config.max_tokens if llm_config.provider == "anthropic" else llm_config.max_completion_tokens
+    for prefix, known in KNOWN_OUTPUT_LIMITS.items():
+        if llm_config.model.lower().startswith(prefix):
+            return min(limit, known)
+    return limit
+
+
+def doc_size_bucket(doc_tokens: int) -> str:
+    for upper, name in DOC_SIZE_BUCKETS:
+        if doc_tokens < upper:
+            return name
+    return DOC_SIZE_BUCKETS[-1][1]
+
+
+class ChunkPlanner:
+    """按提供商学习每个类别的输出长度，并据此打包框架类别"""
+
+    def __init__(self, stats_path: Path):
+        self.stats_path = Path(stats_path)
+        # {提供商: {"类别|文档长度档": 平均输出tokens}}
+        self.category_tokens: Dict[str, Dict[str, float]] = {}
+        # {提供商: 可用输出预算比例}
+        self.budget_scale: Dict[str, float] = {}
+        self.truncations: Dict[str, int] = {}
+        self.load()
+
+    # ─────────────── 持久化 ───────────────
+    def load(self):
+        if not self.stats_path.exists():
+            return
+        data = json.loads(self.stats_path.read_text(encoding="utf-8"))
+        self.category_tokens = data.get("类别输出tokens", {})
+        self.budget_scale = data.get("预算比例", {})
+        self.truncations = data.get("截断次数", {})
+
+    def save(self):
+        self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "类别输出tokens": self.category_tokens,
+            "预算比例": self.budget_scale,
+            "截断次数": self.truncations,
+        }
+        self.stats_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # ─────────────── 估计与打包 ───────────────
+    def estimate(self, provider: str, category: str, requirements: List[Dict[str, Any]], doc_tokens: int) -> float:
+        """估计该类别的输出tokens：优先用同档文档的实测值，其次用任意档的实测值"""
+        measured = self.category_tokens.get(provider, {})
+        key = f"{category}|{doc_size_bucket(doc_tokens)}"
+        if key in measured:
+            return measured[key]
+        others = [v for k, v in measured.items() if k.split("|")[0] == category]
+        if others:
+            return max(others)
+        return DEFAULT_TOKENS_PER_ITEM * len(requirements)
+
+    def budget(self, llm_config: LLMConfig) -> float:
+        return (output_limit(llm_config) - RESPONSE_OVERHEAD_TOKENS) * self.budget_scale.get(llm_config.provider, 1.0)
+
+    def plan(self, framework: Dict[str, Any], llm_config: LLMConfig, doc_tokens: int) -> List[Dict[str, Any]]:
+        """按框架顺序贪心打包，每块的估计输出不超过预算；单个类别超出预算时单独成块"""
+        budget = self.budget(llm_config)
+        chunks: List[Dict[str, Any]] = []
+        current: Dict[str, Any] = {}
+        used = 0.0
+        for category, requirements in framework.items():
+            need = self.estimate(llm_config.provider, category, requirements, doc_tokens) * SAFETY_FACTOR
+            if current and used + need > budget:
+                chunks.append(current)
+                current, used = {}, 0.0
+            current[category] = requirements
+            used += need
+        if current:
+            chunks.append(current)
+        return chunks
+
+    # ─────────────── 学习 ───────────────
+    def observe(self, llm_config: LLMConfig, chunk_result: Dict[str, Any], doc_tokens: int, truncated: bool):
+        """记录一次调用中各类别的实际输出长度；被截断时收紧预算，否则逐步恢复"""
+        provider = llm_config.provider
+        measured = self.category_tokens.setdefault(provider, {})
+        bucket = doc_size_bucket(doc_tokens)
+        if not truncated:
+            for category, items in chunk_result.get("详细分析", {}).items():
+                if not isinstance(items, list) or not items:
+                    continue
+                tokens = estimate_tokens(json.dumps(items, ensure_ascii=False))
+                key = f"{category}|{bucket}"
+                previous = measured.get(key)
+                measured[key] = tokens if previous is None else previous + EMA_ALPHA * (tokens - previous)
+        self._adjust_budget(provider, truncated)
+
+    def observe_failure(self, llm_config: LLMConfig):
+        """整块响应无法解析（通常是输出被截断且无可恢复内容）"""
+        self._adjust_budget(llm_config.provider, truncated=True)
+
+    def _adjust_budget(self, provider: str, truncated: bool):
+        scale = self.budget_scale.get(provider, 1.0)
+        if truncated:
+            self.truncations[provider] = self.truncations.get(provider, 0) + 1
+            scale = max(MIN_BUDGET_SCALE, scale * TRUNCATION_BACKOFF)
+        else:
+            scale = min(1.0, scale * RECOVERY_STEP)
+        self.budget_scale[provider] = scale
@@ -0,0 +1,135 @@
+"""
+提供商熔断器
+某个提供商连续失败达到阈值后熔断：冷却期内的调用直接失败，不再等待超时；
+冷却期结束后放行一个探测请求，成功则恢复，失败则重新熔断
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_LABELS = {CLOSED: "关闭", OPEN: "打开", HALF_OPEN: "半开"}
+
+
+class CircuitOpenError(RuntimeError):
+    """提供商处于熔断状态，调用被直接拒绝"""
+
+
+class CircuitBreaker:
+    """单个提供商的熔断器（同步调用与事件循环内调用均可使用）"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        cooldown: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.rejected_calls = 0
+        self.transitions: List[Dict[str, Any]] = []
+        self._opened_at = 0.0
+        self._probing = False
+
+    def _transition(self, state: str, reason: str):
+        self.transitions.append({
+            "提供商": self.name,
+            "时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "原状态": STATE_LABELS[self.state],
+            "新状态": STATE_LABELS[state],
+            "原因": reason,
+        })
+        self.state = state
+
+    def before_call(self):
+        """调用前检查；熔断中抛出 CircuitOpenError"""
+        if self.state == OPEN:
+            remaining = self.cooldown - (self.clock() - self._opened_at)
+            if remaining > 0:
+                self.rejected_calls += 1
+                raise CircuitOpenError(f"{self.name} 已熔断，{remaining:.0f}秒后重试")
+            self._transition(HALF_OPEN, "冷却结束，放行探测请求")
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self.rejected_calls += 1
+                raise CircuitOpenError(f"{self.name} 正在探测恢复情况")
+            self._probing = True
+
+    def record_success(self):
+        self._probing = False
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED, "探测请求成功")
+
+    def record_failure(self, reason: str):
+        self._probing = False
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self._open(f"探测请求失败: {reason}")
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open(f"连续失败 {self.consecutive_failures} 次: {reason}")
+
+    def _open(self, reason: str):
+        self._opened_at = self.clock()
+        self._transition(OPEN, reason[:200])
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """包裹一次提供商调用，按结果更新状态；被取消的调用不计入成败"""
+        self.before_call()
+        try:
+            yield
+        except Exception as exc:
+            self.record_failure(str(exc) or type(exc).__name__)
+            raise
+        except BaseException:
+            self._probing = False
+            raise
+        else:
+            self.record_success()
+
+
+class CircuitBreakerRegistry:
+    """按提供商名称管理熔断器"""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, provider: str) -> CircuitBreaker:
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(provider, self.failure_threshold, self.cooldown)
+        return self._breakers[provider]
+
+    def guard(self, provider: str):
+        return self.get(provider).guard()
+
+    def transitions(self) -> List[Dict[str, Any]]:
+        events = [t for breaker in self._breakers.values() for t in breaker.transitions]
+        return sorted(events, key=lambda t: t["时间"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "失败阈值": self.failure_threshold,
+            "冷却时间秒": self.cooldown,
+            "当前状态": {name: STATE_LABELS[b.state] for name, b in self._breakers.items()},
+            "拒绝调用数": {name: b.rejected_calls for name, b in self._breakers.items()},
+            "状态变更": self.transitions(),
+        }
+
+
+def optional_guard(registry: Optional[CircuitBreakerRegistry], provider: str):
+    """未启用熔断时返回空上下文"""
+    if registry is None:
+        return nullcontext()
+    return registry.guard(provider)
@@ -0,0 +1,235 @@
+"""
+条款级分析数据集（Parquet / Arrow）
+把各运行的综合分析结果展开为条款级行（与 json_to_excel 的列一致，另加 Run、Regulation、Model），
+按 run=<运行目录>/regulation=<法规> 分区追加写入一个跨运行的数据集，供组合分析直接加载。
+提供商、大类、覆盖情况、强制等级等重复值很多的列使用字典编码；
+arrow 格式（Arrow IPC，不压缩）可零拷贝内存映射，parquet 格式体积更小，读取时同样使用内存映射并保留字典编码。
+每个分区只包含一份文档在一次运行中的结果，重复导出同一运行会覆盖对应分区，不会产生重复行。
+用法:
+    python clause_dataset.py export ../../Result --output clause_dataset
+    python clause_dataset.py load clause_dataset
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from result_store import parse_run_dir
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    from pyarrow import fs
+except ImportError:
+    pa = None
+
+FORMATS = ("parquet", "arrow")
+PART_FILES = {"parquet": "part-0.parquet", "arrow": "part-0.arrow"}
+# 字典编码的列（取值种类少、重复多）
+DICTIONARY_COLUMNS = (
+    "Provider", "Model", "Category", "RequirementName", "Coverage", "Strength", "Subjects", "PubOrg",
+)
+STRING_COLUMNS = (
+    "DocumentTitle", "EffectiveDate", "AnalysisDate", "Implementation", "Penalty",
+    "ClauseNo", "SpecificRequirement", "OriginalText",
+)
+
+
+def clause_rows(raw: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """综合分析结果 → 条款级行；没有条款的要求保留一行，条款列为空"""
+    rows = []
+    for provider, pdata in raw.get("LLM分析结果", {}).items():
+        if not isinstance(pdata, dict):
+            continue
+        meta = {
+            "DocumentTitle": pdata.get("文档标题") or pdata.get("文档名称"),
+            "PubOrg"       : pdata.get("颁布机构"),
+            "EffectiveDate": pdata.get("生效日期"),
+            "AnalysisDate" : pdata.get("分析日期"),
+            "Provider"     : provider,
+        }
+        for category, reqs in pdata.get("详细分析", {}).items():
+            for req in reqs:
+                base = {
+                    **meta,
+                    "Category"       : category,
+                    "RequirementID"  : req.get("框架要求编号", req.get("要求编号")),
+                    "RequirementName": req.get("框架要求名称") or req.get("要求名称"),
+                    "Coverage"       : req.get("法规覆盖情况") or req.get("满足程度"),
+                    "Implementation" : req.get("实施要求"),
+                    "Penalty"        : req.get("处罚措施"),
+                }
+                clauses = req.get("法规要求内容", [])
+                if clauses:
+                    for c in clauses:
+                        rows.append({
+                            **base,
+                            "ClauseNo"           : c.get("条款编号"),
+                            "SpecificRequirement": c.get("具体要求"),
+                            "Strength"           : c.get("强制等级"),
+                            "Subjects"           : c.get("适用对象"),
+                            "OriginalText"       : c.get("原文内容"),
+                        })
+                else:
+                    rows.append({**base,
+                        "ClauseNo":None,"SpecificRequirement":None,
+                        "Strength":None,"Subjects":None,"OriginalText":None})
+    return rows
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow库未安装，请 pip install pyarrow")
+
+
+def _string(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _partition_value(value: str) -> str:
+    """分区目录名中不能出现路径分隔符和等号"""
+    return "".join("_" if c in '/\\=' else c for c in value)
+
+
+def schema() -> "pa.Schema":
+    _require_pyarrow()
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    fields = [pa.field("RequirementID", pa.int32())]
+    fields += [pa.field(name, dictionary) for name in DICTIONARY_COLUMNS]
+    fields += [pa.field(name, pa.string()) for name in STRING_COLUMNS]
+    return pa.schema(fields)
+
+
+def to_table(raw: Dict[str, Any]) -> "pa.Table":
+    """一份文档的条款级行 → Arrow 表（分区列不写入文件，由目录名提供）"""
+    target = schema()
+    rows = clause_rows(raw)
+    models = {
+        provider: pdata.get("LLM模型")
+        for provider, pdata in raw.get("LLM分析结果", {}).items() if isinstance(pdata, dict)
+    }
+    columns = {"RequirementID": pa.array([_int(r["RequirementID"]) for r in rows], pa.int32())}
+    for name in DICTIONARY_COLUMNS:
+        if name == "Model":
+            values = [models.get(r["Provider"]) for r in rows]
+        else:
+            values = [_string(r[name]) for r in rows]
+        columns[name] = pa.array(values, pa.string()).dictionary_encode()
+    for name in STRING_COLUMNS:
+        columns[name] = pa.array([_string(r[name]) for r in rows], pa.string())
+    return pa.Table.from_pydict(columns, schema=target)
+
+
+class ClauseDatasetWriter:
+    """按 run/regulation 分区写入；写入先落到临时文件再替换，读取方不会看到半个分区"""
+
+    def __init__(self, root: Path, format: str = "parquet"):
+        _require_pyarrow()
+        if format not in FORMATS:
+            raise ValueError(f"未知的数据集格式: {format}")
+        self.root = Path(root)
+        self.format = format
+
+    def partition_path(self, run: str, regulation: str) -> Path:
+        return (self.root / f"run={_partition_value(run)}" / f"regulation={_partition_value(regulation)}"
+                / PART_FILES[self.format])
+
+    def write(self, run: str, raw: Dict[str, Any]) -> Path:
+        """写入（或覆盖）一份文档在一次运行中的分区"""
+        regulation = Path(raw.get("文档名称") or raw.get("文档路径", "unknown")).stem
+        path = self.partition_path(run, regulation)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = to_table(raw)
+        tmp = path.with_name(f".{path.name}.tmp")
+        if self.format == "parquet":
+            pq.write_table(table, tmp, compression="zstd", use_dictionary=True)
+        else:
+            feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, path)
+        return path
+
+    def export_run(self, run_dir: Path, overwrite: bool = False) -> int:
+        """导出一个运行目录，返回写入的分区数；默认跳过已存在的分区"""
+        run_dir = Path(run_dir)
+        written = 0
+        for json_file in sorted(run_dir.glob("*/*_综合分析结果.json")):
+            regulation = json_file.parent.name
+            if not overwrite and self.partition_path(run_dir.name, regulation).exists():
+                continue
+            with json_file.open(encoding="utf-8") as f:
+                raw = json.load(f)
+            self.write(run_dir.name, raw)
+            written += 1
+        return written
+
+    def export_tree(self, root: Path, overwrite: bool = False) -> int:
+        return sum(
+            self.export_run(run_dir, overwrite)
+            for run_dir in sorted(p for p in Path(root).iterdir() if p.is_dir())
+        )
+
+
+def load(root: Path, format: str = "parquet", columns: Optional[List[str]] = None,
+         filter: Optional["ds.Expression"] = None) -> "pa.Table":
+    """以内存映射方式加载整个数据集；run、regulation 两个分区列以字典编码返回"""
+    _require_pyarrow()
+    if format == "parquet":
+        file_format = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(
+            dictionary_columns=list(DICTIONARY_COLUMNS)))
+    else:
+        file_format = ds.IpcFileFormat()
+    dataset = ds.dataset(
+        str(root),
+        format=file_format,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+        partitioning=ds.HivePartitioning.discover(infer_dictionary=True),
+    )
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="条款级分析数据集（Parquet / Arrow）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="把结果目录（如 Result/）导出到数据集")
+    p_export.add_argument("root", help="包含各运行目录的根目录，或单个运行目录")
+    p_export.add_argument("--output", default="clause_dataset", help="数据集目录（默认 clause_dataset）")
+    p_export.add_argument("--format", choices=FORMATS, default="parquet")
+    p_export.add_argument("--overwrite", action="store_true", help="重新导出已存在的分区")
+    p_load = sub.add_parser("load", help="加载数据集并打印行数和耗时")
+    p_load.add_argument("root")
+    p_load.add_argument("--format", choices=FORMATS, default="parquet")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        writer = ClauseDatasetWriter(Path(args.output), args.format)
+        root = Path(args.root)
+        if parse_run_dir(root.name)[0]:
+            written = writer.export_run(root, args.overwrite)
+        else:
+            written = writer.export_tree(root, args.overwrite)
+        print(f"已写入 {written} 个分区到 {args.output}")
+    else:
+        started = time.perf_counter()
+        table = load(Path(args.root), args.format)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{table.num_rows} 行，{table.num_columns} 列，"
+              f"{len(table.column('run').unique())} 个运行，用时 {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
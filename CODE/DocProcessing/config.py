@@ -3,7 +3,7 @@
 管理所有LLM API密钥、模型选择和全局参数
 """
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Optional
 from enum import Enum
 
@@ -42,13 +42,84 @@ class GlobalConfig:
     # 处理参数
     categories_per_call: int = 1  # 每次API调用处理的类别数
     max_content_length: int = 64000 # 最大内容长度
+    adaptive_batching: bool = False  # 按实测输出长度和模型输出上限自动决定每次调用的类别数（忽略 categories_per_call）
+    chunk_stats_path: Optional[str] = None  # 分块统计文件路径，默认为输出目录下的 chunk_stats.json
+    missing_id_retries: int = 1  # 响应缺少要求编号时，只针对缺失要求补充请求的轮数，0表示不补充
+    
+    # 异步并发调用：所有文档、提供商和框架块共用一个事件循环
+    use_async: bool = False
+    max_in_flight: int = 64  # 同时挂起的LLM请求上限
+    llm_timeout: float = 600.0  # 单个LLM请求超时（秒）
+    stream_early_abort: bool = False  # 流式输出中收齐全部要求编号后立即结束接收
+    
+    # 离线批处理：提示词编译为提供商的 Batch API 任务，提交后轮询，成本更低但耗时不确定
+    batch_mode: bool = False
+    batch_poll_interval: float = 60.0  # 轮询间隔（秒）
+    batch_timeout: float = 24 * 3600  # 等待批处理任务完成的最长时间（秒）
+    
+    # 对冲请求（仅异步模式）：请求耗时超过该模型近期分位耗时时补发一个请求，取先成功的结果
+    enable_hedging: bool = False
+    hedge_percentile: float = 0.9
+    hedge_min_samples: int = 10  # 耗时样本数达到该值后才开始对冲
+    hedge_budget: float = 0.1  # 对冲请求的估算tokens占主请求估算tokens的比例上限
+    # 对冲请求改用的模型 {提供商: 模型}，只能是同一提供商的其他模型，结果仍归入该提供商；未指定时使用同一模型
+    hedge_fallback_models: Dict[str, str] = field(default_factory=dict)
+    
+    # 路由：按历史成本、耗时和结论一致率只调用最优提供商，结论可疑时再升级到其余提供商
+    enable_routing: bool = False
+    routing_stats_path: Optional[str] = None  # 统计文件路径，默认为输出目录下的 provider_stats.json
+    routing_min_agreement: float = 0.8  # 质量门槛：与多数结论的一致率
+    routing_min_comparisons: int = 50  # 一致率至少基于这么多要求项的对比
+    
+    # 熔断：提供商连续失败达到阈值后，冷却期内直接拒绝调用，之后放行探测请求
+    circuit_failure_threshold: int = 5  # 0表示不启用
+    circuit_cooldown: float = 60.0  # 冷却时间（秒）
+    
+    # 关键词预筛选：命中次数低于阈值的大类直接判定为未覆盖，不调用LLM
+    enable_prefilter: bool = False
+    prefilter_min_hits: int = 1
+    
+    # 增量分析：法规修订后与上一版本逐条比对，只重新分析依据条文有变化的大类，其余沿用上次结论
+    incremental: bool = False
+    incremental_baseline: Optional[str] = None  # 显式指定上一版本的综合分析结果文件；默认从结果库中查找
+    
+    # 综合报告（overall_reporter）使用的 Anthropic 接口，为空时使用其内置配置
+    report_api_key: Optional[str] = None
+    report_base_url: Optional[str] = None  # 不含 /v1，SDK 自行拼接 /v1/messages
     
     # 文件处理
     supported_extensions: tuple = ('.pdf', '.docx', '.doc', '.txt', '.md')
+    pdf_backend: str = "auto"  # PDF提取后端: auto/pypdfium2/pdfminer/pypdf2
+    pdf_workers: int = 1  # PDF按页并行提取的进程数，1表示串行；开启 profile 时固定为1
+    clean_text: bool = True  # 发送前去除页眉页脚、页码和硬换行
     
     # 输出格式
     save_individual_results: bool = True  # 是否保存每个LLM的单独结果
     save_consolidated_results: bool = True  # 是否保存合并结果
+    save_source_articles: bool = True  # 在综合结果中保存按条切分的原文（“原文条款”），供全文检索和修订比对
+    
+    # 进度：终端定期刷新进度行和剩余时间，运行目录下的 progress.json 始终更新
+    show_progress: bool = True
+    progress_interval: float = 2.0  # 刷新间隔（秒）
+    
+    # 分阶段性能剖析：None 表示不剖析，"cprofile" 或 "pyinstrument"；结果写入运行目录下的 profile/
+    profile: Optional[str] = None
+    profile_memory: bool = True  # 剖析时同时用 tracemalloc 跟踪内存分配
+    
+    # Prometheus textfile 指标文件路径（如 node_exporter 的 textfile 目录下的 docprocessing.prom），随进度刷新更新
+    prometheus_textfile: Optional[str] = None
+    
+    # 追踪：运行目录下写出 trace.json（Chrome trace 格式），可选同时写出 OTLP/JSON 文件
+    trace_output: bool = True
+    otlp_output: bool = False
+    
+    # 跨运行的结果库（SQLite），每份文档保存结果时同步写入；路径默认为 <输出目录>/results.db
+    result_db: bool = True
+    result_db_path: Optional[str] = None
+    
+    # 条款级数据集目录（按运行和法规分区追加写入，需安装 pyarrow）；None 表示不写入
+    clause_dataset_path: Optional[str] = None
+    clause_dataset_format: str = "parquet"  # "parquet" 或 "arrow"
     
 
 def get_default_config() -> GlobalConfig:
@@ -83,6 +154,11 @@ def get_default_config() -> GlobalConfig:
     )
 
 
+def mock_llm_config(base_url: str) -> LLMConfig:
+    """本地模拟服务（mock_server.py）的提供商配置，OpenAI兼容接口，仅在离线测试和压测时使用"""
+    return LLMConfig(provider="mock", api_key="mock", model="mock-model", base_url=base_url)
+
+
 def load_config_from_env() -> GlobalConfig:
     """从环境变量加载配置"""
     config = get_default_config()
@@ -0,0 +1,35 @@
+import json
+import os
+import sys
+import types
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+sys.modules.setdefault('docx', types.SimpleNamespace(Document=None))
+
+import pytest
+
+from base_analyzer import BaseAnalyzer
+from config import GlobalConfig, ReviewMode
+
+
+class DummyAnalyzer(BaseAnalyzer):
+    """只实现抽象方法的分析器；提示词为框架块的类别列表（JSON）"""
+
+    def create_analysis_prompt(self, document_content: str, framework_chunk: dict) -> str:
+        return json.dumps(list(framework_chunk), ensure_ascii=False)
+
+    def get_system_message(self) -> str:
+        return ""
+
+    def build_uncovered_item(self, requirement: dict) -> dict:
+        return {}
+
+
+@pytest.fixture
+def make_analyzer():
+    """按给定配置创建 DummyAnalyzer，未指定时使用不含提供商的法规审查配置"""
+    def make(config=None):
+        if config is None:
+            config = GlobalConfig(review_mode=ReviewMode.REGULATION, llm_configs={}, input_path="", output_path="")
+        return DummyAnalyzer(config)
+    return make
@@ -11,6 +11,8 @@ from base_analyzer import BaseAnalyzer
 class DocumentationAnalyzer(BaseAnalyzer):
     """文档审查分析器 - 检查文档是否满足要求"""
     
+    response_schema = "documentation"
+    
     def get_system_message(self) -> str:
         """获取系统消息"""
         return (
@@ -19,6 +21,19 @@ class DocumentationAnalyzer(BaseAnalyzer):
             "所有回复必须使用中文，并返回有效的JSON格式。"
         )
     
+    def build_uncovered_item(self, requirement: Dict[str, Any]) -> Dict[str, Any]:
+        """预筛选未发现相关内容的要求，直接判定为未满足"""
+        return {
+            "要求编号": requirement["number"],
+            "要求名称": requirement["name"],
+            "满足程度": "未满足",
+            "满足程度评分": "1分",  # 评分范围为1-10分，取最低分
+            "文档对应内容": [],
+            "存在问题": ["关键词预筛选未在文档中发现相关内容"],
+            "改进建议": [],
+            "判定来源": "关键词预筛选",
+        }
+    
     def create_analysis_prompt(self, document_content: str, framework_chunk: Dict[str, Any]) -> str:
         """创建文档审查的提示词"""
         return f"""你是一名合规审查专家，请评估以下企业文档是否满足监管框架要求。
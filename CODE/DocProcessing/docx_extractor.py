@@ -0,0 +1,91 @@
+"""
+Word文档流式提取模块
+直接从 docx 压缩包中增量解析 word/document.xml，按文档顺序输出段落和表格行
+不构建完整的python-docx对象树，内存占用与文档大小无关
+"""
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator, List
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P, _T, _TAB, _BR, _CR = (f"{W_NS}p", f"{W_NS}t", f"{W_NS}tab", f"{W_NS}br", f"{W_NS}cr")
+_TBL, _TR, _TC, _BODY = (f"{W_NS}tbl", f"{W_NS}tr", f"{W_NS}tc", f"{W_NS}body")
+# 文本框等内容在 mc:AlternateContent 中有 Choice 和 Fallback（VML）两份，只读取 Choice
+_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+# 表格单元格之间的分隔符
+CELL_SEPARATOR = " | "
+
+
+def is_docx(file_path: Path) -> bool:
+    """判断是否为OOXML格式（.doc旧格式不是zip包）"""
+    return zipfile.is_zipfile(file_path)
+
+
+def iter_docx_blocks(file_path: Path) -> Iterator[str]:
+    """
+    按文档顺序逐块输出文本：
+    · 正文段落 → 一行
+    · 表格的每一行 → 各单元格文本以 " | " 连接的一行（嵌套表格并入所在单元格）
+    · 文本框中的段落 → 在其所在段落之前单独成行，所在段落保持完整
+    """
+    with zipfile.ZipFile(file_path) as zf, zf.open("word/document.xml") as fh:
+        body = None
+        # 段落栈：文本框（w:txbxContent）中的段落嵌套在外层段落内，先于外层段落结束
+        paras: List[List[str]] = []
+        # 每层表格一个栈帧：[当前行的单元格列表, 当前单元格的段落列表]
+        tables: List[List[List[str]]] = []
+        fallback = 0
+
+        for event, elem in ET.iterparse(fh, events=("start", "end")):
+            tag = elem.tag
+            if tag == _FALLBACK:
+                fallback += 1 if event == "start" else -1
+                continue
+            if fallback:
+                continue
+
+            if event == "start":
+                if tag == _BODY:
+                    body = elem
+                elif tag == _P:
+                    paras.append([])
+                elif tag == _TBL:
+                    tables.append([[], []])
+                elif tag == _TR and tables:
+                    tables[-1][0] = []
+                elif tag == _TC and tables:
+                    tables[-1][1] = []
+                continue
+
+            if tag == _T and paras:
+                paras[-1].append(elem.text or "")
+            elif tag == _TAB and paras:
+                paras[-1].append("\t")
+            elif tag in (_BR, _CR) and paras:
+                paras[-1].append("\n")
+            elif tag == _P and paras:
+                text = "".join(paras.pop()).strip()
+                if tables:
+                    if text:
+                        tables[-1][1].append(text)
+                elif text:
+                    yield text
+            elif tag == _TC and tables:
+                tables[-1][0].append(" ".join(tables[-1][1]))
+            elif tag == _TR and tables:
+                cells = tables[-1][0]
+                row = CELL_SEPARATOR.join(cells)
+                if len(tables) == 1:
+                    if row.strip(" |"):
+                        yield row
+                else:
+                    # 嵌套表格的行并入外层单元格
+                    tables[-2][1].append(row)
+            elif tag == _TBL and tables:
+                tables.pop()
+
+            # 顶层块处理完毕后释放已解析的元素，保持内存有界
+            if body is not None and tag in (_P, _TBL) and not tables and not paras:
+                body.clear()
@@ -0,0 +1,60 @@
+"""
+中文全文检索的分词与查询
+SQLite FTS5 自带的 unicode61 分词器把连续汉字当作一个词，无法检索词中的片段；trigram 分词器又检索不了两字词（如“外汇”）。
+这里在入库前把文本切成汉字二元组（“负面清单” → “负面 面清 清单”），字母数字按整词保留，
+再交给 unicode61 建索引；查询词按同样方式切分后作为短语匹配，即可命中任意位置、任意长度（≥2字）的中文片段。
+单个汉字按前缀匹配，会漏掉恰好位于一段汉字末尾的出现。
+"""
+import re
+from typing import List
+
+_CJK = r"一-鿿㐀-䶿"
+_RUN_RE = re.compile(rf"[{_CJK}]+|[A-Za-z0-9]+")
+SNIPPET_CHARS = 40
+
+
+def bigrams(text: str) -> List[str]:
+    tokens: List[str] = []
+    for run in _RUN_RE.findall(text or ""):
+        if not re.match(rf"[{_CJK}]", run):
+            tokens.append(run.lower())
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def index_text(text: str) -> str:
+    """写入 FTS5 的分词结果（以空格分隔）"""
+    return " ".join(bigrams(text))
+
+
+def match_query(query: str) -> str:
+    """把用户输入（空格分隔的多个词，需全部命中）转换为 FTS5 MATCH 表达式；没有可检索内容时返回空串"""
+    terms = []
+    for word in query.split():
+        tokens = bigrams(word)
+        if len(tokens) == 1 and len(tokens[0]) == 1:
+            terms.append(f"{tokens[0]}*")
+        elif tokens:
+            terms.append('"' + " ".join(tokens) + '"')
+    return " AND ".join(terms)
+
+
+def snippet(text: str, query: str, width: int = SNIPPET_CHARS) -> str:
+    """截取第一个命中词附近的文本，命中处以【】标出"""
+    text = re.sub(r"\s+", " ", text or "")
+    words = [w for w in query.split() if w]
+    hits = [(text.lower().find(w.lower()), w) for w in words]
+    hits = [(pos, w) for pos, w in hits if pos >= 0]
+    if not hits:
+        return text[:width * 2] + ("…" if len(text) > width * 2 else "")
+    pos, word = min(hits)
+    start = max(pos - width, 0)
+    end = min(pos + len(word) + width, len(text))
+    return (
+        ("…" if start > 0 else "")
+        + text[start:pos] + "【" + text[pos:pos + len(word)] + "】" + text[pos + len(word):end]
+        + ("…" if end < len(text) else "")
+    )
@@ -0,0 +1,286 @@
+"""
+修订法规的增量分析
+法规修订后通常只改动少数条文，不必把所有框架块重新发送给LLM：
+1. 找到该法规上一次分析的综合结果（结果库中同名或仅版本后缀不同的文档，如“境外投资管理办法 2.pdf”，或显式指定的结果文件）；
+2. 把新旧原文按条切分后逐条比对（内容相同但编号变化的条文视为重编号，不算修改）；
+3. 以各提供商结果中引用的条款编号确定每个框架大类的依据条文——依据条文被修改或删除的大类重新分析，
+   新增或修改的条文中出现某大类关键词的，该大类也重新分析；无法确定依据条文的大类在有任何改动时保守地重新分析；
+4. 其余大类直接沿用上次的结论（重编号的条款同步更新编号），并在结果的“增量分析”中记录基线文件、条文变化和沿用的大类。
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from articles import Article, article_key, from_records, split_articles
+from prefilter import KeywordPrefilter
+from result_store import ResultStore, normalize_category
+
+# 版本后缀（只去掉末尾一个）：副本序号“ 2”“-1”“(2)”，标准发布年份“GB 30871-2022”，
+# 修订标记“（修订）”“修订版”“（2017年修订）”；较长的数字串是标准号或文号的一部分，不视为版本
+_VERSION_SUFFIX_RE = re.compile(
+    r"([\s_\-]+\d{1,2}"
+    r"|\s*[（(]\d{1,2}[）)]"
+    r"|(?<=\d)[\-—](19|20)\d{2}"
+    r"|[\s_\-]*[（(]?((19|20)\d{2}年?)?(修订|修正)版?[）)]?)$"
+)
+# 结果中沿用时需要保留的文档级字段
+METADATA_KEYS = ("文档标题", "颁布机构", "生效日期", "关键发现", "合规建议")
+# 用原文内容定位条文时比较的长度
+_LOCATE_CHARS = 30
+
+
+def base_name(file_name: str) -> str:
+    """去掉扩展名和末尾一个版本后缀，用于匹配同一法规的不同版本"""
+    name = Path(file_name).stem.strip()
+    stripped = _VERSION_SUFFIX_RE.sub("", name, count=1).strip()
+    return stripped or name
+
+
+def _compact(text: str) -> str:
+    return re.sub(r"\s+", "", text or "")
+
+
+@dataclass
+class ArticleDiff:
+    """新旧版本的条文比对结果（键为 articles.Article.key）"""
+    unchanged: Dict[str, str] = field(default_factory=dict)  # 新条文键 → 旧条文键（含重编号）
+    modified: List[str] = field(default_factory=list)  # 编号相同、内容变化
+    added: List[str] = field(default_factory=list)  # 新条文键
+    removed: List[str] = field(default_factory=list)  # 旧条文键
+
+    @property
+    def renumbered(self) -> Dict[str, str]:
+        """旧条文键 → 新条文键"""
+        return {old: new for new, old in self.unchanged.items() if old != new}
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.modified or self.added or self.removed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "未变化条数": len(self.unchanged),
+            "修改": self.modified,
+            "新增": self.added,
+            "删除": self.removed,
+            "重编号": self.renumbered,
+        }
+
+
+def diff_articles(old: List[Article], new: List[Article]) -> ArticleDiff:
+    """先按内容匹配（识别重编号），剩余条文再按编号匹配为修改，其余为新增或删除"""
+    diff = ArticleDiff()
+    old_by_digest: Dict[str, List[Article]] = {}
+    for article in old:
+        old_by_digest.setdefault(article.digest, []).append(article)
+
+    matched_old: Set[str] = set()
+    unmatched_new: List[Article] = []
+    for article in new:
+        candidates = [a for a in old_by_digest.get(article.digest, []) if a.key not in matched_old]
+        # 内容相同的多条旧条文中优先取编号相同的
+        same_key = [a for a in candidates if a.key == article.key]
+        match = (same_key or candidates or [None])[0]
+        if match is None:
+            unmatched_new.append(article)
+        else:
+            diff.unchanged[article.key] = match.key
+            matched_old.add(match.key)
+
+    old_keys = {a.key for a in old if a.key not in matched_old}
+    for article in unmatched_new:
+        if article.key in old_keys:
+            diff.modified.append(article.key)
+            old_keys.discard(article.key)
+        else:
+            diff.added.append(article.key)
+    diff.removed = [a.key for a in old if a.key in old_keys]
+    return diff
+
+
+def category_key(name: str) -> str:
+    """大类的比较键：去掉序号和空白（“五、运营与 HSE”与“运营与HSE”视为同一大类）"""
+    return _compact(normalize_category(name))
+
+
+def supporting_articles(provider_result: Dict[str, Any], old_articles: List[Article]) -> Dict[str, Optional[Set[str]]]:
+    """
+    各大类（category_key）在该提供商结果中引用的旧条文键；
+    有条款但无法定位到条文时为 None，表示依据未知
+    """
+    support: Dict[str, Optional[Set[str]]] = {}
+    keys = {a.key for a in old_articles}
+    for category, items in (provider_result.get("详细分析") or {}).items():
+        found: Optional[Set[str]] = set()
+        clauses = [
+            clause
+            for item in (items if isinstance(items, list) else []) if isinstance(item, dict)
+            for clause in item.get("法规要求内容") or [] if isinstance(clause, dict)
+        ]
+        for clause in clauses:
+            key = article_key(str(clause.get("条款编号") or ""))
+            if key not in keys:
+                key = _locate(clause.get("原文内容"), old_articles)
+            if key is None:
+                found = None
+                break
+            found.add(key)
+        support[category_key(category)] = found
+    return support
+
+
+def _locate(original_text: Optional[str], articles: List[Article]) -> Optional[str]:
+    """用原文内容的开头在旧条文中查找所属条文"""
+    probe = _compact(original_text)[:_LOCATE_CHARS]
+    if not probe:
+        return None
+    for article in articles:
+        if probe in _compact(article.text):
+            return article.key
+    return None
+
+
+@dataclass
+class IncrementalPlan:
+    """一份文档的增量分析方案"""
+    baseline: Dict[str, Any]  # 上一版本的综合分析结果
+    baseline_path: Path
+    diff: ArticleDiff
+    reanalyze: Set[str]  # 需要重新分析的大类（category_key）
+    new_articles: Dict[str, Article] = field(default_factory=dict)
+
+    def carry_forward(self, provider: str) -> Dict[str, List[Dict[str, Any]]]:
+        """该提供商可沿用的大类结果 {大类: 要求列表}；基线中该提供商失败或缺失时为空"""
+        pdata = self.baseline.get("LLM分析结果", {}).get(provider)
+        if not isinstance(pdata, dict) or "错误" in pdata or f"错误_{provider}" in pdata:
+            return {}
+        carried = {}
+        for category, items in (pdata.get("详细分析") or {}).items():
+            if category_key(category) in self.reanalyze or not isinstance(items, list):
+                continue
+            carried[category] = [self._renumber(item) for item in items]
+        return carried
+
+    def _renumber(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """复制要求；引用的条文在新版本中重编号时同步更新条款编号"""
+        item = json.loads(json.dumps(item, ensure_ascii=False))
+        renumbered = self.diff.renumbered
+        for clause in item.get("法规要求内容") or []:
+            reference = str(clause.get("条款编号") or "")
+            key = article_key(reference)
+            if key in renumbered and re.fullmatch(r"第\s*\S+?\s*条", reference.strip()):
+                clause["原条款编号"] = reference
+                clause["条款编号"] = self.new_articles[renumbered[key]].number
+        return item
+
+    def metadata(self, provider: str) -> Dict[str, Any]:
+        pdata = self.baseline.get("LLM分析结果", {}).get(provider) or {}
+        return {key: pdata[key] for key in METADATA_KEYS if key in pdata}
+
+    def provenance(self, provider: str, carried: List[str]) -> Dict[str, Any]:
+        pdata = self.baseline.get("LLM分析结果", {}).get(provider) or {}
+        return {
+            "基线文档": self.baseline.get("文档名称"),
+            "基线结果文件": str(self.baseline_path),
+            "基线分析日期": pdata.get("分析日期") or self.baseline.get("分析时间"),
+            "基线模型": pdata.get("LLM模型"),
+            "沿用大类": carried,
+            "重新分析大类": sorted(self.reanalyze),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "基线文档": self.baseline.get("文档名称"),
+            "基线结果文件": str(self.baseline_path),
+            "条文变化": self.diff.to_dict(),
+            "重新分析大类": sorted(self.reanalyze),
+        }
+
+
+class IncrementalPlanner:
+    """为修订后的法规确定基线和需要重新分析的大类"""
+
+    def __init__(
+        self,
+        framework: Dict[str, List[Dict[str, Any]]],
+        baseline_path: Optional[Path] = None,
+        store: Optional[ResultStore] = None,
+    ):
+        self.keywords = KeywordPrefilter(framework, min_hits=1)
+        self.baseline_path = Path(baseline_path) if baseline_path else None
+        self.store = store  # 由 BatchProcessor 设置，用于查找上一版本的结果
+        self._baseline_name: Optional[str] = None
+
+    def baseline_name(self) -> str:
+        """显式基线对应的法规名称（忽略版本后缀）：取结果中的文档名称，缺失时按结果文件名推断"""
+        if self._baseline_name is None:
+            try:
+                with open(self.baseline_path, encoding="utf-8") as f:
+                    name = json.load(f).get("文档名称")
+            except (OSError, ValueError, AttributeError):
+                name = None
+            name = name or self.baseline_path.stem.replace("_综合分析结果", "")
+            self._baseline_name = base_name(name)
+        return self._baseline_name
+
+    def find_baseline(self, file_path: str) -> Optional[Path]:
+        """显式指定且属于同一法规的基线；否则为结果库中同一法规（忽略版本后缀）最近一次带有原文条款的综合结果"""
+        wanted = base_name(Path(file_path).name)
+        if self.baseline_path is not None:
+            if self.baseline_name() == wanted:
+                return self.baseline_path
+            print(f"  增量分析: 指定的基线 {self.baseline_path.name} 不是 {Path(file_path).name} 的上一版本，不使用")
+        if self.store is None:
+            return None
+        for doc in self.store.documents():
+            if base_name(doc["name"]) != wanted:
+                continue
+            stem = Path(doc["name"]).stem
+            path = Path(doc["run_dir"]) / stem / f"{stem}_综合分析结果.json"
+            if path.exists() and doc["has_articles"]:
+                return path
+        return None
+
+    def plan(self, file_path: str, content: str) -> Optional[IncrementalPlan]:
+        """没有可用基线（或基线缺少原文条款）时返回 None，按常规全量分析"""
+        baseline_path = self.find_baseline(file_path)
+        if baseline_path is None:
+            return None
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        old_articles = from_records(baseline.get("原文条款"))
+        if not old_articles:
+            print(f"  增量分析: 基线 {baseline_path.name} 缺少原文条款，改为全量分析")
+            return None
+
+        new_articles = split_articles(content)
+        diff = diff_articles(old_articles, new_articles)
+        changed_old = set(diff.modified) | set(diff.removed)
+
+        reanalyze: Set[str] = set()
+        for provider, pdata in baseline.get("LLM分析结果", {}).items():
+            if not isinstance(pdata, dict):
+                continue
+            for category, support in supporting_articles(pdata, old_articles).items():
+                if support is None:
+                    if diff.changed:
+                        reanalyze.add(category)
+                elif support & changed_old:
+                    reanalyze.add(category)
+
+        changed_text = "\n".join(
+            a.text for a in new_articles if a.key in set(diff.modified) | set(diff.added)
+        )
+        if changed_text:
+            screening = self.keywords.screen(changed_text)
+            reanalyze |= {category_key(cat) for cat in screening.hits if screening.total_hits(cat) > 0}
+
+        return IncrementalPlan(
+            baseline=baseline,
+            baseline_path=baseline_path,
+            diff=diff,
+            reanalyze=reanalyze,
+            new_articles={a.key: a for a in new_articles},
+        )
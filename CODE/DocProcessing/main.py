@@ -20,7 +20,7 @@ def load_env_file():
                 key, value = line.split('=', 1)
                 os.environ.setdefault(key, value)
 
-from config import GlobalConfig, ReviewMode, load_config_from_env
+from config import GlobalConfig, ReviewMode, load_config_from_env, mock_llm_config
 from batch_processor import BatchProcessor
 
 
@@ -42,6 +42,9 @@ def parse_arguments():
   
   # 指定模型
   python main.py --deepseek-model deepseek-chat --openai-model gpt-4 --anthropic-model claude-3-opus-20240229
+  
+  # 使用本地模拟服务离线压测（先运行 python mock_server.py）
+  python main.py --mock --async --input ./regulations
         """
     )
     
@@ -103,6 +106,14 @@ def parse_arguments():
         help='Anthropic模型名称'
     )
     
+    parser.add_argument(
+        '--mock',
+        nargs='?',
+        const='http://127.0.0.1:8765/v1',
+        metavar='BASE_URL',
+        help='只使用本地模拟服务（mock_server.py），不调用真实提供商；可指定服务地址'
+    )
+    
     # 其他参数
     parser.add_argument(
         '--categories-per-call',
@@ -110,6 +121,215 @@ def parse_arguments():
         help='每次API调用处理的类别数'
     )
     
+    parser.add_argument(
+        '--adaptive-batching',
+        action='store_true',
+        help='按各提供商实测输出长度和模型输出上限自动打包类别（忽略 --categories-per-call）'
+    )
+    
+    parser.add_argument(
+        '--missing-id-retries',
+        type=int,
+        help='响应缺少部分要求编号时，只针对缺失要求补充请求的轮数（0表示不补充）'
+    )
+    
+    parser.add_argument(
+        '--async',
+        dest='use_async',
+        action='store_true',
+        help='使用异步流式调用，所有文档和提供商并发执行'
+    )
+    
+    parser.add_argument(
+        '--max-in-flight',
+        type=int,
+        help='异步模式下同时挂起的LLM请求上限'
+    )
+    
+    parser.add_argument(
+        '--llm-timeout',
+        type=float,
+        help='单个LLM请求的超时时间（秒）'
+    )
+    
+    parser.add_argument(
+        '--stream-early-abort',
+        action='store_true',
+        help='异步模式下收齐全部要求编号后立即结束接收，不等待其余字段'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        dest='batch_mode',
+        action='store_true',
+        help='离线批处理模式：提交到提供商的Batch API并轮询结果（deepseek等不支持的提供商仍逐块调用）'
+    )
+    
+    parser.add_argument(
+        '--batch-poll-interval',
+        type=float,
+        help='批处理模式的轮询间隔（秒）'
+    )
+    
+    parser.add_argument(
+        '--hedge',
+        action='store_true',
+        help='启用对冲请求（需要 --async）：耗时超过该模型近期p90时补发请求，取先成功的结果'
+    )
+    
+    parser.add_argument(
+        '--hedge-budget',
+        type=float,
+        help='对冲请求的估算tokens占主请求估算tokens的比例上限（默认0.1）'
+    )
+    
+    parser.add_argument(
+        '--hedge-fallback',
+        type=str,
+        action='append',
+        metavar='PROVIDER=MODEL',
+        help='对冲请求改用同一提供商的其他模型，如 openai=gpt-4o（可重复指定，默认使用同一模型）'
+    )
+    
+    parser.add_argument(
+        '--routing',
+        action='store_true',
+        help='按历史成本/耗时/一致率只调用最优提供商，结论可疑时再升级到其余提供商'
+    )
+    
+    parser.add_argument(
+        '--routing-stats',
+        type=str,
+        help='路由统计文件路径（默认为输出目录下的 provider_stats.json）'
+    )
+    
+    parser.add_argument(
+        '--circuit-threshold',
+        type=int,
+        help='提供商连续失败多少次后熔断（0表示不启用，默认5）'
+    )
+    
+    parser.add_argument(
+        '--circuit-cooldown',
+        type=float,
+        help='熔断后的冷却时间（秒），冷却结束后放行探测请求'
+    )
+    
+    parser.add_argument(
+        '--pdf-backend',
+        type=str,
+        choices=['auto', 'pypdfium2', 'pdfminer', 'pypdf2'],
+        help='PDF文本提取后端'
+    )
+    
+    parser.add_argument(
+        '--pdf-workers',
+        type=int,
+        help='PDF按页并行提取的进程数'
+    )
+    
+    parser.add_argument(
+        '--no-text-cleaning',
+        action='store_true',
+        help='不清洗页眉页脚、页码和硬换行，按原样发送提取文本'
+    )
+    
+    parser.add_argument(
+        '--prefilter',
+        action='store_true',
+        help='启用关键词预筛选，跳过明显不相关的框架大类'
+    )
+    
+    parser.add_argument(
+        '--prefilter-min-hits',
+        type=int,
+        help='预筛选判定为相关所需的最少关键词命中次数'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='增量分析：与结果库中该法规的上一版本逐条比对，只重新分析依据条文有变化的大类'
+    )
+    
+    parser.add_argument(
+        '--baseline',
+        type=str,
+        metavar='JSON',
+        help='增量分析使用的上一版本综合分析结果文件，只用于同一法规（忽略版本后缀）的文件；其余文件仍从结果库中查找'
+    )
+    
+    parser.add_argument(
+        '--no-progress',
+        action='store_true',
+        help='不在终端显示进度行（progress.json 仍会更新）'
+    )
+    
+    parser.add_argument(
+        '--progress-interval',
+        type=float,
+        help='进度刷新间隔（秒，默认2）'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='cprofile',
+        choices=['cprofile', 'pyinstrument'],
+        help='分阶段性能剖析（默认 cprofile），结果写入运行目录下的 profile/'
+    )
+    
+    parser.add_argument(
+        '--no-profile-memory',
+        action='store_true',
+        help='剖析时不用 tracemalloc 跟踪内存分配（减少开销）'
+    )
+    
+    parser.add_argument(
+        '--prometheus-textfile',
+        type=str,
+        metavar='PATH',
+        help='运行期间定期写出 Prometheus textfile 格式指标（供 node_exporter textfile collector 采集）'
+    )
+    
+    parser.add_argument(
+        '--no-trace',
+        action='store_true',
+        help='不写出 trace.json 追踪文件'
+    )
+    
+    parser.add_argument(
+        '--otlp',
+        action='store_true',
+        help='同时写出 OTLP/JSON 格式的追踪文件 trace.otlp.json'
+    )
+    
+    parser.add_argument(
+        '--result-db',
+        type=str,
+        metavar='PATH',
+        help='跨运行结果库路径（默认 <输出目录>/results.db）'
+    )
+    
+    parser.add_argument(
+        '--no-result-db',
+        action='store_true',
+        help='不写入跨运行结果库'
+    )
+    
+    parser.add_argument(
+        '--clause-dataset',
+        type=str,
+        metavar='DIR',
+        help='把条款级结果追加写入按运行和法规分区的数据集目录（需安装 pyarrow）'
+    )
+    
+    parser.add_argument(
+        '--clause-dataset-format',
+        choices=['parquet', 'arrow'],
+        help='条款级数据集格式（默认 parquet）'
+    )
+    
     parser.add_argument(
         '--no-individual-results', 
         action='store_true',
@@ -122,7 +342,20 @@ def parse_arguments():
         help='不保存合并结果'
     )
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    # 批处理模式不走异步流式调用，--async 和 --hedge 不会生效
+    if args.batch_mode and (args.use_async or args.hedge):
+        parser.error('--batch 不能与 --async 或 --hedge 同时使用')
+    # 对冲请求只在异步模式下生效
+    if args.hedge and not args.use_async:
+        parser.error('--hedge 需要同时指定 --async')
+    return args
+
+
+def mock_anthropic_base_url(base_url: str) -> str:
+    """模拟服务的 OpenAI 兼容地址（以 /v1 结尾）转为 Anthropic SDK 使用的根地址"""
+    base_url = base_url.rstrip('/')
+    return base_url[:-len('/v1')] if base_url.endswith('/v1') else base_url
 
 
 def create_config_from_args(args) -> GlobalConfig:
@@ -139,6 +372,75 @@ def create_config_from_args(args) -> GlobalConfig:
         config.output_path = args.output
     if args.categories_per_call is not None:
         config.categories_per_call = args.categories_per_call
+    if args.adaptive_batching:
+        config.adaptive_batching = True
+    if args.missing_id_retries is not None:
+        config.missing_id_retries = args.missing_id_retries
+    if args.use_async:
+        config.use_async = True
+    if args.max_in_flight is not None:
+        config.max_in_flight = args.max_in_flight
+    if args.llm_timeout is not None:
+        config.llm_timeout = args.llm_timeout
+    if args.stream_early_abort:
+        config.stream_early_abort = True
+    if args.batch_mode:
+        config.batch_mode = True
+    if args.batch_poll_interval is not None:
+        config.batch_poll_interval = args.batch_poll_interval
+    if args.hedge:
+        config.enable_hedging = True
+    if args.hedge_budget is not None:
+        config.hedge_budget = args.hedge_budget
+    for item in args.hedge_fallback or []:
+        provider, sep, model = item.partition('=')
+        if not sep or provider not in config.llm_configs or not model:
+            raise ValueError(f"--hedge-fallback 格式应为 PROVIDER=MODEL（提供商: {', '.join(config.llm_configs)}）: {item}")
+        config.hedge_fallback_models[provider] = model
+    if args.routing:
+        config.enable_routing = True
+    if args.routing_stats:
+        config.routing_stats_path = args.routing_stats
+    if args.circuit_threshold is not None:
+        config.circuit_failure_threshold = args.circuit_threshold
+    if args.circuit_cooldown is not None:
+        config.circuit_cooldown = args.circuit_cooldown
+    if args.pdf_backend:
+        config.pdf_backend = args.pdf_backend
+    if args.pdf_workers is not None:
+        config.pdf_workers = args.pdf_workers
+    if args.no_text_cleaning:
+        config.clean_text = False
+    if args.prefilter:
+        config.enable_prefilter = True
+    if args.prefilter_min_hits is not None:
+        config.prefilter_min_hits = args.prefilter_min_hits
+    if args.incremental or args.baseline:
+        config.incremental = True
+    if args.baseline:
+        config.incremental_baseline = args.baseline
+    if args.no_progress:
+        config.show_progress = False
+    if args.progress_interval is not None:
+        config.progress_interval = args.progress_interval
+    if args.profile:
+        config.profile = args.profile
+    if args.no_profile_memory:
+        config.profile_memory = False
+    if args.prometheus_textfile:
+        config.prometheus_textfile = args.prometheus_textfile
+    if args.no_trace:
+        config.trace_output = False
+    if args.otlp:
+        config.otlp_output = True
+    if args.result_db:
+        config.result_db_path = args.result_db
+    if args.no_result_db:
+        config.result_db = False
+    if args.clause_dataset:
+        config.clause_dataset_path = args.clause_dataset
+    if args.clause_dataset_format:
+        config.clause_dataset_format = args.clause_dataset_format
     config.save_individual_results = not args.no_individual_results
     config.save_consolidated_results = not args.no_consolidated_results
     
@@ -158,6 +460,12 @@ def create_config_from_args(args) -> GlobalConfig:
     if args.anthropic_model:
         config.llm_configs['anthropic'].model = args.anthropic_model
     
+    # 模拟模式下只使用模拟提供商，综合报告也发往模拟服务，避免消耗真实额度
+    if args.mock:
+        config.llm_configs = {'mock': mock_llm_config(args.mock)}
+        config.report_api_key = "mock"
+        config.report_base_url = mock_anthropic_base_url(args.mock)
+    
     return config
 
 
@@ -191,7 +499,22 @@ def print_config(config: GlobalConfig):
     print(f"审查模式: {'法规审查' if config.review_mode == ReviewMode.REGULATION else '文档审查'}")
     print(f"输入路径: {config.input_path}")
     print(f"输出路径: {config.output_path}")
-    print(f"每次处理类别数: {config.categories_per_call}")
+    if config.adaptive_batching:
+        print("每次处理类别数: 自适应")
+    else:
+        print(f"每次处理类别数: {config.categories_per_call}")
+    if config.batch_mode:
+        print(f"离线批处理: 启用 (轮询间隔 {config.batch_poll_interval:.0f}s)")
+    if config.use_async:
+        print(f"异步并发: 启用 (最多 {config.max_in_flight} 个请求, 超时 {config.llm_timeout}s)")
+    if config.use_async and config.enable_hedging:
+        print(f"对冲请求: 启用 (p{int(config.hedge_percentile * 100)} 触发, 预算 {config.hedge_budget:.0%} tokens)")
+    if config.enable_routing:
+        print(f"提供商路由: 启用 (一致率门槛 {config.routing_min_agreement:.0%})")
+    if config.enable_prefilter:
+        print(f"关键词预筛选: 启用 (阈值 {config.prefilter_min_hits})")
+    if config.incremental:
+        print(f"增量分析: 启用 (基线 {config.incremental_baseline or '结果库中的上一版本'})")
     print("\nLLM配置:")
     
     for provider, llm_config in config.llm_configs.items():
@@ -0,0 +1,157 @@
+"""
+运行指标
+按处理阶段记录耗时（同时归属到当前文档），汇总LLM调用指标，供汇总报告和基准测试使用。
+并发运行时各阶段的耗时会互相重叠，累计耗时可能大于整体墙钟时间。
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from tracing import span
+
+# 处理流程中的阶段名称
+STAGE_EXTRACTION = "文档提取"
+STAGE_PROMPT = "提示词构建"
+STAGE_LLM = "LLM等待"
+STAGE_PARSE = "响应解析"
+STAGE_JSON = "JSON写入"
+STAGE_HEATMAP = "热力图"
+STAGE_EXCEL = "Excel导出"
+STAGE_REPORT_LLM = "综合报告LLM"
+STAGE_WORD = "Word导出"
+STAGE_TEXT_REPORT = "文本报告"
+
+
+# 当前正在处理的文档；asyncio 任务和 to_thread 会继承创建时的值
+_current_document: ContextVar[Optional[str]] = ContextVar("current_document", default=None)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """最近秩法分位数，values 为空时返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class StageRecorder:
+    """线程安全的阶段耗时记录器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        # {文档: {阶段: 累计秒}}
+        self.document_stages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.document_seconds: Dict[str, float] = defaultdict(float)
+        self.document_bytes: Dict[str, int] = defaultdict(int)
+        # 可选的分阶段剖析器（profiling.StageProfiler），--profile 时由 BatchProcessor 设置
+        self.profiler = None
+
+    def record(self, name: str, seconds: float):
+        document = _current_document.get()
+        with self._lock:
+            self.durations[name].append(seconds)
+            if document is not None:
+                self.document_stages[document][name] += seconds
+
+    @contextmanager
+    def stage(self, name: str, **attributes: Any) -> Iterator[None]:
+        """记录一段代码的墙钟耗时（异常时同样记录），启用追踪时同时记录为 span"""
+        started = time.perf_counter()
+        profile = self.profiler.stage(name) if self.profiler else nullcontext()
+        try:
+            with span(name, "stage", **attributes), profile:
+                yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    @contextmanager
+    def document(self, name: str) -> Iterator[None]:
+        """其中记录的阶段耗时和写入字节数归属到该文档，并累计该文档的墙钟耗时"""
+        token = _current_document.set(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            _current_document.reset(token)
+            with self._lock:
+                self.document_seconds[name] += time.perf_counter() - started
+
+    def add_bytes(self, count: int):
+        """记录当前文档写入的字节数"""
+        document = _current_document.get()
+        if document is None:
+            return
+        with self._lock:
+            self.document_bytes[document] += count
+
+    def reset(self):
+        with self._lock:
+            self.durations.clear()
+            self.document_stages.clear()
+            self.document_seconds.clear()
+            self.document_bytes.clear()
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {name: list(values) for name, values in self.durations.items()}
+        return {name: distribution(values, total=True) for name, values in snapshot.items()}
+
+    def document_summary(self) -> Dict[str, Dict[str, Any]]:
+        """各文档的墙钟耗时、分阶段累计耗时和写入字节数"""
+        with self._lock:
+            return {
+                name: {
+                    "墙钟耗时秒": round(seconds, 3),
+                    "阶段耗时秒": {s: round(v, 3) for s, v in self.document_stages.get(name, {}).items()},
+                    "写入字节数": self.document_bytes.get(name, 0),
+                }
+                for name, seconds in self.document_seconds.items()
+            }
+
+
+def distribution(values: Sequence[float], total: bool = False) -> Dict[str, Any]:
+    """次数与 p50/p95/最大值；total 为 True 时附带累计值"""
+    summary: Dict[str, Any] = {"次数": len(values)}
+    if total:
+        summary["累计耗时秒"] = round(sum(values), 3)
+    summary.update({
+        "p50秒": round(percentile(values, 0.5), 3),
+        "p95秒": round(percentile(values, 0.95), 3),
+        "最大秒": round(max(values), 3) if values else 0.0,
+    })
+    return summary
+
+
+def summarize_calls(calls: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """按提供商汇总LLM调用指标（CallMetrics.to_dict() 的列表）"""
+    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for call in calls:
+        grouped[call["provider"]].append(call)
+
+    def values(items, key):
+        return [item[key] for item in items if item.get(key) is not None]
+
+    summary = {}
+    for provider, items in grouped.items():
+        summary[provider] = {
+            "调用次数": len(items),
+            "SDK重试次数": sum(item.get("retries") or 0 for item in items),
+            "输入tokens": sum(item.get("input_tokens") or 0 for item in items),
+            "输出tokens": sum(item.get("output_tokens") or 0 for item in items),
+            "缓存tokens": sum(item.get("cached_tokens") or 0 for item in items),
+            "调用耗时": distribution(values(items, "duration_s")),
+            "排队等待": distribution(values(items, "queue_wait_s")),
+            "首token时延": distribution(values(items, "ttft_s")),
+        }
+    return summary
+
+
+# 进程内共享的记录器
+RECORDER = StageRecorder()
+stage = RECORDER.stage
+document_scope = RECORDER.document
+record_bytes = RECORDER.add_bytes
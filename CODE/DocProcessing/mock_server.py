@@ -0,0 +1,372 @@
+"""
+本地模拟LLM服务
+兼容 OpenAI Chat Completions（/v1/chat/completions）和 Anthropic Messages（/v1/messages）接口，
+支持流式与非流式输出，根据提示词中的框架块生成符合分析结果格式的JSON答案。
+可配置时延分布、错误率、429限流和输出截断；相同请求在相同随机种子下行为一致，
+用于离线、可复现地压测整条处理流程。
+用法:
+    python mock_server.py --port 8765 --latency-ms 800 --rate-limit-rate 0.05 --seed 1
+    # 另一个终端
+    python main.py --mock --async
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PORT = 8765
+
+_CATEGORY_RE = re.compile(r'^  "(.+)": \[$')
+_NUMBER_RE = re.compile(r'^\s+"number": (\d+),?$')
+_NAME_RE = re.compile(r'^\s+"name": "(.*)",?$')
+# 综合报告的分大类提示词
+_REPORT_CATEGORY_RE = re.compile(r"\*\*当前分析的风险大类\*\*：(.+)")
+_REPORT_SUB_RE = re.compile(r"^\s*- \d+\. (.+?) \(关注点", re.M)
+
+_COVERAGE = ["完全覆盖", "部分覆盖", "未覆盖", "不适用"]
+_SATISFACTION = ["完全满足", "基本满足", "部分满足", "未满足"]
+
+
+@dataclass
+class MockBehavior:
+    """模拟服务的行为参数"""
+    latency: str = "lognormal"  # 首token时延分布: fixed/uniform/lognormal
+    latency_ms: float = 500.0  # fixed 的取值、uniform 的上限、lognormal 的中位数
+    latency_sigma: float = 0.5  # lognormal 的形状参数，越大长尾越重
+    tokens_per_sec: float = 0.0  # 流式输出速率，0表示不限速
+    error_rate: float = 0.0  # 返回500的概率
+    rate_limit_rate: float = 0.0  # 返回429的概率
+    truncate_rate: float = 0.0  # 输出在中途截断的概率
+    seed: int = 0
+
+    def first_token_delay(self, rng: random.Random) -> float:
+        if self.latency == "fixed":
+            return self.latency_ms / 1000
+        if self.latency == "uniform":
+            return rng.uniform(0, self.latency_ms) / 1000
+        return rng.lognormvariate(0, self.latency_sigma) * self.latency_ms / 1000
+
+
+def parse_framework_chunk(prompt: str) -> List[Tuple[str, int, str]]:
+    """从提示词中的框架块JSON（indent=2）提取 (类别, 要求编号, 要求名称)"""
+    requirements = []
+    category = None
+    number = None
+    for line in prompt.splitlines():
+        match = _CATEGORY_RE.match(line)
+        if match:
+            category = match.group(1)
+            continue
+        match = _NUMBER_RE.match(line)
+        if match and category:
+            number = int(match.group(1))
+            continue
+        match = _NAME_RE.match(line)
+        if match and category and number is not None:
+            requirements.append((category, number, match.group(1)))
+            number = None
+    return requirements
+
+
+def category_report_answer(prompt: str, rng: random.Random) -> str:
+    """综合报告的分大类分析（overall_reporter 的 category_report 格式）"""
+    match = _REPORT_CATEGORY_RE.search(prompt)
+    category = match.group(1).strip() if match else "模拟大类"
+    subs = {
+        name: {
+            "Coverage": rng.choice(_COVERAGE[:3]),
+            "LawRequirements": "模拟要求说明",
+            "KeyProvisions": ["模拟条款"],
+            "CompliancePoints": ["模拟要点"],
+        }
+        for name in _REPORT_SUB_RE.findall(prompt)
+    }
+    answer = {
+        "Category": category,
+        "CategoryLawAnalysis": "模拟大类分析",
+        "SubCategoryAnalysis": subs,
+        "CategoryComplianceGuidance": "模拟合规建议",
+    }
+    return json.dumps(answer, ensure_ascii=False)
+
+
+def canned_answer(prompt: str, rng: random.Random) -> str:
+    """按提示词中的框架块生成分析结果；文档审查提示词使用 要求编号/满足程度 格式。
+    没有框架块时按综合报告处理：分大类提示词返回 category_report 格式，其余返回纯文本"""
+    framework = parse_framework_chunk(prompt)
+    if not framework:
+        if '"CategoryLawAnalysis"' in prompt:
+            return category_report_answer(prompt, rng)
+        return "模拟综合分析：该法规对境外投资合规提出了若干要求。"
+    documentation = '"要求编号"' in prompt
+    details: Dict[str, List[Dict[str, Any]]] = {}
+    for category, number, name in framework:
+        if documentation:
+            level = rng.choice(_SATISFACTION)
+            item = {
+                "要求编号": number,
+                "要求名称": name,
+                "满足程度": level,
+                "满足程度评分": f"{rng.randint(1, 10)}分",
+                "文档对应内容": [] if level == "未满足" else [
+                    {"章节位置": "第一章", "具体内容": "模拟内容", "内容评价": "一般"}
+                ],
+                "存在问题": [],
+                "改进建议": [],
+            }
+        else:
+            level = rng.choice(_COVERAGE)
+            item = {
+                "框架要求编号": number,
+                "框架要求名称": name,
+                "法规覆盖情况": level,
+                "法规要求内容": [] if level in ("未覆盖", "不适用") else [
+                    {"条款编号": f"第{rng.randint(1, 60)}条", "具体要求": "模拟要求",
+                     "强制等级": "强制", "适用对象": "企业", "原文内容": "模拟原文"}
+                ],
+                "实施要求": "",
+                "处罚措施": "",
+            }
+        details.setdefault(category, []).append(item)
+    answer = {
+        "文档标题": "模拟文档",
+        "详细分析": details,
+        "关键发现": ["模拟发现"],
+        "合规建议": ["模拟建议"],
+    }
+    return json.dumps(answer, ensure_ascii=False)
+
+
+def _split_tokens(text: str, size: int = 8) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    """请求处理；行为参数与请求计数保存在 server 上"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    # ─────────────── 请求分发 ───────────────
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        request = json.loads(body or b"{}")
+        if self.path.endswith("/chat/completions"):
+            kind = "openai"
+        elif self.path.endswith("/messages"):
+            kind = "anthropic"
+        else:
+            self._send_json(404, {"error": {"message": f"未知路径 {self.path}"}})
+            return
+
+        rng = self.server.rng_for(body)
+        behavior: MockBehavior = self.server.behavior
+        self.server.count("requests")
+
+        roll = rng.random()
+        if roll < behavior.rate_limit_rate:
+            self.server.count("429")
+            self._send_json(429, {"error": {"type": "rate_limit_error", "message": "模拟限流"}},
+                            {"Retry-After": "1"})
+            return
+        if roll < behavior.rate_limit_rate + behavior.error_rate:
+            self.server.count("500")
+            self._send_json(500, {"error": {"type": "api_error", "message": "模拟服务错误"}})
+            return
+
+        prompt = self._user_prompt(request, kind)
+        answer = canned_answer(prompt, rng)
+        if rng.random() < behavior.truncate_rate:
+            self.server.count("truncated")
+            answer = answer[:len(answer) // 2]
+
+        time.sleep(behavior.first_token_delay(rng))
+        usage = (max(1, len(prompt) // 2), max(1, len(answer) // 2))
+        if request.get("stream"):
+            self._stream(kind, request, answer, usage)
+        else:
+            self._send_json(200, self._full_response(kind, request, answer, usage))
+
+    @staticmethod
+    def _user_prompt(request: Dict[str, Any], kind: str) -> str:
+        parts = []
+        for message in request.get("messages", []):
+            if message.get("role") != "user":
+                continue
+            content = message.get("content")
+            if isinstance(content, list):
+                content = "".join(block.get("text", "") for block in content)
+            parts.append(content or "")
+        return "\n".join(parts)
+
+    # ─────────────── 响应格式 ───────────────
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    @staticmethod
+    def _full_response(kind: str, request: Dict[str, Any], answer: str, usage: Tuple[int, int]) -> Dict[str, Any]:
+        model = request.get("model", "mock")
+        if kind == "openai":
+            return {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": usage[0], "completion_tokens": usage[1],
+                          "total_tokens": sum(usage)},
+            }
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:12]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": answer}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": usage[0], "output_tokens": usage[1]},
+        }
+
+    def _stream(self, kind: str, request: Dict[str, Any], answer: str, usage: Tuple[int, int]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        delay = 0.0
+        if self.server.behavior.tokens_per_sec > 0:
+            delay = 1 / self.server.behavior.tokens_per_sec
+        events = self._openai_events if kind == "openai" else self._anthropic_events
+        try:
+            for event in events(request, answer, usage):
+                self.wfile.write(event.encode("utf-8"))
+                self.wfile.flush()
+                if delay:
+                    time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前结束接收
+            self.server.count("client_aborted")
+
+    @staticmethod
+    def _openai_events(request, answer, usage):
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": request.get("model", "mock")}
+        for piece in _split_tokens(answer):
+            chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n"
+        if (request.get("stream_options") or {}).get("include_usage"):
+            final = {**base, "choices": [], "usage": {
+                "prompt_tokens": usage[0], "completion_tokens": usage[1], "total_tokens": sum(usage)}}
+            yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @staticmethod
+    def _anthropic_events(request, answer, usage):
+        def event(name, payload):
+            return f"event: {name}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        yield event("message_start", {"type": "message_start", "message": {
+            "id": f"msg_{uuid.uuid4().hex[:12]}", "type": "message", "role": "assistant", "content": [],
+            "model": request.get("model", "mock"), "stop_reason": None, "stop_sequence": None,
+            "usage": {"input_tokens": usage[0], "output_tokens": 1}}})
+        yield event("content_block_start", {"type": "content_block_start", "index": 0,
+                                            "content_block": {"type": "text", "text": ""}})
+        for piece in _split_tokens(answer):
+            yield event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                "delta": {"type": "text_delta", "text": piece}})
+        yield event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield event("message_delta", {"type": "message_delta",
+                                      "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                      "usage": {"output_tokens": usage[1]}})
+        yield event("message_stop", {"type": "message_stop"})
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """带行为参数和请求统计的模拟服务"""
+    daemon_threads = True
+
+    def __init__(self, port: int = DEFAULT_PORT, behavior: Optional[MockBehavior] = None, host: str = "127.0.0.1"):
+        super().__init__((host, port), MockLLMHandler)
+        self.behavior = behavior or MockBehavior()
+        self.stats: Dict[str, int] = {}
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/v1"
+
+    def rng_for(self, body: bytes) -> random.Random:
+        """同一请求体第 n 次出现时使用固定的随机序列，与并发顺序无关"""
+        digest = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            attempt = self._seen.get(digest, 0)
+            self._seen[digest] = attempt + 1
+        return random.Random(f"{self.behavior.seed}:{digest}:{attempt}")
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 OpenAI/Anthropic 兼容服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    behavior = MockBehavior(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens_per_sec=args.tokens_per_sec,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        truncate_rate=args.truncate_rate,
+        seed=args.seed,
+    )
+    server = MockLLMServer(args.port, behavior, host=args.host)
+    print(f"模拟LLM服务已启动: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"请求统计: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
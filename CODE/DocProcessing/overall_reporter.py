@@ -12,7 +12,7 @@ overall_reporter_anthropic.py
 """
 
 from __future__ import annotations
-import os, sys, json, textwrap, collections, re
+import os, sys, json, textwrap, collections
 import numpy as np
 from pathlib import Path
 from typing import Dict, List
@@ -24,7 +24,10 @@ from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.table import WD_ALIGN_VERTICAL
+from metrics import STAGE_REPORT_LLM, STAGE_TEXT_REPORT, STAGE_WORD, stage
 from prompt import REGULATORY_FRAMEWORK
+from response_parser import ResponseParseError, parse_response
+from tracing import span
 
 # 为导入可视化工具添加路径
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -37,12 +40,14 @@ def _call_anthropic(system_msg: str, user_msg: str,
                     model="claude-opus-4-20250514",
                     temperature=0.2,
                     max_tokens=1024,
-                    api_key: str | None = None) -> str:
+                    api_key: str | None = None,
+                    base_url: str | None = None) -> str:
     """
     Wrapper: 返回纯字符串（去掉 ```json``` 包裹）
+    base_url 为空时由 SDK 读取 ANTHROPIC_BASE_URL，否则使用官方地址
     """
-    api_key='sk-ant-REDACTED'
-    client = anthropic.Anthropic(api_key=api_key)
+    api_key = api_key or 'sk-ant-REDACTED'
+    client = anthropic.Anthropic(api_key=api_key, base_url=base_url)
     
     # 判断是否需要JSON格式
     needs_json = "JSON" in user_msg or "json" in user_msg
@@ -55,13 +60,14 @@ def _call_anthropic(system_msg: str, user_msg: str,
     else:
         enhanced_user_msg = user_msg
         
-    msg = client.messages.create(
-        model=model,
-        max_tokens=max_tokens,
-        temperature=temperature,
-        system=system_msg,
-        messages=[{"role": "user", "content": enhanced_user_msg}],
-    )
+    with stage(STAGE_REPORT_LLM):
+        msg = client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system_msg,
+            messages=[{"role": "user", "content": enhanced_user_msg}],
+        )
     # content 可能是 list(blocks)
     if isinstance(msg.content, list):
         content = "".join(b.text for b in msg.content if hasattr(b, "text"))
@@ -79,65 +85,6 @@ def _call_anthropic(system_msg: str, user_msg: str,
     return content
 
 
-# ───────────────────────── JSON 解析辅助 ─────────────────────────
-def _safe_json_loads(text: str) -> Dict:
-    """更稳健地解析可能被额外文本包裹的JSON字符串"""
-    text = text.strip()
-    
-    # 尝试直接解析
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError as e:
-        # 记录原始错误
-        original_error = str(e)
-        
-    # 尝试提取JSON部分
-    start = text.find('{')
-    end = text.rfind('}')
-    if start != -1 and end != -1 and end > start:
-        candidate = text[start:end + 1]
-        
-        # 尝试修复常见的JSON格式问题
-        try:
-            # 1. 修复缺失的逗号（在 "}" 或 "]" 后面跟着 " 的情况）
-            candidate = re.sub(r'([}\]])\s*"', r'\1, "', candidate)
-            
-            # 2. 修复数组中缺失的逗号
-            candidate = re.sub(r'"\s+"', '", "', candidate)
-            
-            # 3. 修复对象中缺失的逗号（在引号后跟着新的键）
-            candidate = re.sub(r'"\s*\n\s*"', '",\n"', candidate)
-            
-            # 4. 移除末尾多余的逗号
-            candidate = re.sub(r',\s*}', '}', candidate)
-            candidate = re.sub(r',\s*]', ']', candidate)
-            
-            # 5. 尝试解析修复后的JSON
-            return json.loads(candidate)
-        except json.JSONDecodeError:
-            # 如果还是失败，尝试更激进的修复
-            try:
-                # 替换单引号为双引号
-                candidate = re.sub(r"'([^']*)':", r'"\1":', candidate)
-                candidate = re.sub(r":\s*'([^']*)'", r': "\1"', candidate)
-                
-                # 确保布尔值小写
-                candidate = candidate.replace('True', 'true').replace('False', 'false')
-                
-                # 处理None值
-                candidate = candidate.replace('None', 'null')
-                
-                return json.loads(candidate)
-            except json.JSONDecodeError:
-                pass
-    
-    # 如果所有尝试都失败，抛出原始错误
-    raise json.JSONDecodeError(
-        f"Failed to parse JSON. Original error: {original_error}",
-        text, 0
-    )
-
-
 # ───────────────────────── 分析报告解析 ─────────────────────────
 def _parse_analysis_report(text: str) -> tuple[list[list[str]], list[list[str]]]:
     """将文本形式的分析报告解析为表格数据"""
@@ -340,7 +287,9 @@ def _gather(json_path: Path):
 
 # ───────────────────────── 逐大类评估 ─────────────────────────
 def _build_category_reports(cov, findings, advice, detailed_data,
-                            model="claude-opus-4-20250514") -> List[Dict]:
+                            model="claude-opus-4-20250514",
+                            api_key: str | None = None,
+                            base_url: str | None = None) -> List[Dict]:
     reports = []
     
     # 构建子类别详细信息字符串
@@ -439,37 +388,40 @@ def _build_category_reports(cov, findings, advice, detailed_data,
         - 请确保JSON格式正确，特别注意逗号的使用
         """)
         
-        # 尝试多次获取正确的JSON
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                raw = _call_anthropic(
-                    system_msg="你是专业的法律分析专家，必须返回有效的JSON格式，严格按照要求的字段结构。",
-                    user_msg=prompt,
-                    model=model,
-                    max_tokens=6000,  # 增加token限制
-                )
-                parsed_report = _safe_json_loads(raw)
-                reports.append(parsed_report)
-                break
-            except json.JSONDecodeError as e:
-                print(f"尝试 {attempt + 1}/{max_attempts} - 解析类别 {cat_name} 的JSON响应时出错：{str(e)}")
-                if attempt == max_attempts - 1:
-                    # 最后一次尝试失败，创建默认报告
-                    default_report = {
-                        "Category": cat_name,
-                        "CategoryLawAnalysis": f"由于技术原因，无法生成{cat_name}的详细分析。",
-                        "SubCategoryAnalysis": {},
-                        "CategoryComplianceGuidance": "建议重新运行分析以获取完整的合规指导。"
-                    }
-                    for sub in cat_subcategories:
-                        default_report["SubCategoryAnalysis"][sub['name']] = {
-                            "Coverage": sub_map.get(sub['name'], "未覆盖"),
-                            "LawRequirements": "分析数据暂时不可用",
-                            "KeyProvisions": [],
-                            "CompliancePoints": []
+        with span("大类报告", "report", category=cat_name):
+            # 尝试多次获取正确的JSON
+            max_attempts = 3
+            for attempt in range(max_attempts):
+                try:
+                    raw = _call_anthropic(
+                        system_msg="你是专业的法律分析专家，必须返回有效的JSON格式，严格按照要求的字段结构。",
+                        user_msg=prompt,
+                        model=model,
+                        max_tokens=6000,  # 增加token限制
+                        api_key=api_key,
+                        base_url=base_url,
+                    )
+                    parsed_report = parse_response(raw, "category_report").data
+                    reports.append(parsed_report)
+                    break
+                except ResponseParseError as e:
+                    print(f"尝试 {attempt + 1}/{max_attempts} - 解析类别 {cat_name} 的JSON响应时出错：{str(e)}")
+                    if attempt == max_attempts - 1:
+                        # 最后一次尝试失败，创建默认报告
+                        default_report = {
+                            "Category": cat_name,
+                            "CategoryLawAnalysis": f"由于技术原因，无法生成{cat_name}的详细分析。",
+                            "SubCategoryAnalysis": {},
+                            "CategoryComplianceGuidance": "建议重新运行分析以获取完整的合规指导。"
                         }
-                    reports.append(default_report)
+                        for sub in cat_subcategories:
+                            default_report["SubCategoryAnalysis"][sub['name']] = {
+                                "Coverage": sub_map.get(sub['name'], "未覆盖"),
+                                "LawRequirements": "分析数据暂时不可用",
+                                "KeyProvisions": [],
+                                "CompliancePoints": []
+                            }
+                        reports.append(default_report)
                     
     return reports
 
@@ -1208,14 +1160,20 @@ def generate_overall_report(
     json_path: str | Path,
     model_cat="claude-opus-4-20250514",
     model_doc="claude-opus-4-20250514",
+    api_key: str | None = None,
+    base_url: str | None = None,
 ) -> tuple[Path, Path, Path]:
-    """Returns (overall_json_path, overall_docx_path, analysis_txt_path)"""
+    """Returns (overall_json_path, overall_docx_path, analysis_txt_path)
+
+    api_key / base_url 指定 Anthropic 接口，例如模拟模式下指向本地模拟服务
+    """
 
     json_path = Path(json_path)
     cov, findings, advice, detailed_data = _gather(json_path)
 
     # 逐大类分析
-    cat_reports = _build_category_reports(cov, findings, advice, detailed_data, model_cat)
+    cat_reports = _build_category_reports(cov, findings, advice, detailed_data, model_cat,
+                                          api_key=api_key, base_url=base_url)
 
     # 全文总体法规分析
     doc_prompt = textwrap.dedent(f"""
@@ -1251,6 +1209,8 @@ def generate_overall_report(
         user_msg=doc_prompt,
         model=model_doc,
         max_tokens=4000,
+        api_key=api_key,
+        base_url=base_url,
     )
     
     report = {
@@ -1266,8 +1226,10 @@ def generate_overall_report(
     out_txt = json_path.parent / f"{reg_name}_分析报告.txt"
 
     out_json.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
-    _export_word(report, out_docx, json_path.parent, json_path)
-    _export_text_report(json_path, out_txt)
+    with stage(STAGE_WORD):
+        _export_word(report, out_docx, json_path.parent, json_path)
+    with stage(STAGE_TEXT_REPORT):
+        _export_text_report(json_path, out_txt)
 
     return out_json, out_docx, out_txt
 
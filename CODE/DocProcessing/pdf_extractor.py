@@ -0,0 +1,189 @@
+"""
+PDF文本提取模块
+支持多种提取后端（pypdfium2 / pdfminer / PyPDF2），并可按页范围分配到进程池并行提取
+用法（基准测试）:
+    python pdf_extractor.py 法规汇编.pdf --workers 4
+"""
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+try:
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+except ImportError:
+    PDFPage = None
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+
+# 按速度从快到慢排列，"auto" 时选择第一个已安装的后端
+BACKEND_PRIORITY = ("pypdfium2", "pdfminer", "pypdf2")
+
+# 页数少于该值时并行的进程开销大于收益，直接串行提取
+MIN_PAGES_FOR_PARALLEL = 16
+
+
+def available_backends() -> List[str]:
+    """返回当前环境中已安装的提取后端"""
+    installed = {
+        "pypdfium2": pypdfium2 is not None,
+        "pdfminer": PDFPage is not None,
+        "pypdf2": PyPDF2 is not None and getattr(PyPDF2, "PdfReader", None) is not None,
+    }
+    return [name for name in BACKEND_PRIORITY if installed[name]]
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    """解析后端名称，auto 时选择最快的已安装后端"""
+    backends = available_backends()
+    if not backends:
+        raise RuntimeError("未安装任何PDF提取库（pypdfium2 / pdfminer.six / PyPDF2）")
+    backend = backend.lower()
+    if backend == "auto":
+        return backends[0]
+    if backend not in backends:
+        raise RuntimeError(f"PDF提取后端不可用: {backend}（已安装: {', '.join(backends)}）")
+    return backend
+
+
+def page_count(file_path: Path, backend: str) -> int:
+    """获取PDF页数"""
+    if backend == "pypdfium2":
+        pdf = pypdfium2.PdfDocument(str(file_path))
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    if backend == "pdfminer":
+        with open(file_path, "rb") as fh:
+            return sum(1 for _ in PDFPage.get_pages(fh))
+    with open(file_path, "rb") as fh:
+        return len(PyPDF2.PdfReader(fh).pages)
+
+
+def _extract_range(task: Tuple[str, str, int, int]) -> List[str]:
+    """提取 [start, stop) 范围内各页的文本（在子进程中执行）"""
+    file_path, backend, start, stop = task
+    pages: List[str] = []
+
+    if backend == "pypdfium2":
+        pdf = pypdfium2.PdfDocument(file_path)
+        try:
+            for i in range(start, stop):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                pages.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+    elif backend == "pdfminer":
+        # 整个范围只解析一次文档（逐页调用 extract_text 每次都会重新打开和解析整个PDF）
+        resources = PDFResourceManager(caching=True)
+        laparams = LAParams()
+        with open(file_path, "rb") as fh:
+            for page in PDFPage.get_pages(fh, pagenos=set(range(start, stop))):
+                out = io.StringIO()
+                device = TextConverter(resources, out, laparams=laparams)
+                PDFPageInterpreter(resources, device).process_page(page)
+                device.close()
+                pages.append(out.getvalue())
+    else:
+        with open(file_path, "rb") as fh:
+            reader = PyPDF2.PdfReader(fh)
+            for i in range(start, stop):
+                pages.append(reader.pages[i].extract_text() or "")
+
+    return pages
+
+
+def _split_ranges(total: int, workers: int, pages_per_task: Optional[int] = None) -> List[Tuple[int, int]]:
+    """将页码切分为连续的范围，每个进程负责若干范围"""
+    if pages_per_task is None:
+        # 每个进程约分到4个任务，兼顾负载均衡与进程间通信开销
+        pages_per_task = max(1, -(-total // (workers * 4)))
+    return [(i, min(i + pages_per_task, total)) for i in range(0, total, pages_per_task)]
+
+
+def extract_pages(
+    file_path: Path,
+    backend: str = "auto",
+    workers: int = 1,
+    pages_per_task: Optional[int] = None,
+) -> List[str]:
+    """按页提取PDF文本，返回与页码顺序一致的文本列表"""
+    file_path = Path(file_path)
+    backend = resolve_backend(backend)
+    total = page_count(file_path, backend)
+
+    if workers <= 1 or total < MIN_PAGES_FOR_PARALLEL:
+        return _extract_range((str(file_path), backend, 0, total))
+
+    tasks = [(str(file_path), backend, start, stop)
+             for start, stop in _split_ranges(total, workers, pages_per_task)]
+    pages: List[str] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map 按提交顺序返回结果，保证页序
+        for chunk in pool.map(_extract_range, tasks):
+            pages.extend(chunk)
+    return pages
+
+
+def benchmark(file_path: Path, workers_list: Tuple[int, ...] = (1, 2, 4), repeat: int = 1) -> List[Dict]:
+    """对比当前PyPDF2串行路径与各后端/并行度的提取耗时"""
+    results = []
+    baseline = None
+    for backend in available_backends():
+        for workers in workers_list:
+            elapsed = []
+            chars = 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                pages = extract_pages(file_path, backend=backend, workers=workers)
+                elapsed.append(time.perf_counter() - start)
+                chars = sum(len(p) for p in pages)
+            best = min(elapsed)
+            if backend == "pypdf2" and workers == 1:
+                baseline = best
+            results.append({
+                "后端": backend,
+                "进程数": workers,
+                "页数": len(pages),
+                "字符数": chars,
+                "耗时(秒)": round(best, 3),
+            })
+
+    for row in results:
+        row["相对PyPDF2串行加速比"] = round(baseline / row["耗时(秒)"], 2) if baseline and row["耗时(秒)"] else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF提取后端基准测试")
+    parser.add_argument("pdf", type=str, help="PDF文件路径")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 4],
+                        help="测试的进程数列表")
+    parser.add_argument("--repeat", type=int, default=3, help="每种组合重复次数（取最快一次）")
+    args = parser.parse_args()
+
+    for row in benchmark(Path(args.pdf), tuple(args.workers), args.repeat):
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
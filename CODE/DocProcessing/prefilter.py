@@ -0,0 +1,169 @@
+"""
+关键词预筛选模块
+使用Aho–Corasick多模式匹配，在调用LLM之前判断文档可能涉及哪些框架大类
+对没有任何证据的大类直接判定为"未覆盖"，跳过对应的LLM调用
+"""
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from prompt import FRAMEWORK_SYNONYMS, REGULATORY_FRAMEWORK
+
+# 过于通用、几乎所有法规都会出现的词，不作为证据
+GENERIC_TERMS = {
+    "风险", "管理", "海外", "制度", "政策", "流程", "报告", "评估", "计划", "标准",
+    "要求", "机制", "办法", "体系", "规范", "指引", "程序", "细则", "文件", "各类",
+    "原则", "监测", "监控", "应对", "准入", "转移", "规避", "减缓", "矩阵", "适用情形",
+    "法律", "法律法规",
+}
+
+# 从框架要求名称中去掉的文件类型后缀
+_NAME_SUFFIX_RE = re.compile(
+    r"(基本制度|管理体系标准|管理体系文件|体系文件|管理办法|管理制度|管理政策|"
+    r"合规指引|合规制度|合规政策|指引|细则|规范|程序|制度|政策|办法|标准)$"
+)
+_SPLIT_RE = re.compile(r"[、/，,；;\s]+")
+
+
+class AhoCorasick:
+    """Aho–Corasick 多模式匹配器（大小写不敏感）"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        node = 0
+        for ch in pattern.lower():
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if pattern not in self._out[node]:
+            self._out[node].append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def count(self, text: str) -> Dict[str, int]:
+        """统计每个模式在文本中的出现次数"""
+        counts: Dict[str, int] = {}
+        node = 0
+        for ch in text.lower():
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern in self._out[node]:
+                counts[pattern] = counts.get(pattern, 0) + 1
+        return counts
+
+
+def extract_category_keywords(
+    framework: Dict[str, List[Dict[str, Any]]],
+    synonyms: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, List[str]]:
+    """从框架名称、关注点和同义词表中提取每个大类的关键词"""
+    synonyms = FRAMEWORK_SYNONYMS if synonyms is None else synonyms
+    keywords: Dict[str, List[str]] = {}
+
+    for cat, items in framework.items():
+        terms: List[str] = list(synonyms.get(cat, []))
+        for item in items:
+            name = re.sub(r"[（(][^）)]*[）)]", "", item["name"]).strip()
+            terms.append(_NAME_SUFFIX_RE.sub("", name))
+            terms.extend(_SPLIT_RE.split(item.get("keyPoints", "")))
+
+        cleaned = []
+        for term in terms:
+            term = re.sub(r'["“”]', "", term).strip()
+            if len(term) >= 2 and term not in GENERIC_TERMS and term not in cleaned:
+                cleaned.append(term)
+        keywords[cat] = cleaned
+
+    return keywords
+
+
+@dataclass
+class ScreeningResult:
+    """预筛选结果"""
+    min_hits: int
+    hits: Dict[str, Dict[str, int]] = field(default_factory=dict)  # {大类: {关键词: 次数}}
+
+    def total_hits(self, category: str) -> int:
+        return sum(self.hits.get(category, {}).values())
+
+    @property
+    def skipped(self) -> List[str]:
+        """证据不足、直接判定为未覆盖的大类"""
+        return [cat for cat in self.hits if self.total_hits(cat) < self.min_hits]
+
+    def audit(self) -> Dict[str, Any]:
+        """生成审计记录，写入分析结果"""
+        records = {}
+        for cat, term_hits in self.hits.items():
+            total = self.total_hits(cat)
+            top_terms = sorted(term_hits.items(), key=lambda kv: kv[1], reverse=True)[:10]
+            records[cat] = {
+                "命中次数": total,
+                "命中关键词": dict(top_terms),
+                "阈值": self.min_hits,
+                "判定": "送交LLM分析" if total >= self.min_hits else "跳过LLM，判定未覆盖",
+            }
+        return records
+
+
+class KeywordPrefilter:
+    """基于关键词的框架大类预筛选器"""
+
+    def __init__(
+        self,
+        framework: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        synonyms: Optional[Dict[str, List[str]]] = None,
+        min_hits: int = 1,
+    ):
+        framework = REGULATORY_FRAMEWORK if framework is None else framework
+        self.min_hits = min_hits
+        self.keywords = extract_category_keywords(framework, synonyms)
+
+        # 同一关键词可能属于多个大类
+        self._term_categories: Dict[str, List[str]] = {}
+        for cat, terms in self.keywords.items():
+            for term in terms:
+                self._term_categories.setdefault(term, []).append(cat)
+        self._matcher = AhoCorasick(self._term_categories)
+
+    def screen(self, text: str) -> ScreeningResult:
+        """扫描文档文本，统计各大类的关键词命中"""
+        result = ScreeningResult(min_hits=self.min_hits, hits={cat: {} for cat in self.keywords})
+        for term, n in self._matcher.count(text).items():
+            for cat in self._term_categories[term]:
+                result.hits[cat][term] = n
+        return result
+
+    def split_chunk(
+        self, chunk: Dict[str, Any], screening: ScreeningResult
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """将框架块拆分为 (需要LLM分析的部分, 直接判定未覆盖的部分)"""
+        skipped = set(screening.skipped)
+        keep = {cat: items for cat, items in chunk.items() if cat not in skipped}
+        drop = {cat: items for cat, items in chunk.items() if cat in skipped}
+        return keep, drop
@@ -0,0 +1,202 @@
+"""
+分阶段性能剖析（--profile）
+对每个处理阶段（文档提取、响应解析、JSON写入、热力图、Excel、Word……）分别采集 CPU 剖析数据，
+可选 cProfile（确定性，默认）或 pyinstrument（采样，需安装）；同时用 tracemalloc 记录各阶段的内存峰值增量
+和全程的内存分配热点。结果写入运行目录下的 profile/ 子目录：
+· <阶段>.prof / <阶段>.txt —— cProfile 数据（可用 snakeviz 打开）与按累计耗时排序的摘要
+· <阶段>.html —— pyinstrument 火焰图
+· memory.txt —— 各阶段内存峰值与分配热点
+· profile_summary.json —— 各阶段剖析次数与内存峰值
+等待网络的阶段（LLM等待、综合报告LLM）不做 CPU 剖析；同一线程内嵌套的阶段只由最外层采集。
+子进程中的执行无法采集，因此剖析期间PDF固定在本进程内串行提取（忽略 pdf_workers）。
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+from metrics import STAGE_LLM, STAGE_REPORT_LLM
+
+try:
+    import pyinstrument
+    from pyinstrument.renderers import HTMLRenderer
+    from pyinstrument.session import Session
+except ImportError:
+    pyinstrument = None
+
+BACKENDS = ("cprofile", "pyinstrument")
+# 这些阶段的耗时几乎全是网络等待，CPU 剖析没有意义
+NETWORK_STAGES = {STAGE_LLM, STAGE_REPORT_LLM}
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 30
+
+
+def _file_name(stage: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in stage)
+
+
+class StageProfiler:
+    """按 (阶段, 线程) 分别采集，写出时按阶段合并"""
+
+    def __init__(self, output_dir: Path, backend: str = "cprofile", track_memory: bool = True):
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的剖析后端: {backend}")
+        if backend == "pyinstrument" and pyinstrument is None:
+            raise RuntimeError("pyinstrument库未安装，请 pip install pyinstrument 或使用 cprofile")
+        self.output_dir = Path(output_dir)
+        self.backend = backend
+        self.track_memory = track_memory
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profilers: Dict[Tuple[str, int], Any] = {}
+        self.counts: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}  # 因其他剖析器正在运行而跳过的次数
+        self.memory_peaks: Dict[str, int] = {}  # 各阶段单次执行的最大内存增量（字节）
+
+    # ─────────────── 生命周期 ───────────────
+    def start(self):
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+    def stop(self):
+        """写出剖析结果并停止内存跟踪"""
+        self.write()
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    # ─────────────── 采集 ───────────────
+    def _profiler(self, stage: str):
+        key = (stage, threading.get_ident())
+        with self._lock:
+            profiler = self._profilers.get(key)
+            if profiler is None:
+                if self.backend == "cprofile":
+                    profiler = cProfile.Profile()
+                else:
+                    profiler = pyinstrument.Profiler(async_mode="disabled")
+                self._profilers[key] = profiler
+        return profiler
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if name in NETWORK_STAGES or getattr(self._local, "active", False):
+            yield
+            return
+
+        profiler = self._profiler(name)
+        try:
+            if self.backend == "cprofile":
+                profiler.enable()
+            else:
+                profiler.start()
+        except (ValueError, RuntimeError):
+            # Python 3.12 起同一时刻只能有一个 cProfile 处于启用状态（其他线程正在剖析）
+            with self._lock:
+                self.skipped[name] = self.skipped.get(name, 0) + 1
+            yield
+            return
+
+        self._local.active = True
+        baseline = 0
+        if self.track_memory and tracemalloc.is_tracing():
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            if self.backend == "cprofile":
+                profiler.disable()
+            else:
+                profiler.stop()
+            self._local.active = False
+            with self._lock:
+                self.counts[name] = self.counts.get(name, 0) + 1
+                if self.track_memory and tracemalloc.is_tracing():
+                    # 并发阶段会共享峰值，数值为近似上限
+                    peak = tracemalloc.get_traced_memory()[1] - baseline
+                    self.memory_peaks[name] = max(self.memory_peaks.get(name, 0), peak)
+
+    # ─────────────── 输出 ───────────────
+    def write(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            by_stage: Dict[str, list] = {}
+            for (stage, _), profiler in self._profilers.items():
+                by_stage.setdefault(stage, []).append(profiler)
+
+        for stage, profilers in by_stage.items():
+            if self.backend == "cprofile":
+                self._write_cprofile(stage, profilers)
+            else:
+                self._write_pyinstrument(stage, profilers)
+
+        if self.track_memory and tracemalloc.is_tracing():
+            self._write_memory()
+
+        summary = {
+            "后端": self.backend,
+            "阶段": {
+                stage: {
+                    "剖析次数": self.counts.get(stage, 0),
+                    "跳过次数": self.skipped.get(stage, 0),
+                    "内存峰值增量MB": round(self.memory_peaks[stage] / 1024 / 1024, 2)
+                    if stage in self.memory_peaks else None,
+                }
+                for stage in sorted(set(self.counts) | set(self.skipped))
+            },
+        }
+        with open(self.output_dir / "profile_summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"剖析结果: {self.output_dir}")
+
+    def _write_cprofile(self, stage: str, profilers: list):
+        stats = None
+        for profiler in profilers:
+            if not profiler.getstats():
+                continue
+            if stats is None:
+                stats = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+        if stats is None:
+            return
+        name = _file_name(stage)
+        stats.dump_stats(str(self.output_dir / f"{name}.prof"))
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        (self.output_dir / f"{name}.txt").write_text(buffer.getvalue(), encoding="utf-8")
+
+    def _write_pyinstrument(self, stage: str, profilers: list):
+        sessions = [p.last_session for p in profilers if p.last_session is not None]
+        if not sessions:
+            return
+        session = sessions[0]
+        for other in sessions[1:]:
+            session = Session.combine(session, other)
+        html = HTMLRenderer().render(session)
+        (self.output_dir / f"{_file_name(stage)}.html").write_text(html, encoding="utf-8")
+
+    def _write_memory(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current = tracemalloc.get_traced_memory()[0]
+        lines = [
+            f"当前已分配: {current / 1024 / 1024:.1f} MB",
+            "",
+            "各阶段单次执行的最大内存增量:",
+        ]
+        for stage, size in sorted(self.memory_peaks.items(), key=lambda item: -item[1]):
+            lines.append(f"  {stage}: {size / 1024 / 1024:.2f} MB")
+        lines.extend(["", f"仍在占用的内存分配热点（前{TOP_ALLOCATIONS}）:"])
+        for stat in snapshot.statistics("traceback")[:TOP_ALLOCATIONS]:
+            lines.append(f"{stat.size / 1024:.1f} KB, {stat.count} 个对象")
+            lines.extend(f"    {line}" for line in stat.traceback.format(limit=5))
+        (self.output_dir / "memory.txt").write_text("\n".join(lines), encoding="utf-8")
@@ -0,0 +1,269 @@
+"""
+运行进度与剩余时间估计
+按提供商统计已完成的LLM调用、待处理的框架块和输出速率，用近期平均耗时和实际并发度估计剩余时间；
+后台线程定期在终端刷新一行简洁的进度，并写出机器可读的 progress.json 供外部监控轮询。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, TextIO, Tuple
+
+# 近期耗时与输出速率的统计窗口
+LATENCY_WINDOW = 50
+THROUGHPUT_WINDOW_SECONDS = 60.0
+# 非终端输出（如重定向到日志）时的打印间隔
+LOG_INTERVAL_SECONDS = 30.0
+# 调用耗时直方图的桶上限（秒），供指标导出使用
+LATENCY_BUCKETS = (1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+
+
+@dataclass
+class ProviderProgress:
+    """单个提供商的进度"""
+    documents_planned: int = 0  # 已确定分块的文档数
+    chunks_planned: int = 0
+    chunks_done: int = 0
+    calls: int = 0  # 完成的LLM调用数（含补充请求和对冲请求）
+    failures: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    # 累计耗时直方图：各桶（含 +Inf）的计数与耗时总和
+    bucket_counts: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    latency_sum: float = 0.0
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+    # (完成时间, 输出tokens)，用于计算近期输出速率
+    recent_tokens: Deque[Tuple[float, int]] = field(default_factory=deque)
+    busy_seconds: float = 0.0  # 所有调用耗时之和，除以墙钟时间即平均并发数
+
+    @property
+    def avg_latency(self) -> Optional[float]:
+        return sum(self.latencies) / len(self.latencies) if self.latencies else None
+
+
+class ProgressTracker:
+    """线程安全的进度跟踪器；start() 后由后台线程定期输出"""
+
+    def __init__(
+        self,
+        total_documents: int,
+        providers: List[str],
+        progress_path: Optional[Path] = None,
+        interval: float = 2.0,
+        stream: Optional[TextIO] = None,
+        default_chunks: int = 1,
+        display: bool = True,
+    ):
+        self.total_documents = total_documents
+        self.progress_path = Path(progress_path) if progress_path else None
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stderr
+        self.default_chunks = default_chunks  # 尚未分块的文档按该块数估计
+        self.display = display  # False 时只写进度文件，不在终端输出
+        self.documents_done = 0
+        self.documents_failed = 0
+        self.providers: Dict[str, ProviderProgress] = {name: ProviderProgress() for name in providers}
+        self.started_at = time.perf_counter()
+        self.started_wall = datetime.now()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._last_log = 0.0
+        self._tty = hasattr(self.stream, "isatty") and self.stream.isatty()
+
+    # ─────────────── 事件 ───────────────
+    def _provider(self, name: str) -> ProviderProgress:
+        if name not in self.providers:
+            self.providers[name] = ProviderProgress()
+        return self.providers[name]
+
+    def plan(self, provider: str, chunks: int):
+        """某个提供商对一份文档确定了需要调用的框架块数"""
+        with self._lock:
+            p = self._provider(provider)
+            p.documents_planned += 1
+            p.chunks_planned += chunks
+
+    def chunk_done(self, provider: str):
+        with self._lock:
+            self._provider(provider).chunks_done += 1
+
+    def call_finished(
+        self,
+        provider: str,
+        seconds: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cached_tokens: int = 0,
+    ):
+        now = time.perf_counter()
+        with self._lock:
+            p = self._provider(provider)
+            p.calls += 1
+            p.input_tokens += input_tokens
+            p.output_tokens += output_tokens
+            p.cached_tokens += cached_tokens
+            p.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            p.latency_sum += seconds
+            p.latencies.append(seconds)
+            p.busy_seconds += seconds
+            p.recent_tokens.append((now, output_tokens))
+
+    def call_failed(self, provider: str):
+        with self._lock:
+            self._provider(provider).failures += 1
+
+    def provider_totals(self) -> Dict[str, ProviderProgress]:
+        """各提供商累计数据的副本"""
+        with self._lock:
+            return {
+                name: ProviderProgress(
+                    calls=p.calls, failures=p.failures, input_tokens=p.input_tokens,
+                    output_tokens=p.output_tokens, cached_tokens=p.cached_tokens,
+                    bucket_counts=list(p.bucket_counts), latency_sum=p.latency_sum,
+                )
+                for name, p in self.providers.items()
+            }
+
+    def document_done(self, failed: bool = False):
+        with self._lock:
+            self.documents_done += 1
+            if failed:
+                self.documents_failed += 1
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """每次刷新时以进度快照调用 listener（如 Prometheus 指标导出）"""
+        self._listeners.append(listener)
+
+    # ─────────────── 估计 ───────────────
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        elapsed = now - self.started_at
+        with self._lock:
+            providers = {}
+            eta = 0.0
+            eta_known = True
+            for name, p in self.providers.items():
+                while p.recent_tokens and now - p.recent_tokens[0][0] > THROUGHPUT_WINDOW_SECONDS:
+                    p.recent_tokens.popleft()
+                window = min(THROUGHPUT_WINDOW_SECONDS, elapsed) or 1e-9
+                throughput = sum(tokens for _, tokens in p.recent_tokens) / window
+
+                # 尚未分块的文档按已分块文档的平均块数估计（启用路由时会高估未被选用的提供商）
+                per_document = p.chunks_planned / p.documents_planned if p.documents_planned else self.default_chunks
+                unplanned = max(self.total_documents - p.documents_planned, 0)
+                pending = max(p.chunks_planned - p.chunks_done, 0) + unplanned * per_document
+                concurrency = max(p.busy_seconds / elapsed, 1.0) if elapsed > 0 else 1.0
+                if p.avg_latency is not None:
+                    # 各提供商并行处理，剩余时间取最慢的提供商
+                    eta = max(eta, pending * p.avg_latency / concurrency)
+                elif pending:
+                    eta_known = False
+
+                providers[name] = {
+                    "已完成调用": p.calls,
+                    "已完成块数": p.chunks_done,
+                    "待处理块数": round(pending),
+                    "近期平均耗时秒": round(p.avg_latency, 2) if p.avg_latency is not None else None,
+                    "平均并发": round(concurrency, 1),
+                    "输入tokens": p.input_tokens,
+                    "输出tokens": p.output_tokens,
+                    "输出tokens每秒": round(throughput, 1),
+                }
+            documents_done = self.documents_done
+            documents_failed = self.documents_failed
+
+        if documents_done >= self.total_documents:
+            eta_seconds: Optional[float] = 0.0
+        else:
+            eta_seconds = eta if eta_known and eta > 0 else None
+        return {
+            "更新时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "开始时间": self.started_wall.strftime("%Y-%m-%d %H:%M:%S"),
+            "已用时间秒": round(elapsed, 1),
+            "文档总数": self.total_documents,
+            "已完成文档": documents_done,
+            "失败文档": documents_failed,
+            "剩余时间秒": round(eta_seconds) if eta_seconds is not None else None,
+            "预计完成时间": (
+                (datetime.now() + timedelta(seconds=eta_seconds)).strftime("%Y-%m-%d %H:%M:%S")
+                if eta_seconds is not None else None
+            ),
+            "提供商": providers,
+        }
+
+    # ─────────────── 输出 ───────────────
+    @staticmethod
+    def render(snapshot: Dict[str, Any]) -> str:
+        """单行进度：文档数、各提供商块进度与速率、剩余时间"""
+        parts = [f"文档 {snapshot['已完成文档']}/{snapshot['文档总数']}"]
+        for name, p in snapshot["提供商"].items():
+            total = p["已完成块数"] + p["待处理块数"]
+            latency = f" {p['近期平均耗时秒']}s" if p["近期平均耗时秒"] is not None else ""
+            parts.append(f"{name} {p['已完成块数']}/{total}块{latency} {p['输出tokens每秒']:.0f}tok/s")
+        eta = snapshot["剩余时间秒"]
+        parts.append(f"剩余 {_format_duration(eta)}" if eta is not None else "剩余 估算中")
+        return "[进度] " + " | ".join(parts)
+
+    def write(self, snapshot: Optional[Dict[str, Any]] = None):
+        """写出进度文件（先写临时文件再替换，轮询方不会读到半个文件）"""
+        if self.progress_path is None:
+            return
+        snapshot = snapshot or self.snapshot()
+        tmp = self.progress_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(snapshot, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.progress_path)
+
+    def refresh(self, final: bool = False):
+        snapshot = self.snapshot()
+        self.write(snapshot)
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"进度监听器出错: {e}")
+        if not self.display:
+            return
+        line = self.render(snapshot)
+        now = time.perf_counter()
+        if self._tty:
+            # 覆盖同一行；结束时换行，保留最终进度
+            self.stream.write("\r\x1b[K" + line + ("\n" if final else ""))
+            self.stream.flush()
+        elif final or now - self._last_log >= LOG_INTERVAL_SECONDS:
+            self._last_log = now
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self.started_wall = datetime.now()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台刷新并输出最终进度"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.refresh(final=True)
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}"
@@ -0,0 +1,112 @@
+"""
+Prometheus 文本格式指标导出
+批处理运行期间定期把各提供商的请求数、耗时直方图、tokens、缓存命中率、失败数、
+已处理文档数和各阶段耗时写成 textfile 格式（.prom），供 node_exporter 的 textfile collector 采集。
+写入时先写临时文件再原子替换，采集方不会读到半个文件。
+"""
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from metrics import StageRecorder
+from progress import LATENCY_BUCKETS, ProgressTracker
+
+PREFIX = "docprocessing"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class PrometheusTextfileExporter:
+    """从进度跟踪器和阶段记录器生成指标，可作为 ProgressTracker 的监听器定期写出"""
+
+    def __init__(
+        self,
+        path: Path,
+        progress: ProgressTracker,
+        recorder: StageRecorder,
+        labels: Optional[Dict[str, str]] = None,
+    ):
+        self.path = Path(path)
+        self.progress = progress
+        self.recorder = recorder
+        self.labels = labels or {}
+        self._lines: List[str] = []
+
+    def _metric(self, name: str, kind: str, help_text: str):
+        self._lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        self._lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+    def _sample(self, name: str, value: float, **labels: Any):
+        self._lines.append(f"{PREFIX}_{name}{_labels({**self.labels, **labels})} {_number(value)}")
+
+    def render(self, snapshot: Optional[Dict[str, Any]] = None) -> str:
+        snapshot = snapshot or self.progress.snapshot()
+        providers = self.progress.provider_totals()
+        self._lines = []
+
+        self._metric("documents_total", "gauge", "本次运行的文档总数")
+        self._sample("documents_total", snapshot["文档总数"])
+        self._metric("documents_processed_total", "counter", "已处理的文档数")
+        self._sample("documents_processed_total", snapshot["已完成文档"] - snapshot["失败文档"], status="success")
+        self._sample("documents_processed_total", snapshot["失败文档"], status="failed")
+
+        self._metric("llm_requests_total", "counter", "完成的LLM请求数")
+        for name, p in providers.items():
+            self._sample("llm_requests_total", p.calls, provider=name)
+        self._metric("llm_failures_total", "counter", "失败的LLM请求数（含超时和熔断拒绝）")
+        for name, p in providers.items():
+            self._sample("llm_failures_total", p.failures, provider=name)
+
+        self._metric("llm_request_duration_seconds", "histogram", "LLM请求耗时")
+        for name, p in providers.items():
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, p.bucket_counts):
+                cumulative += count
+                self._sample("llm_request_duration_seconds_bucket", cumulative, provider=name, le=_number(float(bound)))
+            self._sample("llm_request_duration_seconds_bucket", p.calls, provider=name, le="+Inf")
+            self._sample("llm_request_duration_seconds_sum", round(p.latency_sum, 3), provider=name)
+            self._sample("llm_request_duration_seconds_count", p.calls, provider=name)
+
+        self._metric("llm_tokens_total", "counter", "LLM tokens用量")
+        for name, p in providers.items():
+            self._sample("llm_tokens_total", p.input_tokens, provider=name, type="input")
+            self._sample("llm_tokens_total", p.output_tokens, provider=name, type="output")
+            self._sample("llm_tokens_total", p.cached_tokens, provider=name, type="cached")
+        self._metric("llm_cache_hit_ratio", "gauge", "输入tokens中命中提示词缓存的比例")
+        for name, p in providers.items():
+            self._sample("llm_cache_hit_ratio", round(p.cached_tokens / p.input_tokens, 4) if p.input_tokens else 0,
+                         provider=name)
+
+        stages = self.recorder.summary()
+        self._metric("stage_duration_seconds", "summary", "各处理阶段的累计耗时")
+        for stage_name, stats in stages.items():
+            self._sample("stage_duration_seconds_sum", stats["累计耗时秒"], stage=stage_name)
+            self._sample("stage_duration_seconds_count", stats["次数"], stage=stage_name)
+
+        if snapshot["剩余时间秒"] is not None:
+            self._metric("eta_seconds", "gauge", "估计剩余时间")
+            self._sample("eta_seconds", snapshot["剩余时间秒"])
+        self._metric("last_update_timestamp_seconds", "gauge", "指标最近一次更新的时间")
+        self._sample("last_update_timestamp_seconds", round(time.time(), 3))
+        return "\n".join(self._lines) + "\n"
+
+    def write(self, snapshot: Optional[Dict[str, Any]] = None):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        tmp.write_text(self.render(snapshot), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -51,3 +51,15 @@ REGULATORY_FRAMEWORK = {
         {"number": 35, "name": "海外员工健康与福利管理制度", "scope": "HR、HSE", "keyPoints": "医疗保险、心理援助、疫病预案"}
     ]
 }
+
+# 关键词预筛选用的同义词/常见表述（按大类整理，可按需补充）
+FRAMEWORK_SYNONYMS = {
+    "一、治理与战略": ["董事会", "股东会", "决策", "治理", "授权", "战略", "投资决策", "可行性研究", "立项", "备案", "核准", "子公司"],
+    "二、全面风险管理": ["风险管理", "风险评估", "风险防控", "风险预警", "风险监测", "风险识别", "风险处置", "风险报告", "内部控制", "内控"],
+    "三、合规与法律": ["合规", "法律", "腐败", "贿赂", "商业贿赂", "制裁", "出口管制", "反垄断", "个人信息", "隐私", "尽职调查", "诚信", "违法违规"],
+    "四、财务与市场风险": ["外汇", "汇率", "资金", "融资", "信贷", "担保", "对冲", "套期保值", "流动性", "财务", "债务", "信用"],
+    "五、运营与 HSE": ["安全生产", "环境保护", "环保", "生态", "碳排放", "职业健康", "供应链", "采购", "事故", "绿色", "节能"],
+    "六、安全与危机": ["安全防范", "安保", "突发事件", "应急", "危机", "人身安全", "保险", "政治风险", "撤离"],
+    "七、信息与网络安全": ["网络安全", "信息安全", "信息系统", "数据安全", "保密", "涉密", "泄密", "网络攻击", "工控"],
+    "八、社会责任与人力": ["社会责任", "社区", "劳工", "劳动", "员工", "人权", "雇佣", "公益", "当地居民", "文化融合", "健康"],
+}
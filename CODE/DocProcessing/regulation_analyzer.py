@@ -11,6 +11,8 @@ from base_analyzer import BaseAnalyzer
 class RegulationAnalyzer(BaseAnalyzer):
     """法规审查分析器 - 从法规中提取要求"""
     
+    response_schema = "regulation"
+    
     def get_system_message(self) -> str:
         """获取系统消息"""
         return (
@@ -19,6 +21,18 @@ class RegulationAnalyzer(BaseAnalyzer):
             "所有回复必须使用中文，并返回有效的JSON格式。"
         )
     
+    def build_uncovered_item(self, requirement: Dict[str, Any]) -> Dict[str, Any]:
+        """预筛选未发现相关内容的要求，直接判定为未覆盖"""
+        return {
+            "框架要求编号": requirement["number"],
+            "框架要求名称": requirement["name"],
+            "法规覆盖情况": "未覆盖",
+            "法规要求内容": [],
+            "实施要求": "关键词预筛选未在法规中发现相关内容",
+            "处罚措施": "",
+            "判定来源": "关键词预筛选",
+        }
+    
     def create_analysis_prompt(self, document_content: str, framework_chunk: Dict[str, Any]) -> str:
         """创建法规审查的提示词"""
         return f"""你是一名监管合规专家，请分析以下法规文档，识别其中包含的监管要求。
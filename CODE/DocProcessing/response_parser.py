@@ -0,0 +1,355 @@
+"""
+LLM响应解析模块
+法规审查、文档审查和大类报告三种响应共用的解析入口：
+· 优先使用 orjson 解析（未安装时使用标准库 json）
+· 解析失败时只在报错位置做定点修复，而不是对整段文本做正则替换
+· 按预编译的结构定义校验，剔除缺少关键字段的要求项并报告问题
+用法（基准测试）:
+    python response_parser.py
+"""
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ResponseParseError(ValueError):
+    """响应无法解析或不符合结构定义"""
+
+
+# ───────────────────────── 结构定义 ─────────────────────────
+_COVERAGE_LEVELS = ["完全覆盖", "部分覆盖", "未覆盖", "不适用", "未提及"]
+_SATISFACTION_LEVELS = ["完全满足", "基本满足", "部分满足", "未满足"]
+
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "regulation": {
+        "type": "object",
+        "required": ["详细分析"],
+        "properties": {
+            "详细分析": {
+                "type": "object",
+                "additionalProperties": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["框架要求编号", "法规覆盖情况"],
+                        "properties": {
+                            "框架要求编号": {"type": "integer"},
+                            "框架要求名称": {"type": "string"},
+                            "法规覆盖情况": {"enum": _COVERAGE_LEVELS},
+                            "法规要求内容": {"type": "array", "items": {"type": "object"}},
+                        },
+                    },
+                },
+            },
+            "关键发现": {"type": "array"},
+            "合规建议": {"type": "array"},
+        },
+    },
+    "documentation": {
+        "type": "object",
+        "required": ["详细分析"],
+        "properties": {
+            "详细分析": {
+                "type": "object",
+                "additionalProperties": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["要求编号", "满足程度"],
+                        "properties": {
+                            "要求编号": {"type": "integer"},
+                            "要求名称": {"type": "string"},
+                            "满足程度": {"enum": _SATISFACTION_LEVELS},
+                            "文档对应内容": {"type": "array", "items": {"type": "object"}},
+                        },
+                    },
+                },
+            },
+        },
+    },
+    "category_report": {
+        "type": "object",
+        "required": ["Category", "CategoryLawAnalysis", "SubCategoryAnalysis", "CategoryComplianceGuidance"],
+        "properties": {
+            "Category": {"type": "string"},
+            "CategoryLawAnalysis": {"type": "string"},
+            "SubCategoryAnalysis": {
+                "type": "object",
+                "additionalProperties": {"type": "object", "required": ["Coverage"]},
+            },
+            "CategoryComplianceGuidance": {"type": "string"},
+        },
+    },
+}
+
+# 路径深度为该值的要求项校验失败时剔除该项（根 → 详细分析 → 类别 → 第i项）
+_ITEM_DEPTH = 3
+
+_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    # 模型常把编号写成字符串 "18"，视为合法
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool)) or (isinstance(v, str) and v.strip().isdigit()),
+}
+
+Validator = Callable[[Any, Tuple, List[Tuple[Tuple, str]]], None]
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """将结构定义编译为嵌套闭包，校验时不再解释结构定义"""
+    checks: List[Validator] = []
+
+    if "type" in schema:
+        type_name = schema["type"]
+        type_check = _TYPES[type_name]
+
+        def check_type(value, path, errors):
+            if not type_check(value):
+                errors.append((path, f"应为 {type_name}"))
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = set(schema["enum"])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append((path, f"取值 {value!r} 不在 {sorted(allowed)} 中"))
+        checks.append(check_enum)
+
+    if "required" in schema:
+        required = list(schema["required"])
+
+        def check_required(value, path, errors):
+            if isinstance(value, dict):
+                for key in required:
+                    if key not in value:
+                        errors.append((path, f"缺少字段 {key}"))
+        checks.append(check_required)
+
+    if "properties" in schema:
+        props = {key: compile_schema(sub) for key, sub in schema["properties"].items()}
+
+        def check_props(value, path, errors):
+            if isinstance(value, dict):
+                for key, validator in props.items():
+                    if key in value:
+                        validator(value[key], path + (key,), errors)
+        checks.append(check_props)
+
+    if "additionalProperties" in schema:
+        extra = compile_schema(schema["additionalProperties"])
+        known = set(schema.get("properties", {}))
+
+        def check_extra(value, path, errors):
+            if isinstance(value, dict):
+                for key, sub in value.items():
+                    if key not in known:
+                        extra(sub, path + (key,), errors)
+        checks.append(check_extra)
+
+    if "items" in schema:
+        item_validator = compile_schema(schema["items"])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_validator(item, path + (i,), errors)
+        checks.append(check_items)
+
+    def validate(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+
+    return validate
+
+
+COMPILED_SCHEMAS: Dict[str, Validator] = {name: compile_schema(s) for name, s in SCHEMAS.items()}
+
+
+# ───────────────────────── 解析与定点修复 ─────────────────────────
+def _loads(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def extract_json_text(text: str) -> str:
+    """去掉 ```json``` 包裹及JSON前后的说明文字"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```[a-zA-Z]*\s*", "", text)
+        text = re.sub(r"\s*```$", "", text)
+    start = text.find("{")
+    if start > 0:
+        text = text[start:]
+    end = text.rfind("}")
+    if end != -1:
+        text = text[:end + 1]
+    return text
+
+
+def _prev_nonspace(text: str, pos: int) -> int:
+    i = pos - 1
+    while i >= 0 and text[i].isspace():
+        i -= 1
+    return i
+
+
+def _repair_at(text: str, err: json.JSONDecodeError) -> Optional[Tuple[str, str]]:
+    """根据报错类型在报错位置做一次局部修复，返回 (修复后文本, 修复说明)；无法修复时返回 None"""
+    pos, msg = err.pos, err.msg
+    ch = text[pos] if pos < len(text) else ""
+    prev = _prev_nonspace(text, pos)
+
+    if msg.startswith("Expecting ',' delimiter"):
+        if prev >= 0 and text[prev] == '"' and ch and ch not in '"{[]}-0123456789tfn':
+            # 字符串内未转义的引号："他说"好"的" → "他说\"好"的"
+            return text[:prev] + '\\' + text[prev:], f"转义位置{prev}的引号"
+        return text[:pos] + "," + text[pos:], f"在位置{pos}补充逗号"
+
+    if msg.startswith("Expecting property name") or msg.startswith("Expecting value"):
+        if ch and ch in "}]" and prev >= 0 and text[prev] == ",":
+            return text[:prev] + text[prev + 1:], f"删除位置{prev}的多余逗号"
+        for literal, replacement in (("True", "true"), ("False", "false"), ("None", "null")):
+            if text.startswith(literal, pos):
+                return text[:pos] + replacement + text[pos + len(literal):], f"位置{pos}的{literal}改为{replacement}"
+        if ch == "'":
+            end = text.find("'", pos + 1)
+            if end != -1:
+                inner = text[pos + 1:end].replace('"', '\\"')
+                return text[:pos] + '"' + inner + '"' + text[end + 1:], f"位置{pos}的单引号改为双引号"
+        return None
+
+    if msg.startswith("Invalid control character"):
+        escaped = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}.get(ch, " ")
+        return text[:pos] + escaped + text[pos + 1:], f"转义位置{pos}的控制字符"
+
+    if msg.startswith("Extra data"):
+        return text[:pos], f"截去位置{pos}之后的多余内容"
+
+    return None
+
+
+def loads_with_repair(text: str, max_repairs: int = 20) -> Tuple[Any, List[str]]:
+    """解析JSON，失败时按报错位置逐次定点修复，返回 (数据, 修复记录)"""
+    text = extract_json_text(text)
+    repairs: List[str] = []
+    try:
+        return _loads(text), repairs
+    except ValueError:
+        pass
+
+    for _ in range(max_repairs):
+        try:
+            # 标准库的报错信息更精确，用于定位修复点
+            return json.loads(text), repairs
+        except json.JSONDecodeError as err:
+            fixed = _repair_at(text, err)
+            if fixed is None:
+                raise ResponseParseError(f"JSON解析失败: {err}") from err
+            text, note = fixed
+            repairs.append(note)
+
+    try:
+        return json.loads(text), repairs
+    except json.JSONDecodeError as err:
+        raise ResponseParseError(f"JSON修复次数超过上限 {max_repairs}: {err}") from err
+
+
+# ───────────────────────── 对外接口 ─────────────────────────
+@dataclass
+class ParsedResponse:
+    """解析结果"""
+    data: Dict[str, Any]
+    repairs: List[str] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+    dropped_items: int = 0
+
+
+def _format_path(path: Tuple) -> str:
+    return "/".join(str(p) for p in path) or "<根>"
+
+
+def parse_response(text: str, schema: Optional[str] = None) -> ParsedResponse:
+    """解析并校验LLM响应（schema 为 None 时只解析不校验）；根结构不合法时抛出 ResponseParseError"""
+    data, repairs = loads_with_repair(text)
+    return validate_response(data, schema, repairs)
+
+
+def validate_response(data: Any, schema: Optional[str] = None, repairs: Optional[List[str]] = None) -> ParsedResponse:
+    """按结构定义校验已解析的数据（如流式解析恢复的部分结果），剔除不合法的要求项"""
+    repairs = repairs or []
+    if schema is None:
+        return ParsedResponse(data=data, repairs=repairs)
+
+    errors: List[Tuple[Tuple, str]] = []
+    COMPILED_SCHEMAS[schema](data, (), errors)
+
+    fatal = [f"{_format_path(p)}: {m}" for p, m in errors if len(p) < _ITEM_DEPTH - 1]
+    if fatal:
+        raise ResponseParseError("响应结构不合法: " + "; ".join(fatal))
+
+    # 剔除缺少必需字段或类型错误的要求项（以及类型错误的类别），其余问题仅记录
+    broken = {p for p, m in errors
+              if (len(p) == _ITEM_DEPTH and (m.startswith("缺少字段") or m.startswith("应为")))
+              or (len(p) == _ITEM_DEPTH - 1 and m.startswith("应为"))}
+    for path in sorted(broken, key=lambda p: (len(p), p[-1] if isinstance(p[-1], int) else 0), reverse=True):
+        parent = data
+        for key in path[:-1]:
+            parent = parent[key]
+        del parent[path[-1]]
+
+    issues = [f"{_format_path(p)}: {m}" for p, m in errors]
+    return ParsedResponse(data=data, repairs=repairs, issues=issues, dropped_items=len(broken))
+
+
+# ───────────────────────── 基准测试 ─────────────────────────
+def benchmark(repeat: int = 200) -> List[Dict[str, Any]]:
+    """对比不同输入下标准库解析与本模块解析（含修复与校验）的耗时"""
+    item = {"框架要求编号": 18, "框架要求名称": "外汇风险管理政策", "法规覆盖情况": "部分覆盖",
+            "法规要求内容": [{"条款编号": "第十条", "具体要求": "办理外汇登记" * 20, "原文内容": "原文" * 50}]}
+    valid = json.dumps({"文档标题": "基准", "详细分析": {"四、财务与市场风险": [item] * 40}}, ensure_ascii=False)
+    samples = {
+        "合法JSON": valid,
+        "代码块包裹": f"```json\n{valid}\n```",
+        "末尾多余逗号": valid[:-3] + ",]}}",
+        "缺少逗号": valid.replace("}, {", "} {", 3),
+    }
+
+    results = []
+    for name, text in samples.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            try:
+                json.loads(text)
+            except json.JSONDecodeError:
+                pass
+        stdlib = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parsed = parse_response(text, "regulation")
+        ours = (time.perf_counter() - start) / repeat
+
+        results.append({
+            "样本": name,
+            "字节数": len(text.encode("utf-8")),
+            "json.loads(毫秒)": round(stdlib * 1000, 3),
+            "parse_response(毫秒)": round(ours * 1000, 3),
+            "修复次数": len(parsed.repairs),
+            "后端": "orjson" if orjson is not None else "json",
+        })
+    return results
+
+
+if __name__ == "__main__":
+    for row in benchmark():
+        print(row)
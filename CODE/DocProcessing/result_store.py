@@ -0,0 +1,562 @@
+"""
+跨运行的结果库（SQLite）
+每次运行保存文档结果时同步写入 results.db，按 运行 → 文档 → 提供商 → 框架要求 → 条款 五张表规范化存储并建立索引，
+“各提供商在所有运行中对第14项要求的结论”之类的问题无需再逐个打开 Result/ 下的 JSON 文件。
+原文内容、具体要求、实施要求和按条切分的法规原文另建 FTS5 全文索引（汉字二元组分词，见 fulltext.py），
+“哪些法规提到负面清单”“外汇在哪里被讨论”可以毫秒级返回法规、条款和框架要求编号。
+导入器可把已有的 Result 目录（regulation_YYYYMMDD_HHMMSS/<文档>/<文档>_综合分析结果.json）回填入库；
+同一运行重复导入时先删除旧记录，结果不会重复。早期结果中没有“原文条款”，可用 --source-root 指定原文目录重新提取。
+用法:
+    python result_store.py import ../../Result --source-root ../..
+    python result_store.py requirement 14 --document 境外投资管理办法
+    python result_store.py search 负面清单
+    python result_store.py search 外汇 --field 条文 --all-runs
+    python result_store.py runs
+"""
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from articles import from_records, split_articles, to_records
+from docx_extractor import iter_docx_blocks
+from fulltext import index_text, match_query, snippet
+from pdf_extractor import extract_pages
+from stream_json import ID_KEYS
+from text_cleaner import clean_pages, clean_text
+from text_reader import read_text
+
+DEFAULT_DB_NAME = "results.db"
+SCHEMA_VERSION = 2
+# 全文索引的字段
+FIELD_ORIGINAL = "原文内容"
+FIELD_REQUIREMENT = "具体要求"
+FIELD_IMPLEMENTATION = "实施要求"
+FIELD_ARTICLE = "条文"
+SEARCH_FIELDS = (FIELD_ORIGINAL, FIELD_REQUIREMENT, FIELD_IMPLEMENTATION, FIELD_ARTICLE)
+_RUN_DIR_RE = re.compile(r"^(?P<mode>[a-z]+)_(?P<ts>\d{8}_\d{6})$")
+# 大类名称前的序号（如“一、治理与战略”），不同提供商有的带有的不带
+_CATEGORY_PREFIX_RE = re.compile(r"^[一二三四五六七八九十]+[、.．]\s*")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    run_dir     TEXT NOT NULL UNIQUE,
+    review_mode TEXT,
+    started_at  TEXT,
+    imported_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    id          INTEGER PRIMARY KEY,
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name        TEXT NOT NULL,
+    path        TEXT,
+    analyzed_at TEXT,
+    UNIQUE (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS provider_results (
+    id             INTEGER PRIMARY KEY,
+    document_id    INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    provider       TEXT NOT NULL,
+    model          TEXT,
+    analyzed_at    TEXT,
+    error          TEXT,
+    title          TEXT,
+    issuer         TEXT,
+    effective_date TEXT,
+    key_findings   TEXT,
+    advice         TEXT
+);
+CREATE TABLE IF NOT EXISTS requirements (
+    id                 INTEGER PRIMARY KEY,
+    provider_result_id INTEGER NOT NULL REFERENCES provider_results(id) ON DELETE CASCADE,
+    category           TEXT,
+    requirement_id     INTEGER,
+    requirement_name   TEXT,
+    answer             TEXT,
+    score              REAL,
+    implementation     TEXT,
+    penalties          TEXT,
+    source             TEXT,
+    raw                TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS clauses (
+    id               INTEGER PRIMARY KEY,
+    requirement_row  INTEGER NOT NULL REFERENCES requirements(id) ON DELETE CASCADE,
+    article          TEXT,
+    requirement_text TEXT,
+    level            TEXT,
+    subject          TEXT,
+    original_text    TEXT,
+    raw              TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    id          INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    number      TEXT,
+    key         TEXT,
+    text        TEXT NOT NULL,
+    digest      TEXT
+);
+-- 全文索引的内容表；FTS5 以外部内容方式引用，删除文档时由触发器同步删除索引
+CREATE TABLE IF NOT EXISTS search_entries (
+    id              INTEGER PRIMARY KEY,
+    document_id     INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    requirement_row INTEGER REFERENCES requirements(id) ON DELETE CASCADE,
+    field           TEXT NOT NULL,
+    article         TEXT,
+    content         TEXT NOT NULL,
+    tokens          TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    tokens, content='search_entries', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS search_entries_ai AFTER INSERT ON search_entries BEGIN
+    INSERT INTO search_index (rowid, tokens) VALUES (new.id, new.tokens);
+END;
+CREATE TRIGGER IF NOT EXISTS search_entries_ad AFTER DELETE ON search_entries BEGIN
+    INSERT INTO search_index (search_index, rowid, tokens) VALUES ('delete', old.id, old.tokens);
+END;
+CREATE INDEX IF NOT EXISTS idx_documents_name ON documents(name);
+CREATE INDEX IF NOT EXISTS idx_articles_document ON articles(document_id, key);
+CREATE INDEX IF NOT EXISTS idx_search_entries_document ON search_entries(document_id);
+CREATE INDEX IF NOT EXISTS idx_search_entries_requirement ON search_entries(requirement_row);
+CREATE INDEX IF NOT EXISTS idx_provider_results_document ON provider_results(document_id, provider);
+CREATE INDEX IF NOT EXISTS idx_provider_results_provider ON provider_results(provider);
+CREATE INDEX IF NOT EXISTS idx_requirements_result ON requirements(provider_result_id);
+CREATE INDEX IF NOT EXISTS idx_requirements_id ON requirements(requirement_id);
+CREATE INDEX IF NOT EXISTS idx_clauses_requirement ON clauses(requirement_row);
+CREATE INDEX IF NOT EXISTS idx_clauses_article ON clauses(article);
+"""
+
+
+def _requirement_id(item: Dict[str, Any]) -> Optional[int]:
+    for key in ID_KEYS:
+        value = item.get(key)
+        if value is None:
+            continue
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def _score(value: Any) -> Optional[float]:
+    """满足程度评分（如“7分”“7.5”）→ 数值"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r"\s*(\d+(?:\.\d+)?)", str(value or ""))
+    return float(match.group(1)) if match else None
+
+
+def _text(value: Any) -> Optional[str]:
+    """列表/字典字段（如要求建立的制度）以JSON存储，其余转为字符串"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def normalize_category(name: str) -> str:
+    return _CATEGORY_PREFIX_RE.sub("", name or "").strip()
+
+
+def read_source(path: Path) -> str:
+    """提取并清洗原文（与分析时相同的步骤），用于为早期结果补充原文条款"""
+    ext = path.suffix.lower()
+    if ext == ".pdf":
+        return clean_pages(extract_pages(path))[0]
+    if ext == ".docx":
+        return clean_text("\n".join(iter_docx_blocks(path)))[0]
+    return clean_text(read_text(path))[0]
+
+
+def parse_run_dir(name: str) -> Tuple[Optional[str], Optional[str]]:
+    """运行目录名 → (审查模式, 开始时间)；不符合命名规则时返回 (None, None)"""
+    m = _RUN_DIR_RE.match(name)
+    if not m:
+        return None, None
+    started = datetime.strptime(m.group("ts"), "%Y%m%d_%H%M%S")
+    return m.group("mode"), started.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class ResultStore:
+    """线程安全的结果库；每份文档在一个事务内写入"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self._migrate()
+
+    def _migrate(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"结果库版本 {version} 高于当前程序支持的版本 {SCHEMA_VERSION}: {self.path}")
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+            if 0 < version < 2:
+                # 第1版没有全文索引，按已入库的要求和条款补建
+                self._reindex()
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ─────────────── 写入 ───────────────
+    def _run_id(self, run_dir: str, review_mode: Optional[str] = None, started_at: Optional[str] = None) -> int:
+        row = self.conn.execute("SELECT id FROM runs WHERE run_dir = ?", (run_dir,)).fetchone()
+        if row:
+            return row["id"]
+        parsed_mode, parsed_start = parse_run_dir(Path(run_dir).name)
+        review_mode = review_mode or parsed_mode
+        started_at = started_at or parsed_start
+        cur = self.conn.execute(
+            "INSERT INTO runs (run_dir, review_mode, started_at, imported_at) VALUES (?, ?, ?, ?)",
+            (run_dir, review_mode, started_at, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        return cur.lastrowid
+
+    def add_document(self, run_dir: str, results: Dict[str, Any]) -> int:
+        """写入一份文档的综合分析结果（同一运行中的同名文档会被替换），返回文档行号"""
+        name = results.get("文档名称") or Path(results.get("文档路径", "")).name
+        with self._lock, self.conn:
+            run_id = self._run_id(str(run_dir), review_mode=results.get("审查模式"))
+            self.conn.execute("DELETE FROM documents WHERE run_id = ? AND name = ?", (run_id, name))
+            document_id = self.conn.execute(
+                "INSERT INTO documents (run_id, name, path, analyzed_at) VALUES (?, ?, ?, ?)",
+                (run_id, name, results.get("文档路径"), results.get("分析时间")),
+            ).lastrowid
+            for provider, pdata in results.get("LLM分析结果", {}).items():
+                if isinstance(pdata, dict):
+                    self._add_provider_result(document_id, provider, pdata)
+            self._add_articles(document_id, results.get("原文条款") or [])
+        return document_id
+
+    def _add_articles(self, document_id: int, records: List[Dict[str, Any]]):
+        for article in from_records(records):
+            self.conn.execute(
+                "INSERT INTO articles (document_id, number, key, text, digest) VALUES (?, ?, ?, ?, ?)",
+                (document_id, article.number, article.key, article.text, article.digest),
+            )
+            self._index(document_id, None, FIELD_ARTICLE, article.number, article.text)
+
+    def _index(self, document_id: int, requirement_row: Optional[int], field: str,
+               article: Optional[str], content: Optional[str]):
+        if not content:
+            return
+        self.conn.execute(
+            """INSERT INTO search_entries (document_id, requirement_row, field, article, content, tokens)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (document_id, requirement_row, field, article, content, index_text(content)),
+        )
+
+    def _add_provider_result(self, document_id: int, provider: str, pdata: Dict[str, Any]):
+        error = pdata.get("错误") or pdata.get(f"错误_{provider}")
+        result_id = self.conn.execute(
+            """INSERT INTO provider_results (document_id, provider, model, analyzed_at, error, title, issuer,
+                                             effective_date, key_findings, advice)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                document_id, provider, pdata.get("LLM模型"), pdata.get("分析日期"), _text(error),
+                pdata.get("文档标题"), pdata.get("颁布机构"), pdata.get("生效日期"),
+                _text(pdata.get("关键发现")), _text(pdata.get("合规建议")),
+            ),
+        ).lastrowid
+        for category, items in (pdata.get("详细分析") or {}).items():
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                if isinstance(item, dict):
+                    self._add_requirement(document_id, result_id, normalize_category(category), item)
+
+    def _add_requirement(self, document_id: int, result_id: int, category: str, item: Dict[str, Any]):
+        row_id = self.conn.execute(
+            """INSERT INTO requirements (provider_result_id, category, requirement_id, requirement_name, answer,
+                                         score, implementation, penalties, source, raw)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                result_id, category, _requirement_id(item),
+                item.get("框架要求名称") or item.get("要求名称"),
+                _text(item.get("法规覆盖情况") or item.get("满足程度")),
+                _score(item.get("满足程度评分")),
+                _text(item.get("实施要求") or item.get("改进建议")),
+                _text(item.get("处罚措施") or item.get("存在问题")),
+                item.get("判定来源"),
+                json.dumps(item, ensure_ascii=False),
+            ),
+        ).lastrowid
+        self._index(document_id, row_id, FIELD_IMPLEMENTATION, None, _text(item.get("实施要求")))
+        # 法规审查为“法规要求内容”，文档审查为“文档对应内容”
+        clauses = item.get("法规要求内容") or item.get("文档对应内容") or []
+        for c in clauses:
+            if not isinstance(c, dict):
+                continue
+            article = _text(c.get("条款编号") or c.get("章节位置"))
+            requirement_text = _text(c.get("具体要求") or c.get("总体要求") or c.get("具体内容"))
+            original_text = _text(c.get("原文内容"))
+            self.conn.execute(
+                """INSERT INTO clauses (requirement_row, article, requirement_text, level, subject, original_text, raw)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    row_id, article, requirement_text,
+                    _text(c.get("强制等级") or c.get("内容评价")),
+                    _text(c.get("适用对象")),
+                    original_text,
+                    json.dumps(c, ensure_ascii=False),
+                ),
+            )
+            self._index(document_id, row_id, FIELD_REQUIREMENT, article, requirement_text)
+            self._index(document_id, row_id, FIELD_ORIGINAL, article, original_text)
+
+    def reindex(self):
+        with self._lock, self.conn:
+            self._reindex()
+
+    def _reindex(self):
+        """按已入库的要求、条款和条文重建全文索引"""
+        self.conn.execute("DELETE FROM search_entries")
+        self.conn.execute("INSERT INTO search_index (search_index) VALUES ('delete-all')")
+        rows = self.conn.execute(
+            """SELECT p.document_id, q.id AS row_id, q.raw FROM requirements q
+               JOIN provider_results p ON p.id = q.provider_result_id"""
+        ).fetchall()
+        for row in rows:
+            item = json.loads(row["raw"])
+            self._index(row["document_id"], row["row_id"], FIELD_IMPLEMENTATION, None, _text(item.get("实施要求")))
+        for row in self.conn.execute(
+            """SELECT p.document_id, c.requirement_row, c.article, c.requirement_text, c.original_text
+               FROM clauses c JOIN requirements q ON q.id = c.requirement_row
+               JOIN provider_results p ON p.id = q.provider_result_id"""
+        ).fetchall():
+            self._index(row["document_id"], row["requirement_row"], FIELD_REQUIREMENT, row["article"],
+                        row["requirement_text"])
+            self._index(row["document_id"], row["requirement_row"], FIELD_ORIGINAL, row["article"],
+                        row["original_text"])
+        for row in self.conn.execute("SELECT document_id, number, text FROM articles").fetchall():
+            self._index(row["document_id"], None, FIELD_ARTICLE, row["number"], row["text"])
+
+    # ─────────────── 回填 ───────────────
+    def import_run(self, run_dir: Path, source_root: Optional[Path] = None) -> int:
+        """导入一个运行目录下的所有综合分析结果，返回导入的文档数；source_root 用于补充缺少的原文条款"""
+        run_dir = Path(run_dir)
+        count = 0
+        for json_file in sorted(run_dir.glob("*/*_综合分析结果.json")):
+            try:
+                with json_file.open(encoding="utf-8") as f:
+                    results = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"  - 跳过无法读取的结果文件 {json_file}: {e}")
+                continue
+            if source_root is not None and "原文条款" not in results:
+                self._attach_source(results, Path(source_root))
+            self.add_document(str(run_dir.resolve()), results)
+            count += 1
+        return count
+
+    @staticmethod
+    def _attach_source(results: Dict[str, Any], source_root: Path):
+        """从原文件重新提取并切分条文（结果中的文档路径相对于运行时的工作目录）"""
+        relative = Path(results.get("文档路径", ""))
+        candidates = [source_root / relative, *source_root.rglob(relative.name)] if relative.name else []
+        source = next((p for p in candidates if p.is_file()), None)
+        if source is None:
+            return
+        try:
+            results["原文条款"] = to_records(split_articles(read_source(source)))
+        except Exception as e:
+            print(f"  - 提取原文失败 {source}: {e}")
+
+    def import_tree(self, root: Path, source_root: Optional[Path] = None) -> Tuple[int, int]:
+        """导入 root 下的所有运行目录，返回 (运行数, 文档数)"""
+        runs = documents = 0
+        for run_dir in sorted(p for p in Path(root).iterdir() if p.is_dir()):
+            count = self.import_run(run_dir, source_root)
+            if count:
+                runs += 1
+                documents += count
+        return runs, documents
+
+    # ─────────────── 查询 ───────────────
+    def _query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def runs(self) -> List[Dict[str, Any]]:
+        return self._query(
+            """SELECT r.run_dir AS 运行目录, r.review_mode AS 审查模式, r.started_at AS 开始时间,
+                      COUNT(d.id) AS 文档数
+               FROM runs r LEFT JOIN documents d ON d.run_id = r.id
+               GROUP BY r.id ORDER BY r.started_at, r.id"""
+        )
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """所有已入库的文档，最近的运行在前"""
+        return self._query(
+            """SELECT d.name, d.path, r.run_dir, r.started_at,
+                      EXISTS (SELECT 1 FROM articles a WHERE a.document_id = d.id) AS has_articles
+               FROM documents d JOIN runs r ON r.id = d.run_id
+               ORDER BY r.started_at DESC, d.id DESC"""
+        )
+
+    def requirement_history(
+        self,
+        requirement_id: int,
+        document: Optional[str] = None,
+        provider: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """某项框架要求在所有运行、所有提供商中的结论；document 按文档名称模糊匹配"""
+        sql = """
+            SELECT r.started_at AS 运行时间, d.name AS 文档名称, p.provider AS 提供商, p.model AS 模型,
+                   q.category AS 大类, q.requirement_name AS 要求名称, q.answer AS 结论, q.score AS 评分,
+                   q.implementation AS 实施要求, COUNT(c.id) AS 条款数
+            FROM requirements q
+            JOIN provider_results p ON p.id = q.provider_result_id
+            JOIN documents d ON d.id = p.document_id
+            JOIN runs r ON r.id = d.run_id
+            LEFT JOIN clauses c ON c.requirement_row = q.id
+            WHERE q.requirement_id = ?"""
+        params: List[Any] = [requirement_id]
+        if document:
+            sql += " AND d.name LIKE ?"
+            params.append(f"%{document}%")
+        if provider:
+            sql += " AND p.provider = ?"
+            params.append(provider)
+        sql += " GROUP BY q.id ORDER BY d.name, r.started_at, p.provider"
+        return self._query(sql, tuple(params))
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        document: Optional[str] = None,
+        field: Optional[str] = None,
+        all_runs: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        全文检索：返回命中的法规、条款、框架要求编号和片段，按相关度排序；
+        默认只检索每份文档最近一次运行的结果，同一段文字被多个提供商引用时合并为一条
+        """
+        expression = match_query(query)
+        if not expression:
+            return []
+        sql = """
+            SELECT e.field, e.article, e.content, d.name, r.started_at, p.provider,
+                   q.requirement_id, q.requirement_name, bm25(search_index) AS rank
+            FROM search_index
+            JOIN search_entries e ON e.id = search_index.rowid
+            JOIN documents d ON d.id = e.document_id
+            JOIN runs r ON r.id = d.run_id
+            LEFT JOIN requirements q ON q.id = e.requirement_row
+            LEFT JOIN provider_results p ON p.id = q.provider_result_id
+            WHERE search_index MATCH ?"""
+        params: List[Any] = [expression]
+        if not all_runs:
+            sql += """ AND r.started_at = (SELECT MAX(r2.started_at) FROM documents d2
+                                           JOIN runs r2 ON r2.id = d2.run_id WHERE d2.name = d.name)"""
+        if document:
+            sql += " AND d.name LIKE ?"
+            params.append(f"%{document}%")
+        if field:
+            sql += " AND e.field = ?"
+            params.append(field)
+        sql += " ORDER BY rank"
+
+        hits: Dict[Tuple, Dict[str, Any]] = {}
+        for row in self._query(sql, tuple(params)):
+            key = (row["name"], row["started_at"], row["field"], row["article"], row["requirement_id"], row["content"])
+            hit = hits.get(key)
+            if hit is None:
+                if len(hits) >= limit:
+                    continue
+                hit = hits[key] = {
+                    "法规": row["name"],
+                    "条款": row["article"],
+                    "要求编号": row["requirement_id"],
+                    "要求名称": row["requirement_name"],
+                    "字段": row["field"],
+                    "提供商": [],
+                    "运行时间": row["started_at"],
+                    "片段": snippet(row["content"], query),
+                }
+            if row["provider"] and row["provider"] not in hit["提供商"]:
+                hit["提供商"].append(row["provider"])
+        return list(hits.values())
+
+
+def _print_rows(rows: List[Dict[str, Any]]):
+    if not rows:
+        print("没有匹配的记录")
+        return
+    for row in rows:
+        print(" | ".join(f"{k}: {v}" for k, v in row.items() if v is not None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="跨运行的分析结果库")
+    parser.add_argument("--db", default=str(Path("output_results") / DEFAULT_DB_NAME),
+                        help=f"结果库路径（默认 output_results/{DEFAULT_DB_NAME}）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_import = sub.add_parser("import", help="回填已有的结果目录（如 Result/）")
+    p_import.add_argument("root", help="包含各运行目录的根目录，或单个运行目录")
+    p_import.add_argument("--source-root", help="原文所在目录；早期结果缺少原文条款时从这里重新提取")
+    p_req = sub.add_parser("requirement", help="查询某项框架要求在各运行中的结论")
+    p_req.add_argument("requirement_id", type=int)
+    p_req.add_argument("--document", help="按文档名称过滤（模糊匹配）")
+    p_req.add_argument("--provider", help="按提供商过滤")
+    p_search = sub.add_parser("search", help="全文检索原文内容、具体要求、实施要求和法规条文")
+    p_search.add_argument("query", help="检索词，多个词以空格分隔（需全部命中）")
+    p_search.add_argument("--limit", type=int, default=20)
+    p_search.add_argument("--document", help="按文档名称过滤（模糊匹配）")
+    p_search.add_argument("--field", choices=SEARCH_FIELDS, help="只检索某个字段")
+    p_search.add_argument("--all-runs", action="store_true", help="检索所有运行（默认只检索各文档最近一次运行）")
+    p_search.add_argument("--reindex", action="store_true", help="检索前重建全文索引")
+    sub.add_parser("runs", help="列出已入库的运行")
+    args = parser.parse_args()
+
+    with ResultStore(Path(args.db)) as store:
+        if args.command == "import":
+            root = Path(args.root)
+            source_root = Path(args.source_root) if args.source_root else None
+            if parse_run_dir(root.name)[0]:
+                runs, documents = 1, store.import_run(root, source_root)
+            else:
+                runs, documents = store.import_tree(root, source_root)
+            print(f"已导入 {runs} 个运行、{documents} 份文档到 {args.db}")
+        elif args.command == "requirement":
+            _print_rows(store.requirement_history(args.requirement_id, args.document, args.provider))
+        elif args.command == "search":
+            if args.reindex:
+                store.reindex()
+            started = time.perf_counter()
+            hits = store.search(args.query, args.limit, args.document, args.field, args.all_runs)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for hit in hits:
+                hit["提供商"] = "、".join(hit["提供商"]) or None
+            _print_rows(hits)
+            print(f"共 {len(hits)} 条，用时 {elapsed_ms:.1f} ms")
+        else:
+            _print_rows(store.runs())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+提供商路由策略
+根据历史记录的各提供商成本、耗时和结论一致率，为每份文档选择最便宜/最快且质量达标的提供商；
+结论与历史不一致或置信度低时，再升级到其余提供商复核。
+统计数据保存在 JSON 文件中，跨批次累积。
+"""
+import json
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from stream_json import ID_KEYS
+from text_cleaner import estimate_tokens
+
+# 各提供商的参考价格（美元/百万tokens，输入与输出），仅用于相对比较
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "deepseek": {"input": 0.27, "output": 1.10},
+    "openai": {"input": 0.15, "output": 0.60},
+    "anthropic": {"input": 15.0, "output": 75.0},
+}
+
+# 法规审查与文档审查两种格式中的结论字段
+ANSWER_KEYS = ("法规覆盖情况", "满足程度")
+# 声称有覆盖/满足时应当附带原文依据
+COVERED_ANSWERS = {"完全覆盖", "部分覆盖", "完全满足", "基本满足", "部分满足"}
+EVIDENCE_KEYS = ("法规要求内容", "文档对应内容")
+
+
+@dataclass
+class ProviderStats:
+    """单个提供商的累计统计"""
+    runs: int = 0
+    failures: int = 0
+    total_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    comparisons: int = 0  # 与其他提供商同时给出结论的要求项数
+    agreements: int = 0  # 其中与多数结论一致的项数
+
+    @property
+    def avg_seconds(self) -> Optional[float]:
+        succeeded = self.runs - self.failures
+        return self.total_seconds / succeeded if succeeded > 0 else None
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.runs if self.runs else 0.0
+
+    @property
+    def agreement_rate(self) -> Optional[float]:
+        return self.agreements / self.comparisons if self.comparisons else None
+
+    def avg_cost(self, price: Dict[str, float]) -> Optional[float]:
+        """每份文档的平均花费（美元）"""
+        succeeded = self.runs - self.failures
+        if succeeded <= 0:
+            return None
+        cost = (self.input_tokens * price["input"] + self.output_tokens * price["output"]) / 1_000_000
+        return cost / succeeded
+
+
+def _items(result: Dict[str, Any], model_only: bool = True) -> Iterator[Dict[str, Any]]:
+    """遍历单个提供商结果中的要求项；model_only 时跳过非本次模型给出的结论：
+    预筛选直接判定的项（带“判定来源”）和增量分析从上一版本沿用的大类，各提供商的这些结论相同，不能用于比较"""
+    carried = set((result.get("增量分析") or {}).get("沿用大类") or []) if model_only else set()
+    for category, items in result.get("详细分析", {}).items():
+        if not isinstance(items, list) or category in carried:
+            continue
+        for item in items:
+            if isinstance(item, dict) and not (model_only and item.get("判定来源")):
+                yield item
+
+
+def _answers(result: Dict[str, Any], model_only: bool = True) -> Dict[str, Any]:
+    """从单个提供商的结果中取出 {要求编号: 结论}"""
+    answers = {}
+    for item in _items(result, model_only):
+        req_id = next((item[k] for k in ID_KEYS if k in item), None)
+        answer = next((item[k] for k in ANSWER_KEYS if k in item), None)
+        if req_id is not None and answer is not None:
+            answers[str(req_id)] = answer
+    return answers
+
+
+def has_errors(result: Dict[str, Any]) -> bool:
+    """整体失败（错误）或部分框架块失败（错误_<提供商>）"""
+    return "错误" in result or any(key.startswith("错误_") for key in result)
+
+
+def low_confidence_reasons(result: Dict[str, Any], expected_items: int = 0) -> List[str]:
+    """判断单个提供商的结果是否可信度低，返回原因列表"""
+    reasons = []
+    if has_errors(result):
+        reasons.append("存在调用错误")
+    if result.get("截断恢复记录"):
+        reasons.append("响应被截断")
+    unrecovered = [r for r in result.get("补充请求记录", []) if set(r["缺失编号"]) - set(r["补回编号"])]
+    if unrecovered:
+        reasons.append("补充请求后仍缺少要求项")
+    if expected_items and len(_answers(result, model_only=False)) < expected_items:
+        reasons.append("要求项不完整")
+
+    unsupported = 0
+    for item in _items(result):
+        answer = next((item[k] for k in ANSWER_KEYS if k in item), None)
+        evidence = next((item[k] for k in EVIDENCE_KEYS if k in item), None)
+        if answer in COVERED_ANSWERS and not evidence:
+            unsupported += 1
+        confidence = item.get("置信度")
+        if isinstance(confidence, (int, float)) and confidence < 0.5:
+            unsupported += 1
+    if unsupported:
+        reasons.append(f"{unsupported} 项结论缺少原文依据或置信度低")
+    return reasons
+
+
+class RoutingPolicy:
+    """基于统计数据的成本/耗时感知路由"""
+
+    def __init__(
+        self,
+        stats_path: Path,
+        prices: Optional[Dict[str, Dict[str, float]]] = None,
+        min_agreement: float = 0.8,
+        min_comparisons: int = 50,
+        max_failure_rate: float = 0.2,
+        latency_weight: float = 0.5,
+    ):
+        self.stats_path = Path(stats_path)
+        self.prices = prices or DEFAULT_PRICES
+        self.min_agreement = min_agreement
+        self.min_comparisons = min_comparisons
+        self.max_failure_rate = max_failure_rate
+        self.latency_weight = latency_weight
+        self.stats: Dict[str, ProviderStats] = {}
+        # {文档名称: {要求编号: 结论}}
+        self.history: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    # ─────────────── 持久化 ───────────────
+    def load(self):
+        if not self.stats_path.exists():
+            return
+        data = json.loads(self.stats_path.read_text(encoding="utf-8"))
+        self.stats = {name: ProviderStats(**s) for name, s in data.get("提供商统计", {}).items()}
+        self.history = data.get("历史结论", {})
+
+    def save(self):
+        self.stats_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "提供商统计": {name: asdict(s) for name, s in self.stats.items()},
+            "历史结论": self.history,
+        }
+        self.stats_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    # ─────────────── 路由决策 ───────────────
+    def qualified(self, provider: str) -> bool:
+        """质量达标：有足够的对比样本、一致率达标且失败率不高"""
+        stats = self.stats.get(provider)
+        if stats is None or stats.comparisons < self.min_comparisons:
+            return False
+        return stats.agreement_rate >= self.min_agreement and stats.failure_rate <= self.max_failure_rate
+
+    def choose(self, candidates: List[str]) -> Optional[str]:
+        """在质量达标的提供商中选择成本与耗时综合最优者；均未达标时返回 None（全部调用以积累统计）"""
+        eligible = []
+        for name in candidates:
+            stats = self.stats.get(name)
+            if not self.qualified(name):
+                continue
+            cost = stats.avg_cost(self.prices.get(name, {"input": 0.0, "output": 0.0}))
+            if cost is None or stats.avg_seconds is None:
+                continue
+            eligible.append((name, cost, stats.avg_seconds))
+        if not eligible:
+            return None
+
+        min_cost = min(cost for _, cost, _ in eligible) or 1e-9
+        min_seconds = min(seconds for _, _, seconds in eligible) or 1e-9
+        scored = [
+            (cost / min_cost + self.latency_weight * seconds / min_seconds, name)
+            for name, cost, seconds in eligible
+        ]
+        return min(scored)[1]
+
+    def escalation_reasons(self, document: str, result: Dict[str, Any], expected_items: int = 0) -> List[str]:
+        """单个提供商的结果需要升级复核的原因；为空表示可以直接采用"""
+        reasons = low_confidence_reasons(result, expected_items)
+        previous = self.history.get(document)
+        if previous:
+            changed = [rid for rid, answer in _answers(result).items()
+                       if rid in previous and previous[rid] != answer]
+            if changed:
+                reasons.append(f"{len(changed)} 项结论与历史不一致")
+        return reasons
+
+    # ─────────────── 统计更新 ───────────────
+    def record_run(self, provider: str, seconds: float, result: Dict[str, Any], prompt_tokens: int = 0):
+        """记录一次提供商对整份文档的分析"""
+        stats = self.stats.setdefault(provider, ProviderStats())
+        stats.runs += 1
+        # 部分框架块失败的结果不完整，不能作为成本和耗时的样本
+        if has_errors(result):
+            stats.failures += 1
+            return
+        stats.total_seconds += seconds
+        metrics = result.get("调用指标")
+        if metrics:
+            stats.input_tokens += sum(m.get("input_tokens") or 0 for m in metrics)
+            stats.output_tokens += sum(m.get("output_tokens") or 0 for m in metrics)
+        else:
+            # 同步调用没有用量回传，按文本长度估算
+            stats.input_tokens += prompt_tokens
+            stats.output_tokens += estimate_tokens(json.dumps(result.get("详细分析", {}), ensure_ascii=False))
+
+    def record_results(self, document: str, results: Dict[str, Dict[str, Any]]):
+        """根据本次各提供商的结论更新一致率与历史结论"""
+        answers = {name: _answers(r) for name, r in results.items() if "错误" not in r}
+        if not answers:
+            return
+
+        if len(answers) == 1:
+            self.history[document] = next(iter(answers.values()))
+            return
+
+        consensus = {}
+        for rid in set().union(*answers.values()):
+            votes = Counter(a[rid] for a in answers.values() if rid in a)
+            if sum(votes.values()) < 2:
+                continue
+            answer, count = votes.most_common(1)[0]
+            majority = count * 2 > sum(votes.values())
+            if majority:
+                consensus[rid] = answer
+            for name, provider_answers in answers.items():
+                if rid in provider_answers:
+                    stats = self.stats.setdefault(name, ProviderStats())
+                    stats.comparisons += 1
+                    if majority and provider_answers[rid] == answer:
+                        stats.agreements += 1
+        if consensus:
+            self.history[document] = {**self.history.get(document, {}), **consensus}
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = {}
+        for name, stats in self.stats.items():
+            cost = stats.avg_cost(self.prices.get(name, {"input": 0.0, "output": 0.0}))
+            summary[name] = {
+                "调用次数": stats.runs,
+                "失败率": round(stats.failure_rate, 3),
+                "平均耗时秒": round(stats.avg_seconds, 2) if stats.avg_seconds is not None else None,
+                "平均花费美元": round(cost, 4) if cost is not None else None,
+                "结论一致率": round(stats.agreement_rate, 3) if stats.agreement_rate is not None else None,
+                "质量达标": self.qualified(name),
+            }
+        return summary
@@ -0,0 +1,164 @@
+"""
+流式JSON增量解析模块
+边接收LLM输出边扫描，"详细分析"下每个类别数组中的要求项一闭合就立即解析；
+输出被截断时可以从已闭合的部分中恢复结果，收齐全部要求编号后可提前结束流
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+DETAIL_KEY = "详细分析"
+# 法规审查与文档审查两种格式中的要求编号字段
+ID_KEYS = ("框架要求编号", "要求编号")
+
+
+class StreamingResultParser:
+    """针对分析结果格式的增量JSON扫描器"""
+
+    def __init__(self, expected_ids: Optional[Iterable[int]] = None):
+        self.expected_ids: Set[int] = set(expected_ids or [])
+        self.received_ids: Set[int] = set()
+        self.items: Dict[str, List[Dict[str, Any]]] = {}
+        self.top_level: Dict[str, Any] = {}
+
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        # 容器栈：每项为 [类型 "{"/"[", 该容器对应的键, 起始位置]
+        self._stack: List[List[Any]] = []
+        self._pending_key: Optional[str] = None
+        # 根对象当前字段的键及其值的起始位置
+        self._top_key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._finished = False
+
+    # ─────────────── 对外接口 ───────────────
+    def feed(self, text: str) -> bool:
+        """输入一段流式文本；返回 True 表示所有期望的要求编号均已收到"""
+        self._text += text
+        self._scan()
+        return self.is_complete
+
+    @property
+    def is_complete(self) -> bool:
+        return bool(self.expected_ids) and self.expected_ids <= self.received_ids
+
+    @property
+    def finished(self) -> bool:
+        """根对象是否已完整闭合"""
+        return self._finished
+
+    def salvage(self) -> Dict[str, Any]:
+        """返回目前已完整解析的部分结果"""
+        result = {k: v for k, v in self.top_level.items() if k != DETAIL_KEY}
+        result[DETAIL_KEY] = {cat: list(items) for cat, items in self.items.items()}
+        return result
+
+    # ─────────────── 扫描状态机 ───────────────
+    def _scan(self):
+        text = self._text
+        i = self._pos
+        n = len(text)
+        while i < n and not self._finished:
+            ch = text[i]
+
+            if not self._started:
+                # 跳过根对象之前的内容（如 ```json 标记）
+                if ch == "{":
+                    self._started = True
+                    self._stack.append(["{", None, i])
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    try:
+                        self._last_string = json.loads(text[self._string_start:i + 1])
+                    except json.JSONDecodeError:
+                        self._last_string = text[self._string_start + 1:i]
+                i += 1
+                continue
+
+            depth = len(self._stack)
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                self._mark_value_start(i, depth)
+            elif ch in "{[":
+                self._mark_value_start(i, depth)
+                key = self._pending_key if self._stack[-1][0] == "{" else None
+                self._stack.append([ch, key, i])
+                self._pending_key = None
+            elif ch in "}]":
+                self._close_container(i)
+            elif ch == ":" and self._stack[-1][0] == "{":
+                self._pending_key = self._last_string
+                if depth == 1:
+                    self._top_key = self._last_string
+                    self._value_start = None
+            elif ch == ",":
+                if depth == 1:
+                    self._finish_top_level_value(i)
+            elif not ch.isspace():
+                self._mark_value_start(i, depth)
+            i += 1
+
+        self._pos = i
+
+    def _mark_value_start(self, i: int, depth: int):
+        if depth == 1 and self._top_key is not None and self._value_start is None:
+            self._value_start = i
+
+    def _finish_top_level_value(self, end: int):
+        if self._top_key is not None and self._value_start is not None:
+            raw = self._text[self._value_start:end].strip()
+            try:
+                self.top_level[self._top_key] = json.loads(raw)
+            except json.JSONDecodeError:
+                pass
+        self._top_key = None
+        self._value_start = None
+
+    def _close_container(self, i: int):
+        kind, key, start = self._stack.pop()
+        depth = len(self._stack)
+
+        if depth == 0:
+            # 根对象闭合
+            self._finish_top_level_value(i)
+            self._finished = True
+            return
+
+        path = [frame[1] for frame in self._stack]
+        # 要求项：根 → 详细分析 → 类别数组 → 对象
+        if kind == "{" and depth == 3 and path[1] == DETAIL_KEY and self._stack[2][0] == "[":
+            category = self._stack[2][1]
+            try:
+                item = json.loads(self._text[start:i + 1])
+            except json.JSONDecodeError:
+                return
+            self.items.setdefault(category, []).append(item)
+            for id_key in ID_KEYS:
+                if id_key in item:
+                    try:
+                        self.received_ids.add(int(item[id_key]))
+                    except (TypeError, ValueError):
+                        pass
+                    break
+        elif kind == "[" and depth == 2 and path[1] == DETAIL_KEY:
+            self.items.setdefault(key, [])
+
+
+def salvage_json(text: str) -> Dict[str, Any]:
+    """从（可能被截断的）完整文本中恢复已闭合的部分结果"""
+    parser = StreamingResultParser()
+    parser.feed(text)
+    return parser.salvage()
@@ -0,0 +1,53 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from articles import article_key, chinese_to_int, from_records, split_articles, to_records
+from fulltext import bigrams, match_query, snippet
+
+REGULATION = """境外投资管理办法
+第一章 总则
+第一条 为了促进和规范境外投资，制定本办法。
+第二条 本办法所称境外投资，是指企业通过新设、并购及其他方式在境外拥有非金融企业。
+第二章 备案和核准
+第十二条 企业境外投资涉及敏感国家和地区、敏感行业的，实行核准管理。
+"""
+
+
+def test_split_articles_by_article_number():
+    articles = split_articles(REGULATION)
+    assert [a.key for a in articles] == ["序言", "第1条", "第2条", "第12条"]
+    assert articles[0].text == "境外投资管理办法"
+    # 章标题不计入相邻条文
+    assert "第二章" not in articles[2].text
+    assert articles[3].number == "第十二条"
+
+
+def test_split_articles_by_section_when_no_articles():
+    articles = split_articles("关于进一步引导和规范境外投资方向的指导意见\n一、总体要求\n内容\n二、基本原则\n坚持企业主体。")
+    assert [a.key for a in articles] == ["序言", "1、", "2、"]
+
+
+def test_digest_ignores_whitespace_and_records_round_trip():
+    a, b = split_articles("第一条 企业应当 报告。")[0], split_articles("第一条 企业应当报告。")[0]
+    assert a.digest == b.digest
+    assert from_records(to_records([a]))[0] == a
+
+
+def test_article_key_and_numerals():
+    assert chinese_to_int("二十三") == 23
+    assert chinese_to_int("一百零五") == 105
+    assert chinese_to_int("十") == 10
+    assert article_key("第三条第二款") == "第3条"
+    assert article_key("第3条") == "第3条"
+    assert article_key("二、基本原则") == "2、"
+    assert article_key("附件") is None
+
+
+def test_bigram_tokenizer_and_query():
+    assert bigrams("负面清单") == ["负面", "面清", "清单"]
+    assert bigrams("外汇，ODI备案") == ["外汇", "odi", "备案"]
+    assert match_query("负面清单 外汇") == '"负面 面清 清单" AND "外汇"'
+    assert match_query("汇") == "汇*"
+    assert match_query("，") == ""
+    assert snippet("企业不得投资负面清单所列行业", "负面清单", width=2) == "…投资【负面清单】所列…"
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import os
+import sys
+import types
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+sys.modules.setdefault('docx', types.SimpleNamespace(Document=None))
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("anthropic")
+
+from async_llm import AsyncLLMClient
+from config import GlobalConfig, LLMConfig, ReviewMode
+from mock_server import MockBehavior, MockLLMServer
+from prompt import REGULATORY_FRAMEWORK
+from regulation_analyzer import RegulationAnalyzer
+
+
+@pytest.fixture
+def server():
+    srv = MockLLMServer(port=0, behavior=MockBehavior(latency="fixed", latency_ms=0, seed=3))
+    srv.start_in_thread()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _prompt():
+    chunk = dict(list(REGULATORY_FRAMEWORK.items())[:1])
+    analyzer = RegulationAnalyzer.__new__(RegulationAnalyzer)
+    return analyzer.create_analysis_prompt("第一条 企业应当建立境外投资决策机制。", chunk)
+
+
+def test_complete_streams_from_openai_and_anthropic_endpoints(server):
+    openai_llm = LLMConfig(provider="mock", api_key="mock", model="mock-model", base_url=server.base_url)
+    # Anthropic SDK 自行拼接 /v1/messages
+    anthropic_llm = LLMConfig(provider="anthropic", api_key="mock", model="mock-model",
+                              base_url=server.base_url[:-len("/v1")])
+    deltas = []
+
+    async def run():
+        client = AsyncLLMClient(max_in_flight=2, timeout=30)
+        try:
+            return await asyncio.gather(
+                client.complete(openai_llm, "sys", _prompt(), on_delta=deltas.append),
+                client.complete(anthropic_llm, "sys", _prompt()),
+            )
+        finally:
+            await client.aclose()
+
+    for response in asyncio.run(run()):
+        assert json.loads(response.content)["详细分析"]
+        assert not response.stopped_early
+        metrics = response.metrics
+        assert metrics.ttft is not None and metrics.duration >= metrics.ttft
+        assert metrics.output_tokens > 0
+    assert len(deltas) > 1
+    assert server.stats["requests"] == 2
+
+
+def test_complete_stops_early_when_callback_asks(server):
+    llm = LLMConfig(provider="mock", api_key="mock", model="mock-model", base_url=server.base_url)
+    client = AsyncLLMClient(timeout=30)
+
+    async def run():
+        try:
+            return await client.complete(llm, "sys", _prompt(), on_delta=lambda text: True)
+        finally:
+            await client.aclose()
+
+    response = asyncio.run(run())
+    assert response.stopped_early
+    with pytest.raises(ValueError):
+        json.loads(response.content)
+    # 提前结束的请求不计入耗时分位
+    assert client.latency.percentile(llm, 0.9) is None
+
+
+def test_aanalyze_with_all_llms_against_mock_server(server, tmp_path):
+    document = tmp_path / "境外投资管理办法.txt"
+    document.write_text("第一条 企业应当建立境外投资决策机制。\n第二条 企业应当防范外汇风险。", encoding="utf-8")
+    cfg = GlobalConfig(
+        review_mode=ReviewMode.REGULATION,
+        llm_configs={"mock": LLMConfig(provider="mock", api_key="mock", model="mock-model", base_url=server.base_url)},
+        input_path=str(tmp_path),
+        output_path=str(tmp_path / "out"),
+        categories_per_call=4,
+    )
+    analyzer = RegulationAnalyzer(cfg)
+
+    async def run():
+        client = AsyncLLMClient(timeout=30)
+        try:
+            return await analyzer.aanalyze_with_all_llms(str(document), client)
+        finally:
+            await client.aclose()
+
+    results = asyncio.run(run())
+    mock = results["LLM分析结果"]["mock"]
+    assert not [key for key in mock if key.startswith("错误")]
+    returned = {item["框架要求编号"] for items in mock["详细分析"].values() for item in items}
+    assert returned == {req["number"] for reqs in REGULATORY_FRAMEWORK.values() for req in reqs}
+    assert [a["条款编号"] for a in results["原文条款"]] == ["第一条", "第二条"]
+    assert server.stats["requests"] == -(-len(REGULATORY_FRAMEWORK) // 4)
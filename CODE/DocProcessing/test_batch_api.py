@@ -0,0 +1,145 @@
+import json
+import os
+import sys
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+sys.modules.setdefault('docx', types.SimpleNamespace(Document=None))
+
+from batch_api import BatchRunner, JobWriter, OpenAIBatch
+from config import GlobalConfig, LLMConfig, ReviewMode
+from regulation_analyzer import RegulationAnalyzer
+
+ANSWER = json.dumps({"详细分析": {"类别": [{"框架要求编号": 1, "法规覆盖情况": "未覆盖"}]}}, ensure_ascii=False)
+
+
+class FakeBatchHandler(BaseHTTPRequestHandler):
+    """最小化的 OpenAI / Anthropic 批处理接口"""
+    store = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, raw=False):
+        body = payload if raw else json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/files":
+            boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+            part = [p for p in body.split(b"--" + boundary) if b'name="file"' in p][0]
+            self.store["openai_input"] = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+            self._send({"id": "file-in"})
+        elif self.path == "/v1/batches":
+            self._send({"id": "batch-1", "status": "validating"})
+        elif self.path == "/v1/messages/batches":
+            self.store["anthropic_requests"] = json.loads(body)["requests"]
+            self._send({"id": "msgbatch-1", "processing_status": "in_progress"})
+
+    def do_GET(self):
+        host = f"http://{self.headers['Host']}"
+        if self.path == "/v1/batches/batch-1":
+            self._send({"id": "batch-1", "status": "completed", "output_file_id": "file-out"})
+        elif self.path == "/v1/files/file-out/content":
+            lines = [json.loads(l) for l in self.store["openai_input"].decode().splitlines()]
+            out = [{"custom_id": l["custom_id"], "response": {"status_code": 200, "body": {
+                "choices": [{"message": {"content": ANSWER}}]}}} for l in lines]
+            self._send("\n".join(json.dumps(o) for o in out).encode(), raw=True)
+        elif self.path == "/v1/messages/batches/msgbatch-1":
+            self._send({"id": "msgbatch-1", "processing_status": "ended",
+                        "results_url": f"{host}/v1/messages/batches/msgbatch-1/results"})
+        elif self.path == "/v1/messages/batches/msgbatch-1/results":
+            out = [{"custom_id": r["custom_id"], "result": {"type": "errored", "error": {"type": "overloaded"}}}
+                   for r in self.store["anthropic_requests"]]
+            self._send("\n".join(json.dumps(o) for o in out).encode(), raw=True)
+
+
+def test_batch_round_trip_against_fake_server(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeBatchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        cfg = GlobalConfig(
+            review_mode=ReviewMode.REGULATION,
+            llm_configs={
+                "openai": LLMConfig(provider="openai", api_key="k", model="gpt-4o-mini", base_url=f"{base}/v1"),
+                "anthropic": LLMConfig(provider="anthropic", api_key="k", model="claude", base_url=base),
+            },
+            input_path="",
+            output_path=str(tmp_path),
+            batch_poll_interval=0,
+        )
+        analyzer = RegulationAnalyzer(cfg)
+        analyzer.framework = {"类别": [{"number": 1, "name": "要求"}]}
+        doc = tmp_path / "法规.txt"
+        doc.write_text("第一条 内容", encoding="utf-8")
+
+        [(path, results)] = BatchRunner(analyzer, cfg, tmp_path).run([doc])
+    finally:
+        server.shutdown()
+
+    assert path == doc
+    openai_result = results["LLM分析结果"]["openai"]
+    assert openai_result["详细分析"]["类别"][0]["法规覆盖情况"] == "未覆盖"
+    assert openai_result["批处理任务"] == "batch-1"
+    assert "overloaded" in results["LLM分析结果"]["anthropic"]["错误_anthropic"]
+    assert (tmp_path / "batch_jobs" / "manifest.json").exists()
+
+
+def test_job_writer_splits_at_request_and_size_limits(tmp_path):
+    writer = JobWriter(tmp_path, "openai", max_requests=2, max_bytes=100)
+    parts = [writer.add({"custom_id": f"c{i}", "body": "x" * 10}) for i in range(3)]
+    parts.append(writer.add({"custom_id": "big", "body": "x" * 80}))
+    writer.close()
+
+    assert parts == [0, 0, 1, 2]
+    assert [job["requests"] for job in writer.jobs] == [2, 1, 1]
+    lines = [json.loads(l) for l in open(writer.jobs[0]["input_file"], encoding="utf-8")]
+    assert [l["custom_id"] for l in lines] == ["c0", "c1"]
+
+
+def test_compile_splits_jobs_and_runs_direct_providers_with_loaded_document(tmp_path, monkeypatch):
+    cfg = GlobalConfig(
+        review_mode=ReviewMode.REGULATION,
+        llm_configs={
+            "openai": LLMConfig(provider="openai", api_key="k", model="gpt-4o-mini"),
+            "deepseek": LLMConfig(provider="deepseek", api_key="k", model="deepseek-chat"),
+        },
+        input_path="",
+        output_path=str(tmp_path),
+    )
+    analyzer = RegulationAnalyzer(cfg)
+    analyzer.framework = {"类别一": [{"number": 1, "name": "要求"}], "类别二": [{"number": 2, "name": "要求"}]}
+    doc = tmp_path / "法规.txt"
+    doc.write_text("第一条 内容", encoding="utf-8")
+    monkeypatch.setattr(OpenAIBatch, "max_requests", 1)
+
+    direct_calls = []
+
+    def fake_single(file_path, llm_config, document=None):
+        direct_calls.append((llm_config.provider, document))
+        return {"详细分析": {}, "LLM提供商": llm_config.provider}
+
+    monkeypatch.setattr(analyzer, "analyze_with_single_llm", fake_single)
+    manifest = BatchRunner(analyzer, cfg, tmp_path).compile([doc])
+
+    assert [job["requests"] for job in manifest["jobs"]["openai"]] == [1, 1]
+    [entry] = manifest["documents"]
+    assert entry["providers"]["openai"]["jobs"] == [0, 1]
+    # 不支持批处理接口的提供商在编译阶段使用已读取的文档分析，不再重新提取
+    assert [(provider, document[0]) for provider, document in direct_calls] == [("deepseek", "第一条内容")]
+    assert entry["direct"]["deepseek"]["LLM提供商"] == "deepseek"
+    assert entry["results"]["原文条款"][0]["条款编号"] == "第一条"
+
+    outcomes = {"openai": {cid: ANSWER for cid in entry["providers"]["openai"]["requests"]}}
+    for i, job in enumerate(manifest["jobs"]["openai"]):
+        job["job_id"] = f"batch-{i}"
+    [(_, results)] = BatchRunner(analyzer, cfg, tmp_path).ingest(manifest, outcomes)
+    assert results["LLM分析结果"]["openai"]["批处理任务"] == "batch-0, batch-1"
+    assert results["LLM分析结果"]["deepseek"]["LLM提供商"] == "deepseek"
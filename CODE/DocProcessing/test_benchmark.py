@@ -0,0 +1,57 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+from benchmark import compare, synthetic_regulation, write_pdf
+from pdf_extractor import available_backends, extract_pages
+
+
+def test_synthetic_regulation_is_sized_and_deterministic():
+    text = synthetic_regulation(5000, seed=3)
+    assert len(text) == 5000
+    assert "第1条" in text and "第2条" in text
+    assert text == synthetic_regulation(5000, seed=3)
+    assert text != synthetic_regulation(5000, seed=4)
+
+
+def test_compare_matches_scenarios_and_stages():
+    def run(seconds, llm):
+        return {"提交": "x", "场景": [{
+            "文档字符数": 10000, "文件数": 1, "墙钟耗时秒": seconds, "文档每小时": 3600 / seconds,
+            "峰值内存MB": 100.0, "阶段耗时": {"LLM等待": {"累计耗时秒": llm}},
+        }]}
+
+    rows = compare(run(2.0, 1.5), run(1.0, 0.5))
+    assert ("10000字符×1文件", "墙钟耗时秒", 2.0, 1.0) in rows
+    assert ("10000字符×1文件", "LLM等待累计秒", 1.5, 0.5) in rows
+
+
+@pytest.mark.skipif(not available_backends(), reason="未安装PDF提取库")
+@pytest.mark.parametrize("backend", available_backends())
+def test_write_pdf_round_trips_through_extractors(tmp_path, backend):
+    text = synthetic_regulation(3000, seed=2)
+    pdf = write_pdf(tmp_path / "合成法规.pdf", text)
+    pages = extract_pages(pdf, backend=backend)
+    assert len(pages) > 1
+    extracted = "".join("".join(page.split()) for page in pages)
+    assert "第1条" in extracted and "第2条" in extracted
+    # pypdfium2 会丢弃部分行尾标点，只比较汉字和数字
+    def keep(s):
+        return [c for c in s if c.isalnum()]
+    assert keep(extracted) == keep(text)
+
+
+def test_compare_keeps_formats_apart():
+    def run(fmt, seconds):
+        scenario = {"文档字符数": 10000, "文件数": 1, "墙钟耗时秒": seconds, "文档每小时": None,
+                    "峰值内存MB": None, "阶段耗时": {}}
+        if fmt:
+            scenario["格式"] = fmt
+        return scenario
+
+    rows = compare({"场景": [run(None, 2.0), run("pdf", 5.0)]},
+                   {"场景": [run("txt", 1.0), run("pdf", 4.0)]})
+    assert ("10000字符×1文件", "墙钟耗时秒", 2.0, 1.0) in rows
+    assert ("10000字符×1文件×pdf", "墙钟耗时秒", 5.0, 4.0) in rows
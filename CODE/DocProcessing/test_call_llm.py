@@ -9,21 +9,15 @@ sys.modules.setdefault('docx', types.SimpleNamespace(Document=None))
 from base_analyzer import BaseAnalyzer
 from config import GlobalConfig, LLMConfig, ReviewMode
 
-class DummyAnalyzer(BaseAnalyzer):
-    def create_analysis_prompt(self, document_content: str, framework_chunk: dict) -> str:
-        return ""
 
-    def get_system_message(self) -> str:
-        return ""
-
-def test_call_llm_parses_anthropic_response(monkeypatch):
+def test_call_llm_parses_anthropic_response(monkeypatch, make_analyzer):
     cfg = GlobalConfig(
         review_mode=ReviewMode.REGULATION,
         llm_configs={},
         input_path="",
         output_path="",
     )
-    analyzer = DummyAnalyzer(cfg)
+    analyzer = make_analyzer(cfg)
     llm = LLMConfig(provider="anthropic", api_key="key", model="model")
 
     def fake_call(self, llm_config, system_msg, user_msg):
@@ -32,3 +26,89 @@ def test_call_llm_parses_anthropic_response(monkeypatch):
     monkeypatch.setattr(BaseAnalyzer, "_call_anthropic", fake_call)
     result = analyzer.call_llm(llm, "sys", "user")
     assert result == {"ok": True}
+
+
+def test_missing_requirements_are_requested_again(monkeypatch, tmp_path, make_analyzer):
+    cfg = GlobalConfig(
+        review_mode=ReviewMode.REGULATION,
+        llm_configs={},
+        input_path="",
+        output_path="",
+    )
+    analyzer = make_analyzer(cfg)
+    analyzer.framework = {"类别": [{"number": 1}, {"number": 2}, {"number": 3}]}
+    analyzer.create_analysis_prompt = lambda content, chunk: str(analyzer.chunk_requirement_ids(chunk))
+    llm = LLMConfig(provider="anthropic", api_key="key", model="model")
+
+    prompts = []
+
+    def fake_call(self, llm_config, system_msg, user_msg):
+        prompts.append(user_msg)
+        if len(prompts) == 1:
+            return '{"详细分析": {"类别": [{"框架要求编号": 1}]}, "关键发现": ["首次"]}'
+        return '{"详细分析": {"类别": [{"框架要求编号": 2}, {"框架要求编号": 3}, {"框架要求编号": 1}]}, "关键发现": []}'
+
+    monkeypatch.setattr(BaseAnalyzer, "_call_anthropic", fake_call)
+    doc = tmp_path / "doc.txt"
+    doc.write_text("内容", encoding="utf-8")
+    result = analyzer.analyze_with_single_llm(str(doc), llm)
+
+    assert prompts == ["{1, 2, 3}", "{2, 3}"]
+    assert [item["框架要求编号"] for item in result["详细分析"]["类别"]] == [1, 2, 3]
+    assert result["关键发现"] == ["首次"]
+    assert result["补充请求记录"] == [{"缺失编号": [2, 3], "补回编号": [2, 3]}]
+    assert [call["provider"] for call in result["调用指标"]] == ["anthropic", "anthropic"]
+
+
+def test_failed_followup_keeps_primary_response(monkeypatch, tmp_path, make_analyzer):
+    cfg = GlobalConfig(
+        review_mode=ReviewMode.REGULATION,
+        llm_configs={},
+        input_path="",
+        output_path="",
+    )
+    analyzer = make_analyzer(cfg)
+    analyzer.framework = {"类别": [{"number": 1}, {"number": 2}]}
+    llm = LLMConfig(provider="anthropic", api_key="key", model="model")
+    calls = []
+
+    def fake_call(self, llm_config, system_msg, user_msg):
+        calls.append(user_msg)
+        if len(calls) == 1:
+            return '{"详细分析": {"类别": [{"框架要求编号": 1}]}}'
+        raise RuntimeError("连接被重置")
+
+    monkeypatch.setattr(BaseAnalyzer, "_call_anthropic", fake_call)
+    doc = tmp_path / "doc.txt"
+    doc.write_text("内容", encoding="utf-8")
+    result = analyzer.analyze_with_single_llm(str(doc), llm)
+
+    assert not [key for key in result if key.startswith("错误")]
+    assert [item["框架要求编号"] for item in result["详细分析"]["类别"]] == [1]
+    assert result["补充请求记录"] == [{"缺失编号": [2], "补回编号": [], "错误": "连接被重置"}]
+
+
+def test_early_stopped_stream_is_validated(tmp_path, make_analyzer):
+    import asyncio
+    import json
+    from async_llm import CallMetrics
+
+    cfg = GlobalConfig(review_mode=ReviewMode.REGULATION, llm_configs={}, input_path="",
+                       output_path=str(tmp_path), stream_early_abort=True)
+    analyzer = make_analyzer(cfg)
+    analyzer.response_schema = "regulation"
+    llm = LLMConfig(provider="openai", api_key="key", model="model")
+    items = [{"框架要求编号": 1, "法规覆盖情况": "完全覆盖"}, {"框架要求编号": 2, "法规覆盖情况": "不确定"},
+             {"框架要求编号": 3}]
+    text = json.dumps({"详细分析": {"类别": items}}, ensure_ascii=False)
+
+    class FakeClient:
+        async def complete(self, llm_config, system_msg, user_msg, timeout=None, on_delta=None):
+            assert on_delta(text[:-2])
+            return types.SimpleNamespace(content=text[:-2], stopped_early=True,
+                                         metrics=CallMetrics(provider="openai", model="model"))
+
+    result, _ = asyncio.run(analyzer._acall_once(FakeClient(), llm, "sys", "user", expected_ids={1, 2, 3}))
+    # 缺少必需字段的要求项被剔除（之后由补充请求重新获取），取值不合法的仅记录
+    assert [item["框架要求编号"] for item in result["详细分析"]["类别"]] == [1, 2]
+    assert result["解析记录"]["剔除要求项数"] == 1
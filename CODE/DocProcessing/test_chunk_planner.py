@@ -0,0 +1,34 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from chunk_planner import ChunkPlanner, output_limit
+from config import LLMConfig
+from prompt import REGULATORY_FRAMEWORK
+
+
+def test_packs_categories_and_backs_off_after_truncation(tmp_path):
+    planner = ChunkPlanner(tmp_path / "chunk_stats.json")
+    llm = LLMConfig(provider="openai", api_key="key", model="gpt-4o-mini")
+    assert output_limit(llm) == 16384
+
+    chunks = planner.plan(REGULATORY_FRAMEWORK, llm, doc_tokens=5000)
+    assert 1 < len(chunks) < len(REGULATORY_FRAMEWORK)
+    assert [c for chunk in chunks for c in chunk] == list(REGULATORY_FRAMEWORK)
+
+    for _ in range(3):
+        planner.observe_failure(llm)
+    assert len(planner.plan(REGULATORY_FRAMEWORK, llm, doc_tokens=5000)) > len(chunks)
+
+
+def test_measured_output_sizes_allow_larger_chunks(tmp_path):
+    planner = ChunkPlanner(tmp_path / "chunk_stats.json")
+    llm = LLMConfig(provider="anthropic", api_key="key", model="claude-sonnet")
+    before = len(planner.plan(REGULATORY_FRAMEWORK, llm, doc_tokens=5000))
+
+    small = {"详细分析": {cat: [{"框架要求编号": 1, "法规覆盖情况": "未覆盖"}] for cat in REGULATORY_FRAMEWORK}}
+    planner.observe(llm, small, doc_tokens=5000, truncated=False)
+    planner.save()
+
+    reloaded = ChunkPlanner(tmp_path / "chunk_stats.json")
+    assert len(reloaded.plan(REGULATORY_FRAMEWORK, llm, doc_tokens=5000)) < before
@@ -0,0 +1,49 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _fail(breaker):
+    with pytest.raises(TimeoutError):
+        with breaker.guard():
+            raise TimeoutError("timeout")
+
+
+def test_trips_after_consecutive_failures_and_recovers_after_probe():
+    now = [0.0]
+    breaker = CircuitBreaker("openai", failure_threshold=2, cooldown=30, clock=lambda: now[0])
+
+    _fail(breaker)
+    assert breaker.state == CLOSED
+    _fail(breaker)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    now[0] = 31
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    # 探测进行中时其他调用仍被拒绝
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert [t["新状态"] for t in breaker.transitions] == ["打开", "半开", "关闭"]
+
+
+def test_failed_probe_reopens():
+    now = [0.0]
+    breaker = CircuitBreaker("anthropic", failure_threshold=1, cooldown=10, clock=lambda: now[0])
+    _fail(breaker)
+    now[0] = 11
+    _fail(breaker)
+    assert breaker.state == OPEN
+    now[0] = 15
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
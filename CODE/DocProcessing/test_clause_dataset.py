@@ -0,0 +1,80 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+from clause_dataset import clause_rows
+
+
+def _raw(doc_name, coverage):
+    return {
+        "文档名称": doc_name,
+        "LLM分析结果": {
+            "deepseek": {
+                "LLM模型": "deepseek-chat",
+                "文档标题": "境外投资管理办法",
+                "详细分析": {
+                    "治理与战略": [
+                        {
+                            "框架要求编号": 1,
+                            "框架要求名称": "海外业务治理与决策管理办法",
+                            "法规覆盖情况": coverage,
+                            "法规要求内容": [
+                                {"条款编号": "第三条", "具体要求": "自主决策", "强制等级": "强制", "适用对象": "企业"},
+                                {"条款编号": "第四条", "具体要求": "履行备案", "强制等级": "强制", "适用对象": ["企业", "个人"]},
+                            ],
+                        },
+                        {"框架要求编号": "2", "框架要求名称": "境外投资管理制度", "法规覆盖情况": "未覆盖"},
+                    ],
+                },
+            },
+            "anthropic": {"错误": "超时", "状态": "失败"},
+        },
+    }
+
+
+def test_clause_rows_one_row_per_clause():
+    rows = clause_rows(_raw("办法.pdf", "部分覆盖"))
+    assert [(r["RequirementID"], r["ClauseNo"]) for r in rows] == [(1, "第三条"), (1, "第四条"), ("2", None)]
+    assert rows[0]["Provider"] == "deepseek" and rows[0]["Coverage"] == "部分覆盖"
+
+
+def test_partitioned_dataset_round_trip(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    from clause_dataset import ClauseDatasetWriter, load
+
+    for fmt in ("parquet", "arrow"):
+        root = tmp_path / fmt
+        writer = ClauseDatasetWriter(root, fmt)
+        writer.write("regulation_20250524_112352", _raw("境外投资管理办法.pdf", "部分覆盖"))
+        writer.write("regulation_20250527_090130", _raw("境外投资管理办法.pdf", "完全覆盖"))
+        # 重复写入同一分区会覆盖，不会产生重复行
+        path = writer.write("regulation_20250527_090130", _raw("境外投资管理办法.pdf", "完全覆盖"))
+        assert path.parent.name == "regulation=境外投资管理办法"
+
+        table = load(root, fmt)
+        assert table.num_rows == 6
+        assert pa.types.is_dictionary(table.schema.field("Coverage").type)
+        assert pa.types.is_dictionary(table.schema.field("run").type)
+        rows = table.to_pylist()
+        assert sorted({r["run"] for r in rows}) == ["regulation_20250524_112352", "regulation_20250527_090130"]
+        assert {r["Model"] for r in rows} == {"deepseek-chat"}
+        assert sorted(r["RequirementID"] for r in rows) == [1, 1, 1, 1, 2, 2]
+        assert '["企业", "个人"]' in {r["Subjects"] for r in rows}
+
+
+def test_export_tree_skips_existing_partitions(tmp_path):
+    pytest.importorskip("pyarrow")
+    import json
+    from clause_dataset import ClauseDatasetWriter
+
+    doc_dir = tmp_path / "Result" / "regulation_20250524_112352" / "办法"
+    doc_dir.mkdir(parents=True)
+    (doc_dir / "办法_综合分析结果.json").write_text(
+        json.dumps(_raw("办法.pdf", "部分覆盖"), ensure_ascii=False), encoding="utf-8")
+
+    writer = ClauseDatasetWriter(tmp_path / "dataset")
+    assert writer.export_tree(tmp_path / "Result") == 1
+    assert writer.export_tree(tmp_path / "Result") == 0
+    assert writer.export_tree(tmp_path / "Result", overwrite=True) == 1
@@ -0,0 +1,78 @@
+import os
+import sys
+import zipfile
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from docx_extractor import is_docx, iter_docx_blocks
+
+NAMESPACES = (
+    'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+    'xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape" '
+    'xmlns:v="urn:schemas-microsoft-com:vml"'
+)
+
+
+def _p(*runs):
+    return "<w:p>" + "".join(f"<w:r><w:t>{text}</w:t></w:r>" for text in runs) + "</w:p>"
+
+
+def _table(*rows):
+    return "<w:tbl>" + "".join(
+        "<w:tr>" + "".join(f"<w:tc>{cell}</w:tc>" for cell in row) + "</w:tr>" for row in rows
+    ) + "</w:tbl>"
+
+
+def _textbox(text):
+    """文本框：Choice（DrawingML）和 Fallback（VML）各有一份相同内容"""
+    content = f"<w:txbxContent>{_p(text)}</w:txbxContent>"
+    return (
+        "<w:r><mc:AlternateContent>"
+        f"<mc:Choice><w:drawing><wps:txbx>{content}</wps:txbx></w:drawing></mc:Choice>"
+        f"<mc:Fallback><w:pict><v:textbox>{content}</v:textbox></w:pict></mc:Fallback>"
+        "</mc:AlternateContent></w:r>"
+    )
+
+
+def _write_docx(path, body):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", f"<w:document {NAMESPACES}><w:body>{body}</w:body></w:document>")
+    return path
+
+
+def test_tables_and_nested_tables(tmp_path):
+    nested = _table([_p("子项A"), _p("1")], [_p("子项B"), _p("2")])
+    body = (
+        _p("第一条 ", "企业应当建立制度。")
+        + _table([_p("项目"), _p("要求")], [_p("外汇"), _p("设定限额") + nested], [_p(""), _p("")])
+        + _p("第二条 附则。")
+    )
+    path = _write_docx(tmp_path / "制度.docx", body)
+
+    assert is_docx(path)
+    assert list(iter_docx_blocks(path)) == [
+        "第一条 企业应当建立制度。",
+        "项目 | 要求",
+        "外汇 | 设定限额 子项A | 1 子项B | 2",
+        "第二条 附则。",
+    ]
+
+
+def test_text_box_does_not_split_its_paragraph(tmp_path):
+    body = (
+        "<w:p><w:r><w:t>前半段，</w:t></w:r>" + _textbox("文本框内容") + "<w:r><w:t>后半段。</w:t></w:r></w:p>"
+        + _table([_p("单元格") + "<w:p>" + _textbox("表内文本框") + "<w:r><w:t>说明</w:t></w:r></w:p>"])
+    )
+    path = _write_docx(tmp_path / "文本框.docx", body)
+
+    assert list(iter_docx_blocks(path)) == [
+        "文本框内容",
+        "前半段，后半段。",
+        "单元格 表内文本框 说明",
+    ]
+
+
+def test_legacy_doc_is_not_docx(tmp_path):
+    path = tmp_path / "旧格式.doc"
+    path.write_bytes(b"\xd0\xcf\x11\xe0" + b"\0" * 60)
+    assert not is_docx(path)
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+from async_llm import AsyncLLMClient, HedgePolicy
+from config import LLMConfig
+
+
+def _client(budget=1.0):
+    client = AsyncLLMClient(hedge=HedgePolicy(min_samples=3, budget=budget))
+    llm = LLMConfig(provider="openai", api_key="key", model="m")
+    for _ in range(3):
+        client.latency.record(llm, 0.01)
+    return client, llm
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    client, llm = _client()
+    fast = LLMConfig(provider="openai", api_key="key", model="f")
+    cancelled = []
+
+    async def attempt(config):
+        try:
+            await asyncio.sleep(1.0 if config is llm else 0.0)
+        except asyncio.CancelledError:
+            cancelled.append(config.model)
+            raise
+        return config.model
+
+    assert asyncio.run(client.hedged(llm, attempt, fallback=fast)) == "f"
+    assert cancelled == ["m"]
+    assert client.hedge.hedged_calls == 1 and client.hedge.hedge_wins == 1
+
+
+def test_fallback_must_be_same_provider():
+    client, llm = _client()
+    other = LLMConfig(provider="anthropic", api_key="key", model="f")
+
+    async def attempt(config):
+        return config.provider
+
+    with pytest.raises(ValueError, match="同一提供商"):
+        asyncio.run(client.hedged(llm, attempt, fallback=other))
+
+
+def test_budget_caps_hedges():
+    client, llm = _client(budget=0.0)
+
+    async def attempt(config):
+        await asyncio.sleep(0.05)
+        return "primary"
+
+    assert asyncio.run(client.hedged(llm, attempt)) == "primary"
+    assert client.hedge.hedged_calls == 0
+
+
+def test_budget_is_weighted_by_tokens():
+    client, llm = _client(budget=0.5)
+
+    async def attempt(config):
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        # 两个小请求之后，一个大请求的估算tokens超出预算，不对冲
+        await client.hedged(llm, attempt, tokens=100)
+        await client.hedged(llm, attempt, tokens=100)
+        await client.hedged(llm, attempt, tokens=1000)
+
+    asyncio.run(run())
+    policy = client.hedge
+    assert policy.hedged_calls == 1
+    assert policy.hedged_tokens == 100 and policy.primary_tokens == 1200
+    assert policy.to_dict()["对冲请求估算tokens"] == 100
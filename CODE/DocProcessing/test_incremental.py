@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+import types
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+sys.modules.setdefault('docx', types.SimpleNamespace(Document=None))
+
+from articles import split_articles, to_records
+from base_analyzer import BaseAnalyzer
+from config import GlobalConfig, LLMConfig, ReviewMode
+from incremental import IncrementalPlanner, base_name, diff_articles
+from result_store import ResultStore
+
+FRAMEWORK = {
+    "一、治理与战略": [{"number": 1, "name": "甲方治理办法"}],
+    "二、全面风险管理": [{"number": 2, "name": "乙方风控办法"}],
+}
+OLD_TEXT = "示例办法\n第一条 企业应当建立决策机制。\n第二条 企业应当每年报告投资情况。\n第三条 本办法自发布之日起施行。"
+NEW_TEXT = (
+    "示例办法\n第一条 企业应当建立决策机制。\n第二条 企业应当每半年报告投资情况。\n"
+    "第三条 新增的条文。\n第四条 本办法自发布之日起施行。"
+)
+
+
+def _baseline(path, doc_name="示例办法.txt"):
+    results = {
+        "文档名称": doc_name,
+        "分析时间": "2025-05-27 09:01:30",
+        "原文条款": to_records(split_articles(OLD_TEXT)),
+        "LLM分析结果": {
+            "anthropic": {
+                "分析日期": "2025-05-27 09:01:30",
+                "LLM模型": "model",
+                "文档标题": "示例办法",
+                "详细分析": {
+                    "治理与战略": [{
+                        "框架要求编号": 1,
+                        "法规覆盖情况": "完全覆盖",
+                        "法规要求内容": [
+                            {"条款编号": "第一条", "原文内容": "企业应当建立决策机制。"},
+                            {"条款编号": "施行日期", "原文内容": "本办法自发布之日起施行"},
+                            {"条款编号": "第三条", "原文内容": "本办法自发布之日起施行"},
+                        ],
+                    }],
+                    "二、全面风险管理": [{
+                        "框架要求编号": 2,
+                        "法规覆盖情况": "部分覆盖",
+                        "法规要求内容": [{"条款编号": "第二条", "原文内容": "企业应当每年报告投资情况。"}],
+                    }],
+                },
+            },
+        },
+    }
+    path.write_text(json.dumps(results, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def test_diff_detects_modified_added_removed_and_renumbered():
+    diff = diff_articles(split_articles(OLD_TEXT), split_articles(NEW_TEXT))
+    assert diff.modified == ["第2条"]
+    assert diff.added == ["第3条"]
+    assert diff.removed == []
+    assert diff.renumbered == {"第3条": "第4条"}
+
+    removed = diff_articles(split_articles(OLD_TEXT), split_articles("示例办法\n第一条 企业应当建立决策机制。"))
+    assert removed.removed == ["第2条", "第3条"]
+
+
+def test_base_name_ignores_version_suffix():
+    assert base_name("境外投资管理办法 2.pdf") == "境外投资管理办法"
+    assert base_name("中央企业境外投资监督管理办法-1.pdf") == "中央企业境外投资监督管理办法"
+    assert base_name("境外投资管理办法（修订）.pdf") == "境外投资管理办法"
+    assert base_name("境外投资管理办法.pdf") == "境外投资管理办法"
+    assert base_name("境外投资管理办法（2017年修订）.pdf") == "境外投资管理办法"
+    assert base_name("境外投资管理办法(2).docx") == "境外投资管理办法"
+
+
+def test_base_name_keeps_standard_numbers_apart():
+    assert base_name("GB 30871-2022.pdf") == base_name("GB 30871-2014.pdf") == "GB 30871"
+    assert base_name("GB 30871-2022.pdf") != base_name("GB 50016-2014.pdf")
+    assert base_name("AQ 3013-2008.docx") == "AQ 3013"
+    # 只去掉一个后缀
+    assert base_name("GB 30871-2022 2.pdf") == "GB 30871-2022"
+
+
+def test_only_categories_with_changed_articles_are_reanalysed(tmp_path):
+    baseline = _baseline(tmp_path / "baseline.json")
+    plan = IncrementalPlanner(FRAMEWORK, baseline).plan("示例办法 2.txt", NEW_TEXT)
+    assert plan.reanalyze == {"全面风险管理"}
+
+    carried = plan.carry_forward("anthropic")
+    assert list(carried) == ["治理与战略"]
+    # 依据条文“第三条”重编号为“第四条”；无法识别的条款编号保持不变
+    clauses = carried["治理与战略"][0]["法规要求内容"]
+    assert clauses[1]["条款编号"] == "施行日期"
+    assert (clauses[2]["条款编号"], clauses[2]["原条款编号"]) == ("第四条", "第三条")
+    assert plan.carry_forward("openai") == {}
+
+
+def test_explicit_baseline_only_applies_to_same_regulation(tmp_path):
+    baseline = _baseline(tmp_path / "baseline.json")
+    planner = IncrementalPlanner(FRAMEWORK, baseline)
+    assert planner.find_baseline("示例办法（修订）.txt") == baseline
+    # 同一批次中的其他法规不与该基线比对，结果库中也没有时按全量分析
+    assert planner.find_baseline("另一部办法.txt") is None
+    assert planner.plan("另一部办法.txt", NEW_TEXT) is None
+
+    # 结果中没有文档名称时按结果文件名判断
+    named = tmp_path / "示例办法_综合分析结果.json"
+    named.write_text(json.dumps({"原文条款": []}, ensure_ascii=False), encoding="utf-8")
+    assert IncrementalPlanner(FRAMEWORK, named).find_baseline("示例办法 2.txt") == named
+
+
+def test_analyzer_calls_llm_only_for_reanalysed_categories(monkeypatch, tmp_path, make_analyzer):
+    cfg = GlobalConfig(
+        review_mode=ReviewMode.REGULATION,
+        llm_configs={"anthropic": LLMConfig(provider="anthropic", api_key="key", model="model")},
+        input_path="",
+        output_path=str(tmp_path),
+        incremental=True,
+        categories_per_call=2,
+    )
+    analyzer = make_analyzer(cfg)
+    analyzer.framework = FRAMEWORK
+    analyzer.incremental = IncrementalPlanner(FRAMEWORK, store=ResultStore(tmp_path / "results.db"))
+
+    # 基线通过结果库按文件名（忽略版本后缀）查找
+    run_dir = tmp_path / "regulation_20250527_090130"
+    baseline = _baseline((run_dir / "示例办法").mkdir(parents=True) or run_dir / "示例办法" / "示例办法_综合分析结果.json")
+    analyzer.incremental.store.add_document(str(run_dir), json.loads(baseline.read_text(encoding="utf-8")))
+
+    prompts = []
+
+    def fake_call(self, llm_config, system_msg, user_msg):
+        prompts.append(json.loads(user_msg))
+        return '{"详细分析": {"二、全面风险管理": [{"框架要求编号": 2, "法规覆盖情况": "完全覆盖"}]}}'
+
+    monkeypatch.setattr(BaseAnalyzer, "_call_anthropic", fake_call)
+    doc = tmp_path / "示例办法 2.txt"
+    doc.write_text(NEW_TEXT, encoding="utf-8")
+    results = analyzer.analyze_with_all_llms(str(doc))
+
+    assert prompts == [["二、全面风险管理"]]
+    provider = results["LLM分析结果"]["anthropic"]
+    assert provider["详细分析"]["治理与战略"][0]["法规覆盖情况"] == "完全覆盖"
+    assert provider["详细分析"]["二、全面风险管理"][0]["法规覆盖情况"] == "完全覆盖"
+    assert provider["文档标题"] == "示例办法"
+    assert provider["增量分析"]["沿用大类"] == ["治理与战略"]
+    assert provider["增量分析"]["基线结果文件"] == str(baseline)
+    assert results["增量分析"]["条文变化"]["修改"] == ["第2条"]
+    assert analyzer._incremental_plans == {}
@@ -0,0 +1,30 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("docx")
+pytest.importorskip("numpy")
+
+import main
+
+
+def _parse(monkeypatch, *flags):
+    monkeypatch.setattr(sys, "argv", ["main.py", *flags])
+    return main.parse_arguments()
+
+
+@pytest.mark.parametrize("flags", [("--batch", "--async"), ("--batch", "--hedge")])
+def test_batch_rejects_async_and_hedge(monkeypatch, flags):
+    with pytest.raises(SystemExit):
+        _parse(monkeypatch, *flags)
+    assert _parse(monkeypatch, "--batch").batch_mode
+
+
+def test_hedge_requires_async(monkeypatch):
+    with pytest.raises(SystemExit):
+        _parse(monkeypatch, "--hedge")
+    args = _parse(monkeypatch, "--async", "--hedge")
+    assert args.use_async and args.hedge
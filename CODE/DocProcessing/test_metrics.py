@@ -0,0 +1,41 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from metrics import StageRecorder, summarize_calls
+
+
+def test_stages_are_attributed_to_concurrent_documents():
+    recorder = StageRecorder()
+
+    async def process(name, bytes_written):
+        with recorder.document(name):
+            with recorder.stage("LLM等待"):
+                await asyncio.sleep(0.01)
+            await asyncio.to_thread(recorder.record, "文档提取", 0.5)
+            recorder.add_bytes(bytes_written)
+
+    async def main():
+        await asyncio.gather(process("a.txt", 100), process("b.txt", 200))
+
+    asyncio.run(main())
+    docs = recorder.document_summary()
+    assert set(docs) == {"a.txt", "b.txt"}
+    assert docs["a.txt"]["阶段耗时秒"]["文档提取"] == 0.5
+    assert docs["b.txt"]["写入字节数"] == 200
+    assert recorder.summary()["LLM等待"]["次数"] == 2
+
+
+def test_calls_are_summarized_per_provider():
+    calls = [
+        {"provider": "mock", "duration_s": 1.0, "queue_wait_s": 0.0, "ttft_s": 0.2,
+         "input_tokens": 100, "output_tokens": 10, "cached_tokens": 40, "retries": 1},
+        {"provider": "mock", "duration_s": 3.0, "queue_wait_s": 0.5, "ttft_s": None,
+         "input_tokens": 100, "output_tokens": 30, "cached_tokens": 0, "retries": 0},
+    ]
+    stats = summarize_calls(calls)["mock"]
+    assert stats["调用次数"] == 2
+    assert stats["缓存tokens"] == 40 and stats["SDK重试次数"] == 1
+    assert stats["调用耗时"]["p95秒"] == 3.0
+    assert stats["首token时延"]["次数"] == 1
@@ -0,0 +1,58 @@
+import os
+import socket
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+pytest.importorskip("anthropic")
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("docx")
+
+import main
+import overall_reporter
+from mock_server import MockBehavior, MockLLMServer
+
+
+@pytest.fixture
+def server():
+    srv = MockLLMServer(port=0, behavior=MockBehavior(latency="fixed", latency_ms=0, seed=5))
+    srv.start_in_thread()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_mock_mode_sends_overall_report_to_mock_server(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["main.py", "--mock", server.base_url, "--input", str(tmp_path)])
+    config = main.create_config_from_args(main.parse_arguments())
+    assert list(config.llm_configs) == ["mock"]
+    assert config.report_base_url == server.base_url[:-len("/v1")]
+
+    # 记录所有出站连接，只允许连向模拟服务
+    host, port = server.server_address[:2]
+    targets = []
+    connect = socket.socket.connect
+
+    def guarded_connect(sock, address):
+        targets.append(tuple(address[:2]))
+        return connect(sock, address)
+
+    monkeypatch.setattr(socket.socket, "connect", guarded_connect)
+    monkeypatch.delenv("ANTHROPIC_BASE_URL", raising=False)
+
+    content = overall_reporter._call_anthropic(
+        "sys", "请返回纯文本",
+        api_key=config.report_api_key,
+        base_url=config.report_base_url,
+    )
+    assert content
+    assert server.stats["requests"] == 1
+    assert targets and all(target == (host, port) for target in targets)
+
+
+def test_mock_provider_is_only_registered_with_mock_flag(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["main.py", "--input", str(tmp_path)])
+    config = main.create_config_from_args(main.parse_arguments())
+    assert "mock" not in config.llm_configs
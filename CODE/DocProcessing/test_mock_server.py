@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import types
+import urllib.error
+import urllib.request
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+sys.modules.setdefault('docx', types.SimpleNamespace(Document=None))
+
+import pytest
+
+from mock_server import MockBehavior, MockLLMServer
+from prompt import REGULATORY_FRAMEWORK
+from regulation_analyzer import RegulationAnalyzer
+from response_parser import parse_response
+
+
+@pytest.fixture
+def server():
+    srv = MockLLMServer(port=0, behavior=MockBehavior(latency="fixed", latency_ms=0, seed=7))
+    srv.start_in_thread()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def _post(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST",
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as resp:
+        return resp.read().decode()
+
+
+def _prompt():
+    chunk = dict(list(REGULATORY_FRAMEWORK.items())[:2])
+    analyzer = RegulationAnalyzer.__new__(RegulationAnalyzer)
+    return analyzer.create_analysis_prompt("第一条 内容", chunk), chunk
+
+
+def test_openai_answer_matches_framework_chunk(server):
+    prompt, chunk = _prompt()
+    body = json.loads(_post(f"{server.base_url}/chat/completions",
+                            {"model": "mock-model", "messages": [{"role": "user", "content": prompt}]}))
+    parsed = parse_response(body["choices"][0]["message"]["content"], "regulation")
+    returned = {item["框架要求编号"] for items in parsed.data["详细分析"].values() for item in items}
+    assert returned == {req["number"] for reqs in chunk.values() for req in reqs}
+    assert not parsed.issues
+
+
+def test_anthropic_stream_and_rate_limits(server):
+    prompt, _ = _prompt()
+    events = _post(f"{server.base_url}/messages",
+                   {"model": "m", "stream": True, "messages": [{"role": "user", "content": prompt}]})
+    text = "".join(
+        json.loads(line[6:])["delta"]["text"]
+        for line in events.splitlines()
+        if line.startswith("data: ") and '"text_delta"' in line
+    )
+    assert json.loads(text)["详细分析"]
+
+    server.behavior.rate_limit_rate = 1.0
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        _post(f"{server.base_url}/chat/completions", {"messages": [{"role": "user", "content": prompt}]})
+    assert exc.value.code == 429
+    assert server.stats["429"] == 1
+
+
+def test_category_report_prompt_gets_category_report_json():
+    import random
+    from mock_server import canned_answer
+    prompt = (
+        "**当前分析的风险大类**：合规管理\n"
+        "- 1. 合规管理基本制度 (关注点: 制度)\n"
+        "- 2. 合规审查 (关注点: 审查)\n"
+        '"CategoryLawAnalysis": "..."'
+    )
+    parsed = parse_response(canned_answer(prompt, random.Random(0)), "category_report")
+    assert parsed.data["Category"] == "合规管理"
+    assert set(parsed.data["SubCategoryAnalysis"]) == {"合规管理基本制度", "合规审查"}
+    assert not canned_answer("请写一段综合分析", random.Random(0)).startswith("{")
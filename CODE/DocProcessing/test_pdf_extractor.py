@@ -0,0 +1,75 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+import pdf_extractor
+from pdf_extractor import _split_ranges, available_backends, extract_pages, resolve_backend
+
+
+def _write_pdf(path, texts):
+    """生成每页一行文本的最小PDF（Helvetica，仅ASCII）"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in texts:
+        stream = f"BT /F1 18 Tf 72 720 Td ({text}) Tj ET".encode("ascii")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(texts)} >>".encode("ascii")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(data)
+    return path
+
+
+def test_split_ranges_covers_all_pages_in_order():
+    assert _split_ranges(10, 2) == [(0, 2), (2, 4), (4, 6), (6, 8), (8, 10)]
+    assert _split_ranges(5, 2, pages_per_task=3) == [(0, 3), (3, 5)]
+    assert _split_ranges(3, 8) == [(0, 1), (1, 2), (2, 3)]
+    assert _split_ranges(0, 4) == []
+
+
+def test_resolve_backend_prefers_fastest_installed(monkeypatch):
+    monkeypatch.setattr(pdf_extractor, "pypdfium2", None)
+    monkeypatch.setattr(pdf_extractor, "PDFPage", None)
+    monkeypatch.setattr(pdf_extractor, "PyPDF2", None)
+    with pytest.raises(RuntimeError, match="未安装任何PDF提取库"):
+        resolve_backend()
+
+    monkeypatch.setattr(pdf_extractor, "PDFPage", object())
+    assert available_backends() == ["pdfminer"]
+    assert resolve_backend("auto") == "pdfminer"
+    with pytest.raises(RuntimeError, match="pypdfium2"):
+        resolve_backend("pypdfium2")
+
+
+@pytest.mark.skipif(not available_backends(), reason="未安装PDF提取库")
+@pytest.mark.parametrize("backend", available_backends())
+def test_extract_pages_keeps_page_order(tmp_path, monkeypatch, backend):
+    texts = [f"Page {i:02d}" for i in range(6)]
+    pdf = _write_pdf(tmp_path / "sample.pdf", texts)
+
+    serial = extract_pages(pdf, backend=backend)
+    assert [p.strip() for p in serial] == texts
+
+    # 降低并行阈值，使6页文档也拆分到进程池，结果仍按页序返回
+    monkeypatch.setattr(pdf_extractor, "MIN_PAGES_FOR_PARALLEL", 2)
+    parallel = extract_pages(pdf, backend=backend, workers=2, pages_per_task=2)
+    assert [p.strip() for p in parallel] == texts
+
+    # 单独提取中间的范围
+    assert [p.strip() for p in pdf_extractor._extract_range((str(pdf), backend, 2, 4))] == texts[2:4]
@@ -0,0 +1,30 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from prefilter import AhoCorasick, KeywordPrefilter
+
+
+def test_aho_corasick_counts_overlapping_patterns():
+    matcher = AhoCorasick(["外汇", "外汇风险", "汇率", "ESG"])
+    counts = matcher.count("企业应管理外汇风险并关注汇率波动，披露esg信息。外汇")
+    assert counts == {"外汇": 2, "外汇风险": 1, "汇率": 1, "ESG": 1}
+
+
+def test_prefilter_skips_categories_without_evidence():
+    prefilter = KeywordPrefilter(min_hits=1)
+    screening = prefilter.screen("第一条 境内企业办理外汇登记，应遵守外汇管理规定，防范汇率风险。")
+
+    assert "四、财务与市场风险" not in screening.skipped
+    assert "七、信息与网络安全" in screening.skipped
+    audit = screening.audit()
+    assert audit["七、信息与网络安全"]["命中次数"] == 0
+    assert audit["四、财务与市场风险"]["命中关键词"]["外汇"] == 2
+
+    chunk = {
+        "四、财务与市场风险": [],
+        "七、信息与网络安全": [],
+    }
+    keep, drop = prefilter.split_chunk(chunk, screening)
+    assert list(keep) == ["四、财务与市场风险"]
+    assert list(drop) == ["七、信息与网络安全"]
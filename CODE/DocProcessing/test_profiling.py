@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+import types
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+sys.modules.setdefault('docx', types.SimpleNamespace(Document=None))
+
+import base_analyzer
+from config import GlobalConfig, ReviewMode
+from metrics import STAGE_JSON, STAGE_LLM, STAGE_PARSE, StageRecorder
+from profiling import StageProfiler
+
+
+def _busy():
+    return sorted(str(i) for i in range(20000))
+
+
+def test_stages_are_profiled_separately_with_memory(tmp_path):
+    recorder = StageRecorder()
+    profiler = StageProfiler(tmp_path, "cprofile", track_memory=True)
+    recorder.profiler = profiler
+    profiler.start()
+    for _ in range(2):
+        with recorder.stage(STAGE_PARSE):
+            _busy()
+    with recorder.stage(STAGE_JSON):
+        with recorder.stage(STAGE_PARSE):  # 嵌套阶段由外层采集
+            _busy()
+    with recorder.stage(STAGE_LLM):
+        _busy()
+    profiler.stop()
+
+    summary = json.loads((tmp_path / "profile_summary.json").read_text(encoding="utf-8"))
+    assert summary["阶段"][STAGE_PARSE]["剖析次数"] == 2
+    assert summary["阶段"][STAGE_JSON]["内存峰值增量MB"] is not None
+    assert STAGE_LLM not in summary["阶段"]
+    assert "_busy" in (tmp_path / "响应解析.txt").read_text(encoding="utf-8")
+    assert (tmp_path / "JSON写入.prof").exists()
+    assert "分配热点" in (tmp_path / "memory.txt").read_text(encoding="utf-8")
+
+
+def test_pdf_is_extracted_in_process_while_profiling(tmp_path, monkeypatch, make_analyzer):
+    calls = []
+    monkeypatch.setattr(base_analyzer, "extract_pages",
+                        lambda path, backend, workers: calls.append(workers) or ["第一条 内容"])
+    cfg = GlobalConfig(review_mode=ReviewMode.REGULATION, llm_configs={}, input_path="", output_path="")
+    cfg.pdf_workers = 4
+    analyzer = make_analyzer(cfg)
+
+    analyzer._read_pdf(tmp_path / "办法.pdf")
+    cfg.profile = "cprofile"
+    analyzer._read_pdf(tmp_path / "办法.pdf")
+    assert calls == [4, 1]
@@ -0,0 +1,39 @@
+import io
+import json
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from progress import ProgressTracker
+
+
+def test_eta_uses_pending_chunks_latency_and_concurrency(tmp_path):
+    out = io.StringIO()
+    tracker = ProgressTracker(4, ["mock"], tmp_path / "progress.json", stream=out, default_chunks=3)
+    tracker.started_at -= 10  # 已运行10秒
+    tracker.plan("mock", 2)
+    for _ in range(2):
+        tracker.call_finished("mock", 5.0, input_tokens=100, output_tokens=50)
+        tracker.chunk_done("mock")
+    tracker.document_done()
+
+    snap = tracker.snapshot()
+    mock = snap["提供商"]["mock"]
+    # 剩余3份文档，按已分块文档每份2块估计；平均耗时5秒，并发1
+    assert mock["待处理块数"] == 6
+    assert snap["剩余时间秒"] == 30
+    assert mock["输出tokens"] == 100
+
+    tracker.refresh(final=True)
+    written = json.loads((tmp_path / "progress.json").read_text(encoding="utf-8"))
+    assert written["已完成文档"] == 1
+    assert "文档 1/4" in out.getvalue() and "剩余 00:00:30" in out.getvalue()
+
+
+def test_eta_unknown_before_first_call_and_listeners_receive_snapshots():
+    tracker = ProgressTracker(2, ["mock"], stream=io.StringIO())
+    seen = []
+    tracker.add_listener(seen.append)
+    tracker.refresh()
+    assert seen[0]["剩余时间秒"] is None
+    assert seen[0]["提供商"]["mock"]["待处理块数"] == 2
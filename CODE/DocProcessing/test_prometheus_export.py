@@ -0,0 +1,34 @@
+import io
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from metrics import StageRecorder
+from progress import ProgressTracker
+from prometheus_export import PrometheusTextfileExporter
+
+
+def test_textfile_contains_histogram_tokens_and_stages(tmp_path):
+    tracker = ProgressTracker(2, ["mock"], stream=io.StringIO())
+    tracker.call_finished("mock", 0.5, input_tokens=1000, output_tokens=100, cached_tokens=250)
+    tracker.call_finished("mock", 7.0, input_tokens=1000, output_tokens=100)
+    tracker.call_failed("mock")
+    tracker.document_done()
+    recorder = StageRecorder()
+    recorder.record("LLM等待", 7.5)
+
+    path = tmp_path / "docprocessing.prom"
+    exporter = PrometheusTextfileExporter(path, tracker, recorder, labels={"mode": "regulation"})
+    tracker.add_listener(exporter.write)
+    tracker.refresh()
+    text = path.read_text(encoding="utf-8")
+
+    assert 'docprocessing_llm_request_duration_seconds_bucket{mode="regulation",provider="mock",le="1"} 1' in text
+    assert 'docprocessing_llm_request_duration_seconds_bucket{mode="regulation",provider="mock",le="5"} 1' in text
+    assert 'docprocessing_llm_request_duration_seconds_bucket{mode="regulation",provider="mock",le="10"} 2' in text
+    assert 'docprocessing_llm_request_duration_seconds_bucket{mode="regulation",provider="mock",le="+Inf"} 2' in text
+    assert 'docprocessing_llm_cache_hit_ratio{mode="regulation",provider="mock"} 0.125' in text
+    assert 'docprocessing_llm_failures_total{mode="regulation",provider="mock"} 1' in text
+    assert 'docprocessing_stage_duration_seconds_sum{mode="regulation",stage="LLM等待"} 7.5' in text
+    assert 'docprocessing_documents_processed_total{mode="regulation",status="success"} 1' in text
+    assert not list(tmp_path.glob(".*.tmp"))
@@ -0,0 +1,34 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+import pytest
+
+from response_parser import ResponseParseError, loads_with_repair, parse_response
+
+
+def test_repairs_common_llm_json_defects():
+    text = '说明文字\n```json\n{"a": 1 "b": [1, 2,], \'c\': True}\n```'
+    data, repairs = loads_with_repair(text)
+    assert data == {"a": 1, "b": [1, 2], "c": True}
+    assert len(repairs) == 4
+
+
+def test_items_missing_required_fields_are_dropped():
+    text = (
+        '{"详细分析": {"一、治理": ['
+        '{"框架要求编号": 1, "法规覆盖情况": "完全覆盖"},'
+        '{"框架要求编号": 2, "法规覆盖情况": "不确定"},'
+        '{"框架要求名称": "缺编号", "法规覆盖情况": "未覆盖"}'
+        ']}}'
+    )
+    parsed = parse_response(text, "regulation")
+    # 取值不合法只记录问题，缺少编号的要求项被剔除
+    assert [item["框架要求编号"] for item in parsed.data["详细分析"]["一、治理"]] == [1, 2]
+    assert parsed.dropped_items == 1
+    assert len(parsed.issues) == 2
+
+
+def test_missing_root_field_raises():
+    with pytest.raises(ResponseParseError):
+        parse_response('{"关键发现": []}', "regulation")
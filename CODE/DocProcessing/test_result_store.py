@@ -0,0 +1,135 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from result_store import ResultStore, _score, normalize_category, parse_run_dir
+
+
+def _results(doc_name, answer, article="第三条"):
+    return {
+        "文档路径": f"Regufile/{doc_name}",
+        "文档名称": doc_name,
+        "分析时间": "2025-05-27 09:01:30",
+        "审查模式": "regulation",
+        "LLM分析结果": {
+            "deepseek": {
+                "LLM模型": "deepseek-chat",
+                "文档标题": "境外投资管理办法",
+                "关键发现": ["发现一"],
+                "详细分析": {
+                    "一、治理与战略": [{
+                        "框架要求编号": 14,
+                        "框架要求名称": "境外投资管理制度",
+                        "法规覆盖情况": answer,
+                        "法规要求内容": [{
+                            "条款编号": article,
+                            "具体要求": "企业应当建立境外投资管理制度",
+                            "要求建立的制度": ["境外投资管理制度"],
+                            "强制等级": "强制",
+                            "原文内容": "企业应当建立健全境外投资管理制度。",
+                        }],
+                        "实施要求": "建立制度",
+                        "处罚措施": "未明确",
+                    }],
+                },
+            },
+            "anthropic": {"LLM模型": "claude", "详细分析": {}, "错误_anthropic": "超时"},
+        },
+    }
+
+
+def _write_run(root, run_name, doc_name, answer):
+    doc_dir = root / run_name / doc_name.rsplit(".", 1)[0]
+    doc_dir.mkdir(parents=True)
+    path = doc_dir / f"{doc_name.rsplit('.', 1)[0]}_综合分析结果.json"
+    path.write_text(json.dumps(_results(doc_name, answer), ensure_ascii=False), encoding="utf-8")
+
+
+def test_import_tree_and_requirement_history(tmp_path):
+    root = tmp_path / "Result"
+    _write_run(root, "regulation_20250524_112352", "境外投资管理办法.pdf", "部分覆盖")
+    _write_run(root, "regulation_20250527_090130", "境外投资管理办法.pdf", "完全覆盖")
+    (root / "not_a_run").mkdir()
+
+    with ResultStore(tmp_path / "results.db") as store:
+        assert store.import_tree(root) == (2, 2)
+        # 重复导入同一运行不会产生重复记录
+        store.import_tree(root)
+
+        runs = store.runs()
+        assert [r["开始时间"] for r in runs] == ["2025-05-24 11:23:52", "2025-05-27 09:01:30"]
+        assert all(r["审查模式"] == "regulation" and r["文档数"] == 1 for r in runs)
+
+        history = store.requirement_history(14, document="境外投资")
+        assert [h["结论"] for h in history] == ["部分覆盖", "完全覆盖"]
+        assert history[0]["大类"] == "治理与战略"
+        assert history[0]["条款数"] == 1
+        assert store.requirement_history(14, provider="anthropic") == []
+
+        clause = store.conn.execute("SELECT * FROM clauses").fetchone()
+        assert clause["article"] == "第三条"
+        assert json.loads(clause["raw"])["要求建立的制度"] == ["境外投资管理制度"]
+        error = store.conn.execute("SELECT error FROM provider_results WHERE provider = 'anthropic'").fetchone()
+        assert error["error"] == "超时"
+
+
+def test_add_document_replaces_same_document_in_run(tmp_path):
+    with ResultStore(tmp_path / "results.db") as store:
+        run_dir = str(tmp_path / "regulation_20250527_090130")
+        store.add_document(run_dir, _results("办法.pdf", "部分覆盖"))
+        store.add_document(run_dir, _results("办法.pdf", "完全覆盖", article="第四条"))
+        assert [h["结论"] for h in store.requirement_history(14)] == ["完全覆盖"]
+        assert store.conn.execute("SELECT COUNT(*) FROM clauses").fetchone()[0] == 1
+
+
+def test_helpers():
+    assert normalize_category("三、合规与法律") == "合规与法律"
+    assert normalize_category("合规与法律") == "合规与法律"
+    assert parse_run_dir("documentation_20250101_080000") == ("documentation", "2025-01-01 08:00:00")
+    assert parse_run_dir("profile") == (None, None)
+    assert _score("1分") == 1.0
+    assert _score("7.5 分") == 7.5
+    assert _score(8) == 8.0
+    assert _score("未评分") is None
+
+
+def test_search_returns_regulation_article_and_requirement(tmp_path):
+    results = _results("境外投资管理办法.pdf", "部分覆盖")
+    results["原文条款"] = [
+        {"条款编号": "第五条", "条文键": "第5条", "内容": "第五条 投资主体不得投资负面清单所列的敏感行业。"},
+    ]
+    with ResultStore(tmp_path / "results.db") as store:
+        store.add_document(str(tmp_path / "regulation_20250527_090130"), results)
+
+        hits = store.search("管理制度")
+        assert {(h["字段"], h["条款"], h["要求编号"]) for h in hits} == {
+            ("具体要求", "第三条", 14), ("原文内容", "第三条", 14),
+        }
+        assert hits[0]["法规"] == "境外投资管理办法.pdf"
+        assert hits[0]["提供商"] == ["deepseek"]
+
+        article_hits = store.search("负面清单")
+        assert len(article_hits) == 1
+        assert article_hits[0]["字段"] == "条文" and article_hits[0]["条款"] == "第五条"
+        assert "【负面清单】" in article_hits[0]["片段"]
+
+        # 多个词需全部命中；词中片段也能命中
+        assert store.search("建立 健全", field="原文内容")
+        assert store.search("面清")
+        assert store.search("负面清单 外汇") == []
+
+        # 替换文档后旧的索引条目随之删除
+        store.add_document(str(tmp_path / "regulation_20250527_090130"), _results("境外投资管理办法.pdf", "完全覆盖"))
+        assert store.search("负面清单") == []
+        store.reindex()
+        assert len(store.search("管理制度")) == 2
+
+
+def test_search_defaults_to_latest_run(tmp_path):
+    with ResultStore(tmp_path / "results.db") as store:
+        store.add_document(str(tmp_path / "regulation_20250524_112352"), _results("办法.pdf", "部分覆盖"))
+        store.add_document(str(tmp_path / "regulation_20250527_090130"), _results("办法.pdf", "完全覆盖"))
+        assert {h["运行时间"] for h in store.search("实施")} == set()
+        assert {h["运行时间"] for h in store.search("建立制度")} == {"2025-05-27 09:01:30"}
+        assert len({h["运行时间"] for h in store.search("建立制度", all_runs=True)}) == 2
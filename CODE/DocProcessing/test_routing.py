@@ -0,0 +1,72 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from routing import RoutingPolicy
+
+
+def _result(*answers):
+    return {"详细分析": {"类别": [
+        {"框架要求编号": i, "法规覆盖情况": a, "法规要求内容": [{"条款编号": "第1条"}] if a != "未覆盖" else []}
+        for i, a in enumerate(answers, 1)
+    ]}}
+
+
+def test_routes_to_cheapest_qualified_provider_after_agreement(tmp_path):
+    policy = RoutingPolicy(tmp_path / "stats.json", min_comparisons=2)
+    assert policy.choose(["openai", "anthropic"]) is None
+
+    results = {
+        "openai": _result("完全覆盖", "未覆盖"),
+        "anthropic": _result("完全覆盖", "未覆盖"),
+        "deepseek": _result("部分覆盖", "未覆盖"),
+    }
+    for provider, result in results.items():
+        policy.record_run(provider, 10.0, result, prompt_tokens=1000)
+    policy.record_results("法规.pdf", results)
+    policy.save()
+
+    reloaded = RoutingPolicy(tmp_path / "stats.json", min_comparisons=2)
+    # deepseek 一致率 50% 不达标，openai 比 anthropic 便宜
+    assert reloaded.choose(["deepseek", "openai", "anthropic"]) == "openai"
+    assert reloaded.history["法规.pdf"] == {"1": "完全覆盖", "2": "未覆盖"}
+
+
+def test_disagreement_with_history_escalates(tmp_path):
+    policy = RoutingPolicy(tmp_path / "stats.json")
+    policy.history["法规.pdf"] = {"1": "完全覆盖", "2": "未覆盖"}
+    assert policy.escalation_reasons("法规.pdf", _result("完全覆盖", "未覆盖"), expected_items=2) == []
+    reasons = policy.escalation_reasons("法规.pdf", _result("未覆盖", "未覆盖"), expected_items=2)
+    assert reasons == ["1 项结论与历史不一致"]
+
+
+def test_chunk_level_errors_count_as_failures(tmp_path):
+    policy = RoutingPolicy(tmp_path / "stats.json", min_comparisons=2)
+    partial = {**_result("完全覆盖"), "错误_openai": "超时"}
+    policy.record_run("openai", 5.0, partial, prompt_tokens=1000)
+    policy.record_run("openai", 10.0, _result("完全覆盖"), prompt_tokens=1000)
+
+    stats = policy.stats["openai"]
+    assert stats.failures == 1 and stats.failure_rate == 0.5
+    assert stats.avg_seconds == 10.0
+
+
+def test_prefiltered_and_carried_items_are_not_compared(tmp_path):
+    policy = RoutingPolicy(tmp_path / "stats.json", min_comparisons=1)
+
+    def result(answer):
+        data = _result(answer)
+        data["详细分析"]["预筛选"] = [{"框架要求编号": 2, "法规覆盖情况": "未覆盖", "判定来源": "关键词预筛选"}]
+        data["详细分析"]["沿用"] = [{"框架要求编号": 3, "法规覆盖情况": "完全覆盖"}]
+        data["增量分析"] = {"沿用大类": ["沿用"]}
+        return data
+
+    results = {"openai": result("完全覆盖"), "anthropic": result("完全覆盖"), "deepseek": result("部分覆盖")}
+    policy.record_results("法规.pdf", results)
+    # 只有编号1由模型给出，参与一致率和历史结论
+    assert {name: (s.comparisons, s.agreements) for name, s in policy.stats.items()} == {
+        "openai": (1, 1), "anthropic": (1, 1), "deepseek": (1, 0),
+    }
+    assert policy.history["法规.pdf"] == {"1": "完全覆盖"}
+    # 沿用项没有原文依据也不算低可信度；完整性仍按全部要求项计算
+    assert policy.escalation_reasons("法规.pdf", results["openai"], expected_items=3) == []
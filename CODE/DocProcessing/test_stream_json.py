@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from stream_json import StreamingResultParser, salvage_json
+
+RESPONSE = {
+    "文档标题": "境外投资管理办法",
+    "详细分析": {
+        "四、财务与市场风险": [
+            {"框架要求编号": 18, "法规覆盖情况": "部分覆盖",
+             "法规要求内容": [{"条款编号": "第十条", "原文内容": "含有 \" 和 } 的原文"}]},
+            {"框架要求编号": 19, "法规覆盖情况": "未覆盖", "法规要求内容": []},
+        ]
+    },
+    "关键发现": ["外汇登记"],
+}
+
+
+def test_parser_emits_items_incrementally_and_detects_completion():
+    text = "```json\n" + json.dumps(RESPONSE, ensure_ascii=False, indent=2) + "\n```"
+    parser = StreamingResultParser(expected_ids=[18, 19])
+
+    completed_at = None
+    for i in range(0, len(text), 5):
+        if parser.feed(text[i:i + 5]) and completed_at is None:
+            completed_at = i
+
+    assert completed_at is not None and completed_at < text.index("关键发现")
+    assert parser.finished
+    assert parser.salvage() == RESPONSE
+
+
+def test_salvage_keeps_closed_items_of_truncated_output():
+    text = json.dumps(RESPONSE, ensure_ascii=False)
+    truncated = text[:text.index('"框架要求编号": 19') + 10]
+
+    partial = salvage_json(truncated)
+    assert partial["文档标题"] == "境外投资管理办法"
+    assert [item["框架要求编号"] for item in partial["详细分析"]["四、财务与市场风险"]] == [18]
@@ -0,0 +1,58 @@
+import os
+import sys
+import zipfile
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from config import GlobalConfig, ReviewMode
+from text_cleaner import clean_pages, clean_text
+
+
+def test_clean_pages_strips_headers_page_numbers_and_wraps():
+    subjects = ["境内企业", "地方企业", "中央企业", "金融企业"]
+    duties = ["遵守所在国法律法规", "履行备案手续", "防范外汇风险", "保护员工安全"]
+    pages = [
+        f"境外投资管理办法\n第{i}条 {subject}开展境外投资应当\n{duty}。\n- {i} -"
+        for i, (subject, duty) in enumerate(zip(subjects, duties), 1)
+    ]
+    cleaned, stats = clean_pages(pages)
+
+    assert "境外投资管理办法" not in cleaned
+    assert "- 1 -" not in cleaned
+    assert "第1条境内企业开展境外投资应当遵守所在国法律法规。\n第2条" in cleaned
+    assert stats.repeated_lines_removed == 4
+    assert stats.page_numbers_removed == 4
+    assert stats.lines_joined == 4
+    assert stats.removed_chars > 0 and stats.removed_tokens > 0
+
+
+def test_clean_text_keeps_paragraphs_tables_and_numeric_lines():
+    text = "2024\n第一条 企业应当建立制度\n管理层负责实施\n项目 | 限额 | 审批\n外汇 | 100 | 董事会\n　附表\n15"
+    cleaned, stats = clean_text(text)
+
+    assert cleaned.split("\n") == [
+        "2024", "第一条企业应当建立制度", "管理层负责实施",
+        "项目 | 限额 | 审批", "外汇 | 100 | 董事会", "附表", "15",
+    ]
+    assert stats.page_numbers_removed == 0 and stats.lines_joined == 0
+
+
+def test_docx_input_is_not_treated_as_pdf_pages(tmp_path, make_analyzer):
+    rows = "".join(
+        f"<w:tr><w:tc><w:p><w:r><w:t>{a}</w:t></w:r></w:p></w:tc>"
+        f"<w:tc><w:p><w:r><w:t>{b}</w:t></w:r></w:p></w:tc></w:tr>"
+        for a, b in [("项目", "限额"), ("外汇敞口", "100")]
+    )
+    paragraphs = "".join(f"<w:p><w:r><w:t>{t}</w:t></w:r></w:p>" for t in ["1", "企业应当建立制度", "管理层负责实施"])
+    xml = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        f"{paragraphs}<w:tbl>{rows}</w:tbl><w:p><w:r><w:t>12</w:t></w:r></w:p></w:body></w:document>"
+    )
+    path = tmp_path / "制度.docx"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", xml)
+
+    cfg = GlobalConfig(review_mode=ReviewMode.DOCUMENTATION, llm_configs={}, input_path="", output_path="")
+    content, stats = make_analyzer(cfg).load_document(str(path))
+
+    assert content.split("\n") == ["1", "企业应当建立制度", "管理层负责实施", "项目 | 限额", "外汇敞口 | 100", "12"]
+    assert stats.page_numbers_removed == 0
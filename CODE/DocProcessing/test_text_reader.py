@@ -0,0 +1,49 @@
+import codecs
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from config import GlobalConfig, ReviewMode
+from text_reader import detect_encoding, read_text
+
+TEXT = "第一条 境内企业开展境外投资应当遵守所在国法律。\n第二条 企业应当防范外汇风险。\n"
+
+
+def test_bom_is_detected_and_stripped(tmp_path):
+    utf8 = tmp_path / "utf8.txt"
+    utf8.write_bytes(codecs.BOM_UTF8 + TEXT.encode("utf-8"))
+    utf16 = tmp_path / "utf16.txt"
+    utf16.write_bytes(TEXT.encode("utf-16"))
+
+    assert detect_encoding(utf8) == "utf-8-sig"
+    assert detect_encoding(utf16) == "utf-16"
+    assert read_text(utf8) == TEXT
+    assert read_text(utf16) == TEXT
+
+
+def test_gb18030_text(tmp_path):
+    path = tmp_path / "gb.txt"
+    path.write_bytes(TEXT.encode("gb18030"))
+
+    assert detect_encoding(path) in {"gb18030", "gbk", "gb2312"}
+    assert read_text(path) == TEXT
+
+
+def test_utf8_detected_when_sample_ends_mid_character(tmp_path):
+    path = tmp_path / "long.txt"
+    text = TEXT * 50
+    path.write_bytes(text.encode("utf-8"))
+
+    # 样本大小取奇数，使末尾的多字节汉字被截断，仍应识别为UTF-8
+    assert detect_encoding(path, sample_size=7) == "utf-8"
+    assert read_text(path) == text
+
+
+def test_analyzer_reads_full_text_file(tmp_path, make_analyzer):
+    path = tmp_path / "办法.txt"
+    path.write_text(TEXT * 20 + "第九十九条 本办法自发布之日起施行。\n", encoding="utf-8")
+    cfg = GlobalConfig(review_mode=ReviewMode.REGULATION, llm_configs={}, input_path="", output_path="")
+    cfg.max_content_length = 100
+
+    content, _ = make_analyzer(cfg).load_document(str(path))
+    assert content.endswith("第九十九条本办法自发布之日起施行。")
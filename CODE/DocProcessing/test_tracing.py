@@ -0,0 +1,47 @@
+import asyncio
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from tracing import Tracer
+
+
+def test_concurrent_tasks_get_their_own_lanes_and_parents():
+    tracer = Tracer()
+    tracer.enable()
+
+    async def document(name):
+        with tracer.span(name, "document"):
+            with tracer.span("LLM等待", "stage", provider="mock"):
+                await asyncio.sleep(0.01)
+
+    async def main():
+        with tracer.span("批处理", "run"):
+            await asyncio.gather(document("a.txt"), document("b.txt"))
+
+    asyncio.run(main())
+    spans = {s.name: s for s in tracer.spans if s.name != "LLM等待"}
+    llm = [s for s in tracer.spans if s.name == "LLM等待"]
+    assert spans["a.txt"].lane != spans["b.txt"].lane
+    assert spans["a.txt"].parent_id == spans["批处理"].span_id
+    assert {s.parent_id for s in llm} == {spans["a.txt"].span_id, spans["b.txt"].span_id}
+
+    events = [e for e in tracer.chrome_trace()["traceEvents"] if e["ph"] == "X"]
+    assert len(events) == 5 and all(e["dur"] >= 0 for e in events)
+    otlp = tracer.otlp_trace()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert sum(1 for s in otlp if "parentSpanId" not in s) == 1
+
+
+def test_disabled_tracer_records_nothing_and_errors_are_kept():
+    tracer = Tracer()
+    with tracer.span("x"):
+        pass
+    assert tracer.spans == []
+
+    tracer.enable()
+    try:
+        with tracer.span("失败"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert tracer.spans[0].error == "ValueError: boom"
@@ -0,0 +1,149 @@
+"""
+文本清洗模块
+在生成提示词之前去除页眉页脚、页码、硬换行等噪声，减少重复发送给LLM的无效字符
+"""
+import re
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Tuple
+
+# 页码格式：第3页 / 第3页 共20页 / - 3 - / 3/20 / Page 3 of 20 / 单独的数字
+PAGE_NUMBER_RE = re.compile(
+    r"^\s*(第\s*\d+\s*页(\s*[,，]?\s*共\s*\d+\s*页)?|[-—–]\s*\d+\s*[-—–]|\d+\s*/\s*\d+"
+    r"|page\s*\d+(\s*of\s*\d+)?|\d{1,4})\s*$",
+    re.IGNORECASE,
+)
+
+# 只在每页首尾若干行中查找页眉页脚，且页眉页脚通常较短
+EDGE_LINES = 3
+MAX_HEADER_CHARS = 60
+
+_CJK = r"一-鿿㐀-䶿"
+_CJK_RE = re.compile(f"[{_CJK}]")
+# 以条款、章节或列表编号开头的行是新段落，不并入上一行
+_NEW_BLOCK_RE = re.compile(
+    r"^\s*(第[一二三四五六七八九十百零〇\d]+[条章节款编]|[（(][一二三四五六七八九十\d]+[）)]"
+    r"|[一二三四五六七八九十]+、|\d+[.、．]|附件|附则)"
+)
+
+
+@dataclass
+class CleaningStats:
+    """文本清洗统计"""
+    original_chars: int = 0
+    cleaned_chars: int = 0
+    original_tokens: int = 0
+    cleaned_tokens: int = 0
+    repeated_lines_removed: int = 0
+    page_numbers_removed: int = 0
+    lines_joined: int = 0
+
+    @property
+    def removed_chars(self) -> int:
+        return self.original_chars - self.cleaned_chars
+
+    @property
+    def removed_tokens(self) -> int:
+        return self.original_tokens - self.cleaned_tokens
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["removed_chars"] = self.removed_chars
+        data["removed_tokens"] = self.removed_tokens
+        return data
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算token数：中文按每字1个token，其余字符按每4个字符1个token"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _line_key(line: str) -> str:
+    """用于识别重复行的归一化键（忽略空白和数字差异，如"第3页"与"第4页"）"""
+    return re.sub(r"\d+", "#", re.sub(r"\s+", "", line))
+
+
+def find_repeated_lines(pages: List[List[str]], min_ratio: float = 0.5) -> set:
+    """查找在多数页面首尾重复出现的行（页眉/页脚）"""
+    if len(pages) < 3:
+        return set()
+
+    counter: Counter = Counter()
+    for lines in pages:
+        edges = lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+        counter.update({_line_key(line) for line in edges if 0 < len(line.strip()) <= MAX_HEADER_CHARS})
+
+    threshold = max(3, int(len(pages) * min_ratio))
+    return {key for key, n in counter.items() if n >= threshold and key}
+
+
+def join_wrapped_lines(lines: List[str]) -> Tuple[List[str], int]:
+    """合并中文硬换行：上一行以汉字（而非句末标点）结尾且下一行以汉字开头、又不是新条款时合并"""
+    merged: List[str] = []
+    joined = 0
+    for line in lines:
+        if (
+            merged
+            and merged[-1]
+            and line
+            and _CJK_RE.match(merged[-1][-1])
+            and _CJK_RE.match(line[0])
+            and not _NEW_BLOCK_RE.match(line)
+        ):
+            merged[-1] += line
+            joined += 1
+        else:
+            merged.append(line)
+    return merged, joined
+
+
+def normalize_whitespace(text: str) -> str:
+    """统一空白字符：全角空格转半角、去除汉字间空格、压缩连续空行"""
+    text = text.replace("　", " ").replace("\xa0", " ").replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(f"(?<=[{_CJK}]) (?=[{_CJK}])", "", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def clean_pages(pages: List[str], repeated_ratio: float = 0.5) -> Tuple[str, CleaningStats]:
+    """清洗按页提取的PDF文本（去除页眉页脚、页码并合并硬换行），返回 (清洗后文本, 统计信息)"""
+    original = "\n".join(p for p in pages if p)
+    stats = CleaningStats(original_chars=len(original), original_tokens=estimate_tokens(original))
+
+    page_lines = [normalize_whitespace(p).split("\n") for p in pages if p]
+    repeated = find_repeated_lines(page_lines, repeated_ratio)
+
+    kept: List[str] = []
+    for lines in page_lines:
+        for idx, line in enumerate(lines):
+            at_edge = idx < EDGE_LINES or idx >= len(lines) - EDGE_LINES
+            if at_edge and PAGE_NUMBER_RE.match(line):
+                stats.page_numbers_removed += 1
+                continue
+            if at_edge and repeated and _line_key(line) in repeated:
+                stats.repeated_lines_removed += 1
+                continue
+            kept.append(line)
+
+    kept, stats.lines_joined = join_wrapped_lines(kept)
+    cleaned = normalize_whitespace("\n".join(kept))
+
+    stats.cleaned_chars = len(cleaned)
+    stats.cleaned_tokens = estimate_tokens(cleaned)
+    return cleaned, stats
+
+
+def clean_text(text: str) -> Tuple[str, CleaningStats]:
+    """
+    清洗不分页的文本（Word/纯文本），只统一空白：
+    其中的换行是真实的段落和表格行，没有页眉页脚，首尾的数字行也是正文
+    """
+    text = text or ""
+    stats = CleaningStats(original_chars=len(text), original_tokens=estimate_tokens(text))
+    cleaned = normalize_whitespace(text)
+    stats.cleaned_chars = len(cleaned)
+    stats.cleaned_tokens = estimate_tokens(cleaned)
+    return cleaned, stats
@@ -0,0 +1,59 @@
+"""
+文本文件读取模块
+· 根据文件开头的样本自动识别编码（UTF-8 / UTF-16 / GB18030 / GBK，安装charset_normalizer时支持更多编码）
+"""
+import codecs
+from pathlib import Path
+from typing import Optional
+
+try:
+    from charset_normalizer import from_bytes as detect_charset
+except ImportError:
+    detect_charset = None
+
+# 用于识别编码的样本大小
+SAMPLE_BYTES = 64 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def _decodes_cleanly(sample: bytes, encoding: str) -> bool:
+    """样本能否被该编码解码（允许末尾被截断的多字节字符）"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        decoder.decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_encoding(file_path: Path, sample_size: int = SAMPLE_BYTES) -> str:
+    """从文件开头的样本识别编码"""
+    with open(file_path, "rb") as fh:
+        sample = fh.read(sample_size)
+
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    if _decodes_cleanly(sample, "utf-8"):
+        return "utf-8"
+
+    if detect_charset is not None:
+        best = detect_charset(sample).best()
+        if best is not None:
+            return best.encoding
+
+    # 中文法规文本最常见的非UTF-8编码；GB18030 是 GBK/GB2312 的超集
+    return "gb18030"
+
+
+def read_text(file_path: Path, encoding: Optional[str] = None) -> str:
+    """按识别出的编码读取整个文本文件，无法解码的字节替换为 U+FFFD"""
+    file_path = Path(file_path)
+    encoding = encoding or detect_encoding(file_path)
+    return file_path.read_bytes().decode(encoding, errors="replace")
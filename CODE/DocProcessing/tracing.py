@@ -0,0 +1,210 @@
+"""
+运行追踪
+以 span 记录 BatchProcessor、分析器、综合报告和各导出步骤的起止时间及父子关系，运行结束后写出：
+· trace.json —— Chrome trace 格式，可在 chrome://tracing 或 Perfetto 中查看各文档、各请求的重叠与关键路径
+· trace.otlp.json（可选）—— OTLP/JSON 格式（与 OpenTelemetry Collector 的 file exporter 相同），可导入其他追踪系统
+每个 asyncio 任务和线程各占一条泳道，保证同一泳道内的 span 严格嵌套。
+未启用时 span() 几乎没有开销。
+"""
+import asyncio
+import json
+import os
+import secrets
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# 当前 span 的 (trace_id, span_id)，子 span 以此为父
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    category: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    lane: int
+    start: float
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class Tracer:
+    """线程安全、asyncio 感知的 span 记录器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.spans: List[Span] = []
+        self.lane_names: Dict[int, str] = {}
+        self._task_lanes: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+        self._thread_lanes: Dict[int, int] = {}
+        self._trace_id = secrets.token_hex(16)
+        # perf_counter 与墙钟时间的对应关系，用于换算 OTLP 的绝对时间戳
+        self._perf0 = time.perf_counter()
+        self._epoch0_ns = time.time_ns()
+
+    def enable(self):
+        """开始新的追踪（清空已有记录）"""
+        with self._lock:
+            self.enabled = True
+            self.spans.clear()
+            self.lane_names.clear()
+            self._task_lanes = weakref.WeakKeyDictionary()
+            self._thread_lanes.clear()
+            self._trace_id = secrets.token_hex(16)
+            self._perf0 = time.perf_counter()
+            self._epoch0_ns = time.time_ns()
+
+    def disable(self):
+        self.enabled = False
+
+    def _lane(self, name: str) -> int:
+        """当前 asyncio 任务或线程的泳道编号；新泳道以其第一个 span 命名"""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        with self._lock:
+            if task is not None:
+                lane = self._task_lanes.get(task)
+                if lane is None:
+                    lane = self._task_lanes[task] = len(self.lane_names) + 1
+            else:
+                ident = threading.get_ident()
+                lane = self._thread_lanes.get(ident)
+                if lane is None:
+                    lane = self._thread_lanes[ident] = len(self.lane_names) + 1
+            self.lane_names.setdefault(lane, name)
+        return lane
+
+    @contextmanager
+    def span(self, name: str, category: str = "", **attributes: Any) -> Iterator[Optional[Span]]:
+        """记录一段代码的 span；异常时记录错误信息后继续抛出"""
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        current = Span(
+            name=name,
+            category=category,
+            trace_id=self._trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            lane=self._lane(name),
+            start=time.perf_counter(),
+            attributes=attributes,
+        )
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as exc:
+            current.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            current.end = time.perf_counter()
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(current)
+
+    # ─────────────── 导出 ───────────────
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace 事件格式（时间单位为微秒）"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+            lanes = dict(self.lane_names)
+        events: List[Dict[str, Any]] = [
+            {"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": "DocProcessing"}}
+        ]
+        for lane, name in sorted(lanes.items()):
+            events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": lane, "args": {"name": name}})
+            events.append({"ph": "M", "name": "thread_sort_index", "pid": pid, "tid": lane, "args": {"sort_index": lane}})
+        for s in sorted(spans, key=lambda s: s.start):
+            args = {k: _plain(v) for k, v in s.attributes.items()}
+            if s.error:
+                args["错误"] = s.error
+            events.append({
+                "ph": "X",
+                "name": s.name,
+                "cat": s.category or "default",
+                "pid": pid,
+                "tid": s.lane,
+                "ts": round((s.start - self._perf0) * 1e6, 1),
+                "dur": round((s.end - s.start) * 1e6, 1),
+                "args": args,
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp_trace(self) -> Dict[str, Any]:
+        """OTLP/JSON 的 ExportTraceServiceRequest"""
+        with self._lock:
+            spans = list(self.spans)
+
+        def unix_nano(perf: float) -> str:
+            return str(self._epoch0_ns + int((perf - self._perf0) * 1e9))
+
+        otlp_spans = []
+        for s in spans:
+            attributes = [{"key": "category", "value": {"stringValue": s.category}}] if s.category else []
+            attributes += [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()]
+            item = {
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "name": s.name,
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": unix_nano(s.start),
+                "endTimeUnixNano": unix_nano(s.end),
+                "attributes": attributes,
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            }
+            if s.parent_id:
+                item["parentSpanId"] = s.parent_id
+            otlp_spans.append(item)
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "DocProcessing"}}]},
+                "scopeSpans": [{"scope": {"name": "DocProcessing.tracing"}, "spans": otlp_spans}],
+            }]
+        }
+
+    def write_chrome(self, path: Path) -> Path:
+        path = Path(path)
+        path.write_text(json.dumps(self.chrome_trace(), ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def write_otlp(self, path: Path) -> Path:
+        """写成单行JSON，与 Collector file exporter 的输出一致，可直接追加多次运行"""
+        path = Path(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(self.otlp_trace(), ensure_ascii=False) + "\n")
+        return path
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+# 进程内共享的追踪器
+TRACER = Tracer()
+span = TRACER.span